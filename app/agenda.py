@@ -0,0 +1,238 @@
+"""
+Módulo de agenda: duração dos serviços e índice de intervalos por dia
+"""
+import heapq
+from bisect import bisect_left, insort
+from datetime import timedelta
+from app.storage import data_iso
+from utils.validations import (
+    DURACAO_SERVICO, DURACAO_PADRAO, HORARIO_FUNCIONAMENTO, INTERVALO_HORARIOS
+)
+
+# Agendamentos com estes status não ocupam o horário
+STATUS_LIVRES = ("Cancelado",)
+
+
+def minutos(hora):
+    """
+    Converte "HH:MM" em minutos desde a meia-noite.
+
+    Returns:
+        int: Minutos, ou None se o texto for inválido
+    """
+    if not isinstance(hora, str):
+        return None
+    partes = hora.strip().split(":")
+    if len(partes) != 2 or not all(p.isdigit() for p in partes):
+        return None
+    horas, mins = int(partes[0]), int(partes[1])
+    if horas > 23 or mins > 59:
+        return None
+    return horas * 60 + mins
+
+
+def hora_texto(total_minutos):
+    """Converte minutos desde a meia-noite em texto HH:MM"""
+    return f"{total_minutos // 60:02d}:{total_minutos % 60:02d}"
+
+
+def duracao_servico(servico):
+    """Duração do serviço em minutos (DURACAO_PADRAO se não cadastrado)"""
+    return DURACAO_SERVICO.get(servico, DURACAO_PADRAO)
+
+
+def intervalo_agendamento(agendamento):
+    """
+    Horário ocupado por um agendamento.
+
+    Returns:
+        tuple: (dia ISO, início, fim) em minutos, ou None se o agendamento
+            não ocupa horário (cancelado ou data/hora inválidas)
+    """
+    if agendamento.get("status") in STATUS_LIVRES:
+        return None
+    dia = data_iso(agendamento.get("data"))
+    inicio = minutos(agendamento.get("hora"))
+    if dia is None or inicio is None:
+        return None
+    return dia, inicio, inicio + duracao_servico(agendamento.get("servico"))
+
+
+class IndiceIntervalos:
+    """
+    Horários ocupados por dia, ordenados pelo início, para achar conflitos.
+
+    Cada dia guarda uma lista ordenada de (início, fim, id). Um conflito com
+    [início, fim) só pode vir de um intervalo que começa antes de `fim` e
+    depois de `início - maior_duracao`, então a consulta é uma busca binária
+    mais os poucos vizinhos dessa janela: O(log n).
+
+    Attributes:
+        dias (dict): dia ISO -> lista ordenada de (início, fim, id)
+        intervalo_de (dict): id -> (dia, início, fim) atual
+        maior_duracao (int): Maior duração já indexada (limite da janela)
+    """
+
+    def __init__(self):
+        self.dias = {}
+        self.intervalo_de = {}
+        self.maior_duracao = 0
+
+    def construir(self, registros):
+        for id_registro, registro in registros.items():
+            self.adicionar(id_registro, registro)
+
+    def adicionar(self, id_registro, registro):
+        intervalo = intervalo_agendamento(registro)
+        if intervalo is None:
+            return
+        dia, inicio, fim = intervalo
+        insort(self.dias.setdefault(dia, []), (inicio, fim, id_registro))
+        self.intervalo_de[id_registro] = intervalo
+        self.maior_duracao = max(self.maior_duracao, fim - inicio)
+
+    def remover(self, id_registro):
+        intervalo = self.intervalo_de.pop(id_registro, None)
+        if intervalo is None:
+            return
+        dia, inicio, fim = intervalo
+        lista = self.dias[dia]
+        del lista[bisect_left(lista, (inicio, fim, id_registro))]
+        if not lista:
+            del self.dias[dia]
+
+    def atualizar(self, id_registro, registro):
+        self.remover(id_registro)
+        self.adicionar(id_registro, registro)
+
+    def ocupados(self, dia):
+        """Intervalos (início, fim, id) do dia, em ordem de início"""
+        return list(self.dias.get(dia, ()))
+
+    def conflitos(self, registro, ignorar=None):
+        """
+        Ids dos agendamentos que se sobrepõem ao registro informado.
+
+        Args:
+            registro (dict): Agendamento novo ou editado
+            ignorar (str, optional): Id do próprio registro (edição)
+
+        Returns:
+            list: Ids em conflito, em ordem de horário
+        """
+        intervalo = intervalo_agendamento(registro)
+        if intervalo is None:
+            return []
+        dia, inicio, fim = intervalo
+        lista = self.dias.get(dia)
+        if not lista:
+            return []
+        resultado = []
+        posicao = bisect_left(lista, (inicio - self.maior_duracao,))
+        while posicao < len(lista) and lista[posicao][0] < fim:
+            outro_inicio, outro_fim, id_outro = lista[posicao]
+            if outro_fim > inicio and id_outro != ignorar:
+                resultado.append(id_outro)
+            posicao += 1
+        return resultado
+
+    def livres(self, dia, abertura, fechamento, duracao, passo=INTERVALO_HORARIOS,
+               desde=None, ignorar=None):
+        """
+        Gera os inícios (em minutos) livres do dia para um serviço.
+
+        Os intervalos ocupados, já ordenados, são fundidos em blocos; cada
+        horário candidato da grade (abertura + k * passo) que cai em um
+        bloco salta direto para o fim dele, então o custo acompanha a
+        quantidade de agendamentos do dia, não de horários testados.
+
+        Args:
+            dia (str): Dia ISO
+            abertura, fechamento (int): Funcionamento em minutos
+            duracao (int): Duração do serviço em minutos
+            passo (int): Distância entre horários candidatos
+            desde (int, optional): Ignora horários anteriores (ex.: agora)
+            ignorar (str, optional): Id que não ocupa horário (edição)
+        """
+        blocos = []
+        for inicio, fim, id_registro in self.dias.get(dia, ()):
+            if id_registro == ignorar:
+                continue
+            if blocos and inicio < blocos[-1][1]:
+                blocos[-1][1] = max(blocos[-1][1], fim)
+            else:
+                blocos.append([inicio, fim])
+
+        def alinhar(minuto):
+            return abertura + -(-(minuto - abertura) // passo) * passo
+
+        horario = abertura if desde is None or desde <= abertura else alinhar(desde)
+        posicao = 0
+        while horario + duracao <= fechamento:
+            while posicao < len(blocos) and blocos[posicao][1] <= horario:
+                posicao += 1
+            if posicao < len(blocos) and blocos[posicao][0] < horario + duracao:
+                horario = alinhar(blocos[posicao][1])
+                continue
+            yield horario
+            horario += passo
+
+    def sobreposicoes(self):
+        """
+        Todos os pares de agendamentos sobrepostos, em uma passada por dia.
+
+        Varre cada dia em ordem de início mantendo um heap dos intervalos
+        ainda abertos; cada novo intervalo conflita com todos os abertos.
+
+        Returns:
+            list: Pares (id, id) em ordem de dia e horário
+        """
+        pares = []
+        for dia in sorted(self.dias):
+            abertos = []
+            for inicio, fim, id_registro in self.dias[dia]:
+                while abertos and abertos[0][0] <= inicio:
+                    heapq.heappop(abertos)
+                pares.extend((id_aberto, id_registro) for _, id_aberto in sorted(abertos))
+                heapq.heappush(abertos, (fim, id_registro))
+        return pares
+
+
+def horarios_livres(indice, servico, inicio, fim, limite=10, agora=None, ignorar=None,
+                    funcionamento=None, passo=INTERVALO_HORARIOS):
+    """
+    Próximos horários livres para um serviço entre duas datas.
+
+    Args:
+        indice (IndiceIntervalos): Horários ocupados
+        servico (str): Serviço (define a duração)
+        inicio, fim (date): Primeiro e último dia (inclusive)
+        limite (int): Quantidade máxima de horários
+        agora (datetime, optional): Horários anteriores a ele são ignorados
+        ignorar (str, optional): Id de agendamento que não ocupa horário
+        funcionamento (dict, optional): Dia da semana -> (abertura,
+            fechamento) "HH:MM"; padrão HORARIO_FUNCIONAMENTO
+        passo (int): Distância em minutos entre horários oferecidos
+
+    Returns:
+        list: (date, "HH:MM") em ordem cronológica
+    """
+    funcionamento = HORARIO_FUNCIONAMENTO if funcionamento is None else funcionamento
+    duracao = duracao_servico(servico)
+    resultado = []
+    dia = inicio
+    while dia <= fim and len(resultado) < limite:
+        horario = funcionamento.get(dia.weekday())
+        if horario:
+            abertura, fechamento = minutos(horario[0]), minutos(horario[1])
+            desde = None
+            if agora is not None and dia == agora.date():
+                desde = agora.hour * 60 + agora.minute
+            if agora is None or dia >= agora.date():
+                for livre in indice.livres(dia.isoformat(), abertura, fechamento, duracao,
+                                           passo, desde, ignorar):
+                    resultado.append((dia, hora_texto(livre)))
+                    if len(resultado) >= limite:
+                        break
+        dia += timedelta(days=1)
+    return resultado
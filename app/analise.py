@@ -0,0 +1,265 @@
+"""
+Módulo de análise em colunas, para consultas avulsas (NumPy opcional)
+
+Os cortes e agendamentos são carregados uma vez em colunas (preço em
+centavos, instante em segundos, mês, tipo/status como códigos de categoria);
+receita, distribuições, agrupamentos e top-K são então calculados sobre as
+colunas. Com NumPy instalado as operações são vetorizadas; sem ele, o mesmo
+cálculo é feito em Python puro, com resultados idênticos (conferir()).
+
+Carregar as colunas percorre as coleções, então o motor serve a análises
+pontuais (python main.py --analise); a aba de relatórios lê os agregados
+incrementais de app/relatorios.py. Os preços seguem a mesma regra de
+arredondamento (preco_centavos), então os números coincidem.
+"""
+from datetime import datetime, timedelta
+from app.relatorios import SEM_VALOR, preco_centavos
+from app.storage import data_iso
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+EPOCA = datetime(1970, 1, 1)
+
+
+def mes_iso(data_str):
+    """ "DD/MM/AAAA ..." -> "AAAA-MM" (None se a data for inválida)"""
+    dia = data_iso(data_str)
+    return dia[:7] if dia else None
+
+
+def instante(data_hora):
+    """ "DD/MM/AAAA HH:MM" (ou só a data) -> segundos desde 1970 (-1 se inválido)"""
+    for formato in ("%d/%m/%Y %H:%M", "%d/%m/%Y"):
+        try:
+            momento = datetime.strptime(str(data_hora).strip(), formato)
+        except ValueError:
+            continue
+        return int((momento - EPOCA).total_seconds())
+    return -1
+
+
+class Categorias:
+    """Converte valores de texto em códigos inteiros (0, 1, 2, ...)"""
+
+    def __init__(self):
+        self.valores = []
+        self.codigo_de = {}
+
+    def codigo(self, valor):
+        valor = SEM_VALOR if valor is None else valor
+        codigo = self.codigo_de.get(valor)
+        if codigo is None:
+            codigo = self.codigo_de[valor] = len(self.valores)
+            self.valores.append(valor)
+        return codigo
+
+
+class MotorAnalise:
+    """
+    Análises dos relatórios sobre colunas de cortes e agendamentos.
+
+    Cortes com preço inválido contam nas distribuições por tipo, mas não na
+    receita, como na aba de relatórios. Cortes sem data válida têm instante
+    -1 e ficam fora de periodo().
+
+    Attributes:
+        vetorizado (bool): True se o NumPy está disponível
+        tipos (Categorias): Tipos de corte
+        meses (Categorias): Meses "AAAA-MM" dos cortes
+        status (Categorias): Status dos agendamentos
+        colunas (dict): Nome -> array (NumPy) ou lista (Python puro)
+    """
+
+    @classmethod
+    def de_data_manager(cls, data_manager, usar_numpy=True):
+        """Carrega os cortes e os agendamentos atuais do DataManager"""
+        with data_manager.lock:
+            return cls(
+                data_manager.registros["cortes"].values(),
+                data_manager.registros["agendamentos"].values(),
+                usar_numpy,
+            )
+
+    def __init__(self, cortes=(), agendamentos=(), usar_numpy=True):
+        self.vetorizado = usar_numpy and np is not None
+        self.tipos = Categorias()
+        self.meses = Categorias()
+        self.status = Categorias()
+
+        precos, validos, instantes, tipos, meses = [], [], [], [], []
+        for corte in cortes:
+            valor = preco_centavos(corte.get("preco", "0"))
+            precos.append(valor or 0)
+            validos.append(valor is not None)
+            instantes.append(instante(corte.get("data_hora")))
+            tipos.append(self.tipos.codigo(corte.get("corte")))
+            meses.append(self.meses.codigo(mes_iso(corte.get("data_hora"))))
+        status = [self.status.codigo(a.get("status")) for a in agendamentos]
+
+        self.colunas = {
+            "centavos": precos, "valido": validos, "instante": instantes,
+            "tipo": tipos, "mes": meses, "status": status,
+        }
+        if self.vetorizado:
+            self.colunas = {
+                "centavos": np.array(precos, dtype=np.int64),
+                "valido": np.array(validos, dtype=bool),
+                "instante": np.array(instantes, dtype=np.int64),
+                "tipo": np.array(tipos, dtype=np.int64),
+                "mes": np.array(meses, dtype=np.int64),
+                "status": np.array(status, dtype=np.int64),
+            }
+
+    def versao_python(self):
+        """O mesmo motor sobre as mesmas colunas, sem NumPy"""
+        motor = MotorAnalise(usar_numpy=False)
+        motor.tipos, motor.meses, motor.status = self.tipos, self.meses, self.status
+        motor.colunas = {
+            coluna: [valor.item() for valor in valores] if self.vetorizado else list(valores)
+            for coluna, valores in self.colunas.items()
+        }
+        return motor
+
+    # Operações básicas (as duas implementações)
+    def somar_por(self, codigos, pesos, categorias):
+        """Soma dos pesos por código -> {valor: soma} (só códigos presentes)"""
+        if self.vetorizado:
+            somas = np.bincount(codigos, weights=pesos, minlength=len(categorias.valores))
+            presentes = np.bincount(codigos, minlength=len(categorias.valores)) > 0
+            return {
+                categorias.valores[codigo]: int(round(somas[codigo]))
+                for codigo in np.flatnonzero(presentes)
+            }
+        somas = {}
+        for codigo, peso in zip(codigos, pesos):
+            somas[codigo] = somas.get(codigo, 0) + peso
+        return {categorias.valores[codigo]: soma for codigo, soma in sorted(somas.items())}
+
+    def contar_por(self, codigos, categorias):
+        """Quantidade por código -> {valor: quantidade}"""
+        if self.vetorizado:
+            contagens = np.bincount(codigos, minlength=len(categorias.valores))
+            return {
+                categorias.valores[codigo]: int(contagens[codigo])
+                for codigo in np.flatnonzero(contagens)
+            }
+        return self.somar_por(codigos, [1] * len(codigos), categorias)
+
+    def precos_validos(self):
+        if self.vetorizado:
+            return self.colunas["centavos"][self.colunas["valido"]]
+        return [
+            preco for preco, valido in zip(self.colunas["centavos"], self.colunas["valido"])
+            if valido
+        ]
+
+    def codigos_validos(self, coluna):
+        if self.vetorizado:
+            return self.colunas[coluna][self.colunas["valido"]]
+        return [
+            codigo for codigo, valido in zip(self.colunas[coluna], self.colunas["valido"])
+            if valido
+        ]
+
+    # Consultas (valores em centavos)
+    def receita_centavos(self):
+        precos = self.precos_validos()
+        return int(precos.sum()) if self.vetorizado else sum(precos)
+
+    def estatisticas_precos(self):
+        """
+        Quantidade, soma, menor e maior dos preços positivos.
+
+        Returns:
+            dict: Chaves quantidade, soma, menor, maior (None se não houver)
+        """
+        precos = self.precos_validos()
+        if self.vetorizado:
+            positivos = precos[precos > 0]
+            if not positivos.size:
+                return {"quantidade": 0, "soma": 0, "menor": None, "maior": None}
+            return {
+                "quantidade": int(positivos.size), "soma": int(positivos.sum()),
+                "menor": int(positivos.min()), "maior": int(positivos.max()),
+            }
+        positivos = [preco for preco in precos if preco > 0]
+        if not positivos:
+            return {"quantidade": 0, "soma": 0, "menor": None, "maior": None}
+        return {
+            "quantidade": len(positivos), "soma": sum(positivos),
+            "menor": min(positivos), "maior": max(positivos),
+        }
+
+    def contagem_por_tipo(self):
+        return self.contar_por(self.colunas["tipo"], self.tipos)
+
+    def receita_por_tipo(self):
+        return self.somar_por(self.codigos_validos("tipo"), self.precos_validos(), self.tipos)
+
+    def receita_por_mes(self):
+        """Receita por mês "AAAA-MM", em ordem cronológica (sem data no fim)"""
+        receita = self.somar_por(self.codigos_validos("mes"), self.precos_validos(), self.meses)
+        return dict(sorted(receita.items(), key=lambda item: (item[0] == SEM_VALOR, item[0])))
+
+    def contagem_por_status(self):
+        return self.contar_por(self.colunas["status"], self.status)
+
+    def periodo(self):
+        """(primeiro, último) corte com data válida, como datetime; None se não houver"""
+        instantes = self.colunas["instante"]
+        if self.vetorizado:
+            com_data = instantes[instantes >= 0]
+            if not com_data.size:
+                return None
+            primeiro, ultimo = int(com_data.min()), int(com_data.max())
+        else:
+            com_data = [valor for valor in instantes if valor >= 0]
+            if not com_data:
+                return None
+            primeiro, ultimo = min(com_data), max(com_data)
+        return (EPOCA + timedelta(seconds=primeiro), EPOCA + timedelta(seconds=ultimo))
+
+    def top(self, grupos, limite=3):
+        """
+        Os `limite` maiores valores de um agrupamento (ex.: receita_por_tipo).
+
+        Returns:
+            list: (chave, valor) do maior para o menor
+        """
+        if self.vetorizado and grupos:
+            chaves = list(grupos)
+            valores = np.fromiter(grupos.values(), dtype=np.int64, count=len(grupos))
+            # Ordenação estável: empates na mesma ordem do Python puro
+            escolhidos = np.argsort(-valores, kind="stable")[:limite]
+            return [(chaves[i], int(valores[i])) for i in escolhidos]
+        return sorted(grupos.items(), key=lambda item: item[1], reverse=True)[:limite]
+
+    def resumo(self):
+        """Todas as consultas do motor em um dicionário (valores em centavos)"""
+        return {
+            "receita": self.receita_centavos(),
+            "precos": self.estatisticas_precos(),
+            "periodo": self.periodo(),
+            "por_tipo": self.contagem_por_tipo(),
+            "receita_por_tipo": self.receita_por_tipo(),
+            "top_tipos": self.top(self.receita_por_tipo()),
+            "receita_por_mes": self.receita_por_mes(),
+            "por_status": self.contagem_por_status(),
+        }
+
+    def conferir(self):
+        """
+        Compara o resumo vetorizado com o de Python puro sobre as mesmas colunas.
+
+        Returns:
+            list: Chaves do resumo que divergem (vazia se tudo confere ou se
+                o NumPy não está disponível)
+        """
+        if not self.vetorizado:
+            return []
+        vetorizado, puro = self.resumo(), self.versao_python().resumo()
+        return [chave for chave in vetorizado if vetorizado[chave] != puro[chave]]
@@ -0,0 +1,442 @@
+"""
+Módulo de busca textual (índice de prefixos) do DataManager
+"""
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+
+def normalizar(texto):
+    """
+    Normaliza texto para busca: sem acentos e sem diferença de maiúsculas.
+
+    Examples:
+        >>> normalizar("João")
+        "joao"
+    """
+    if not isinstance(texto, str):
+        return ""
+    decomposto = unicodedata.normalize("NFKD", texto)
+    sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return sem_acentos.casefold()
+
+
+def so_digitos(texto):
+    """Mantém apenas os dígitos (telefones: "(11) 9999-0000" -> "1199990000")"""
+    return re.sub(r"\D", "", texto) if isinstance(texto, str) else ""
+
+
+def tokenizar(texto):
+    """Divide o texto normalizado em palavras (letras e dígitos)"""
+    return re.findall(r"\w+", normalizar(texto))
+
+
+def distancia_edicao(a, b, maximo=None):
+    """
+    Distância de edição entre duas palavras (Levenshtein com transposição).
+
+    Troca de duas letras vizinhas ("jaoo" -> "joao") conta como um erro,
+    o engano de digitação mais comum.
+
+    Args:
+        maximo (int, optional): Para assim que a distância certamente
+            passar desse valor (retorna maximo + 1)
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if maximo is not None and len(a) - len(b) > maximo:
+        return maximo + 1
+    penultima = None
+    anterior = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        atual = [i]
+        for j, cb in enumerate(b, 1):
+            custo = min(anterior[j] + 1, atual[j - 1] + 1, anterior[j - 1] + (ca != cb))
+            if penultima and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                custo = min(custo, penultima[j - 2] + 1)
+            atual.append(custo)
+        if maximo is not None and min(atual) > maximo:
+            return maximo + 1
+        penultima, anterior = anterior, atual
+    return anterior[-1]
+
+
+def trigramas(palavra):
+    """Trigramas da palavra com margem ("ana" -> "  a", " an", "ana", "na ")"""
+    marcada = f"  {palavra} "
+    return {marcada[i:i + 3] for i in range(len(marcada) - 2)}
+
+
+class IndiceTrigramas:
+    """
+    Índice de palavras por trigrama, para busca tolerante a erros de digitação.
+
+    Guarda cada palavra distinta uma única vez (com a contagem de uso), de
+    modo que o custo depende do vocabulário e não do número de registros.
+
+    Attributes:
+        palavras (dict): palavra -> quantas chaves a usam
+        por_trigrama (dict): trigrama -> {palavra: None}
+    """
+
+    def __init__(self):
+        self.palavras = {}
+        self.por_trigrama = {}
+
+    def adicionar(self, palavra):
+        if palavra in self.palavras:
+            self.palavras[palavra] += 1
+            return
+        self.palavras[palavra] = 1
+        for trigrama in trigramas(palavra):
+            self.por_trigrama.setdefault(trigrama, {})[palavra] = None
+
+    def remover(self, palavra):
+        if palavra not in self.palavras:
+            return
+        self.palavras[palavra] -= 1
+        if self.palavras[palavra]:
+            return
+        del self.palavras[palavra]
+        for trigrama in trigramas(palavra):
+            grupo = self.por_trigrama[trigrama]
+            del grupo[palavra]
+            if not grupo:
+                del self.por_trigrama[trigrama]
+
+    def similares(self, termo, limite=10, minimo=0.5, candidatos=1000):
+        """
+        Palavras parecidas com o termo, da mais para a menos parecida.
+
+        Os candidatos vêm dos trigramas em comum; os melhores são
+        reordenados pela distância de edição, comparando também com o
+        início da palavra (quem ainda está digitando).
+
+        Returns:
+            list: Tuplas (palavra, nota), nota entre 0 e 1
+        """
+        consulta = trigramas(termo)
+        comuns = {}
+        for trigrama in consulta:
+            for palavra in self.por_trigrama.get(trigrama, ()):
+                comuns[palavra] = comuns.get(palavra, 0) + 1
+
+        def dice(palavra):
+            return 2 * comuns[palavra] / (len(consulta) + len(palavra) + 1)
+
+        melhores = sorted(comuns, key=dice, reverse=True)[:candidatos]
+        notas = []
+        for palavra in melhores:
+            tamanho = max(len(termo), len(palavra))
+            erros = distancia_edicao(termo, palavra, int(tamanho * (1 - minimo)))
+            nota = 1 - erros / tamanho
+            inicio = palavra[:len(termo)]
+            erros_inicio = distancia_edicao(termo, inicio, int(len(termo) * (1 - minimo)))
+            nota = max(nota, 0.9 * (1 - erros_inicio / len(termo)))
+            if nota >= minimo:
+                notas.append((palavra, nota))
+        notas.sort(key=lambda item: (-item[1], item[0]))
+        return notas[:limite]
+
+
+class NoTrie:
+    __slots__ = ("filhos", "ids", "total")
+
+    def __init__(self):
+        self.filhos = {}
+        self.ids = {}      # id -> quantas vezes a chave termina aqui
+        self.total = 0     # chaves na subárvore (para escolher o menor conjunto)
+
+
+class Trie:
+    """
+    Árvore de prefixos de chaves -> ids.
+
+    Inserção e remoção custam o tamanho da chave; uma consulta por prefixo
+    custa o tamanho do prefixo mais o das chaves encontradas.
+    """
+
+    def __init__(self):
+        self.raiz = NoTrie()
+
+    def inserir(self, chave, id_registro):
+        no = self.raiz
+        no.total += 1
+        for caractere in chave:
+            no = no.filhos.setdefault(caractere, NoTrie())
+            no.total += 1
+        no.ids[id_registro] = no.ids.get(id_registro, 0) + 1
+
+    def remover(self, chave, id_registro):
+        caminho = [self.raiz]
+        no = self.raiz
+        for caractere in chave:
+            no = no.filhos.get(caractere)
+            if no is None:
+                return
+            caminho.append(no)
+        if id_registro not in no.ids:
+            return
+
+        no.ids[id_registro] -= 1
+        if not no.ids[id_registro]:
+            del no.ids[id_registro]
+        for no in caminho:
+            no.total -= 1
+        # Podar os nós que ficaram vazios
+        for profundidade in range(len(chave), 0, -1):
+            if caminho[profundidade].total:
+                break
+            del caminho[profundidade - 1].filhos[chave[profundidade - 1]]
+
+    def no_do_prefixo(self, prefixo):
+        no = self.raiz
+        for caractere in prefixo:
+            no = no.filhos.get(caractere)
+            if no is None:
+                return None
+        return no
+
+    def exatos(self, chave):
+        """Ids cuja chave é exatamente a informada"""
+        no = self.no_do_prefixo(chave)
+        return list(no.ids) if no else []
+
+    def contar(self, prefixo):
+        """Quantidade de chaves com o prefixo (O(tamanho do prefixo))"""
+        no = self.no_do_prefixo(prefixo)
+        return no.total if no else 0
+
+    def buscar(self, prefixo, limite=None):
+        """
+        Ids das chaves que começam com o prefixo, em ordem alfabética da chave.
+
+        Args:
+            limite (int, optional): Para após encontrar essa quantidade de ids
+
+        Returns:
+            list: Ids sem repetição
+        """
+        no = self.no_do_prefixo(prefixo)
+        if no is None:
+            return []
+        encontrados = {}
+        pilha = [no]
+        while pilha:
+            no = pilha.pop()
+            for id_registro in no.ids:
+                encontrados[id_registro] = None
+            if limite is not None and len(encontrados) >= limite:
+                break
+            pilha.extend(no.filhos[c] for c in sorted(no.filhos, reverse=True))
+        ids = list(encontrados)
+        return ids[:limite] if limite is not None else ids
+
+
+class IndiceTexto:
+    """
+    Índice de busca textual de uma coleção, mantido a cada mutação.
+
+    Campos de texto são normalizados (sem acentos, minúsculas) e quebrados
+    em palavras; campos de dígitos (telefone) viram só os dígitos. Uma
+    consulta é dividida em palavras e cada palavra precisa ser prefixo de
+    alguma chave do registro ("jo sil" encontra "João da Silva").
+
+    Attributes:
+        campos_texto (tuple): Campos indexados por palavra
+        campos_digitos (tuple): Campos indexados só pelos dígitos
+        trie (Trie): Chaves -> ids
+        vocabulario (IndiceTrigramas): Palavras dos campos de texto, para
+            a busca aproximada
+        chaves_de (dict): id -> chaves indexadas do registro
+    """
+
+    def __init__(self, campos_texto=(), campos_digitos=()):
+        self.campos_texto = campos_texto
+        self.campos_digitos = campos_digitos
+        self.trie = Trie()
+        self.vocabulario = IndiceTrigramas()
+        self.chaves_de = {}
+
+    def chaves(self, registro):
+        """Chaves de busca de um registro"""
+        chaves = []
+        for campo in self.campos_texto:
+            chaves.extend(tokenizar(registro.get(campo, "")))
+        for campo in self.campos_digitos:
+            digitos = so_digitos(registro.get(campo, ""))
+            if digitos:
+                chaves.append(digitos)
+                # Número sem DDD, para quem digita só o telefone local
+                if len(digitos) >= 10:
+                    chaves.append(digitos[2:])
+        return chaves
+
+    def construir(self, registros):
+        for id_registro, registro in registros.items():
+            self.adicionar(id_registro, registro)
+
+    def adicionar(self, id_registro, registro):
+        chaves = self.chaves(registro)
+        self.chaves_de[id_registro] = chaves
+        for chave in chaves:
+            self.trie.inserir(chave, id_registro)
+            if not chave.isdigit():
+                self.vocabulario.adicionar(chave)
+
+    def remover(self, id_registro):
+        for chave in self.chaves_de.pop(id_registro, ()):
+            self.trie.remover(chave, id_registro)
+            if not chave.isdigit():
+                self.vocabulario.remover(chave)
+
+    def atualizar(self, id_registro, registro):
+        self.remover(id_registro)
+        self.adicionar(id_registro, registro)
+
+    def termos(self, consulta):
+        """Palavras da consulta; telefones digitados com pontuação viram dígitos"""
+        palavras = tokenizar(consulta)
+        digitos = so_digitos(consulta)
+        if digitos and len(palavras) > 1 and all(p.isdigit() for p in palavras):
+            return [digitos]
+        return palavras
+
+    def corresponde(self, registro, consulta):
+        """Indica se o registro atende à consulta (sem usar a árvore)"""
+        termos = self.termos(consulta)
+        chaves = self.chaves(registro)
+        return all(any(chave.startswith(termo) for chave in chaves) for termo in termos)
+
+    def buscar(self, consulta, limite=None):
+        """
+        Ids dos registros que atendem à consulta.
+
+        A palavra com menos ocorrências conduz a busca na árvore; as demais
+        são conferidas nas chaves de cada candidato, então o custo acompanha
+        o tamanho do menor resultado.
+
+        Returns:
+            list: Ids em ordem alfabética da chave encontrada, ou None se a
+                consulta não tiver palavras (sem filtro)
+        """
+        termos = self.termos(consulta)
+        if not termos:
+            return None
+        termos.sort(key=self.trie.contar)
+        principal, restantes = termos[0], termos[1:]
+        if not restantes:
+            return self.trie.buscar(principal, limite)
+
+        resultado = []
+        for id_registro in self.trie.buscar(principal):
+            chaves = self.chaves_de[id_registro]
+            if all(any(chave.startswith(termo) for chave in chaves) for termo in restantes):
+                resultado.append(id_registro)
+                if limite is not None and len(resultado) >= limite:
+                    break
+        return resultado
+
+    def buscar_aproximado(self, consulta, limite=20):
+        """
+        Registros parecidos com a consulta, tolerando erros de digitação.
+
+        Cada palavra da consulta é comparada com o vocabulário (trigramas e
+        distância de edição); a nota do registro é a média das melhores
+        notas de cada palavra, e todas as palavras precisam ter algum par.
+        Palavras só com dígitos usam a busca por prefixo do telefone.
+
+        Returns:
+            list: Tuplas (id, nota) da maior para a menor nota
+        """
+        termos = self.termos(consulta)
+        if not termos:
+            return []
+
+        notas = None
+        for termo in termos:
+            melhores = {}
+            if termo.isdigit():
+                for id_registro in self.trie.buscar(termo):
+                    melhores[id_registro] = 1.0
+            else:
+                for palavra, nota in self.vocabulario.similares(termo):
+                    for id_registro in self.trie.exatos(palavra):
+                        if nota > melhores.get(id_registro, 0):
+                            melhores[id_registro] = nota
+            if notas is None:
+                notas = melhores
+            else:
+                notas = {
+                    id_registro: nota + melhores[id_registro]
+                    for id_registro, nota in notas.items() if id_registro in melhores
+                }
+            if not notas:
+                return []
+
+        ranking = sorted(notas.items(), key=lambda item: item[1], reverse=True)[:limite]
+        return [(id_registro, nota / len(termos)) for id_registro, nota in ranking]
+
+
+class CacheBusca:
+    """
+    Cache LRU de resultados de busca por substring, ligado à versão dos dados.
+
+    Qualquer mutação muda a versão da coleção e esvazia o cache. Quando o
+    termo novo contém um termo já em cache ("cor" -> "cort"), o resultado
+    antigo serve de ponto de partida: basta estreitá-lo em vez de percorrer
+    a coleção inteira.
+
+    Attributes:
+        capacidade (int): Máximo de consultas guardadas
+        versao: Versão dos dados a que os resultados se referem
+        acertos (int): Consultas respondidas direto do cache
+        estreitamentos (int): Consultas resolvidas a partir de um resultado anterior
+        falhas (int): Consultas que precisaram percorrer a coleção
+    """
+
+    def __init__(self, capacidade=16):
+        self.capacidade = capacidade
+        self.versao = None
+        self.resultados = OrderedDict()
+        self.lock = threading.Lock()
+        self.acertos = 0
+        self.estreitamentos = 0
+        self.falhas = 0
+
+    def sincronizar(self, versao):
+        if versao != self.versao:
+            self.resultados.clear()
+            self.versao = versao
+
+    def obter(self, versao, termo):
+        """
+        Resultado da consulta ou o menor resultado que a contém.
+
+        Returns:
+            tuple: (resultado, exato); (None, False) se nada servir
+        """
+        with self.lock:
+            self.sincronizar(versao)
+            if termo in self.resultados:
+                self.resultados.move_to_end(termo)
+                self.acertos += 1
+                return self.resultados[termo], True
+            base = None
+            for anterior, resultado in self.resultados.items():
+                if anterior in termo and (base is None or len(resultado) < len(base)):
+                    base = resultado
+            if base is None:
+                self.falhas += 1
+            else:
+                self.estreitamentos += 1
+            return base, False
+
+    def guardar(self, versao, termo, resultado):
+        with self.lock:
+            self.sincronizar(versao)
+            self.resultados[termo] = resultado
+            self.resultados.move_to_end(termo)
+            while len(self.resultados) > self.capacidade:
+                self.resultados.popitem(last=False)
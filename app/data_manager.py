@@ -1,91 +1,932 @@
 """
 Módulo de gerenciamento de dados
 """
-import json
+import heapq
 import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import chain, islice
 from tkinter import messagebox
+from app.agenda import IndiceIntervalos, horarios_livres
+from app.busca import IndiceTexto
+from app.eventos import BarramentoEventos, EventoMudanca
+from app.indices import IndicesColecao
+from app.relatorios import AgregadosRelatorio, carregar_rollups, salvar_rollups
+from app.storage import COLUNAS_INDEXADAS, criar_armazenamento, data_iso
+from app.write_behind import ArmazenamentoWriteBehind
+from models.models import gerar_id
+from utils.atomic_write import obter_politica
 
 
 class DataManager:
-    def __init__(self):
+    # Quantos dias à frente procurar horários livres quando não há data final
+    DIAS_BUSCA_HORARIOS = 60
+
+    def __init__(self, armazenamento=None, write_behind=None, atraso_gravacao=None,
+                 limite_gravacao=None):
+        """
+        Inicializa o gerenciador de dados.
+
+        Args:
+            armazenamento (str, optional): Backend de persistência ("json" ou
+                "sqlite"). Padrão: variável BARBEARIA_ARMAZENAMENTO ou "json".
+            write_behind (bool, optional): Grava em segundo plano, agrupando
+                mutações. Padrão: variável BARBEARIA_WRITE_BEHIND ("1" liga).
+            atraso_gravacao (float, optional): Segundos sem mutações antes da
+                gravação em segundo plano. Padrão: BARBEARIA_WRITE_BEHIND_ATRASO ou 0.5.
+            limite_gravacao (int, optional): Mutações pendentes que forçam a
+                gravação. Padrão: BARBEARIA_WRITE_BEHIND_LIMITE ou 100.
+        """
         self.clientes_file = "data/clientes.json"
         self.cortes_file = "data/cortes.json"
         self.agendamentos_file = "data/agendamentos.json"
-        
-        self.clientes = self.carregar_dados(self.clientes_file, [])
-        self.cortes = self.carregar_dados(self.cortes_file, [])
-        self.agendamentos = self.carregar_dados(self.agendamentos_file, [])
-    
-    def carregar_dados(self, arquivo, padrao):
-        """Carrega dados de um arquivo JSON"""
+
+        self.arquivos = {
+            "clientes": self.clientes_file,
+            "cortes": self.cortes_file,
+            "agendamentos": self.agendamentos_file,
+        }
+        tipo = armazenamento or os.environ.get("BARBEARIA_ARMAZENAMENTO", "json")
+        self.armazenamento = criar_armazenamento(tipo, self.arquivos)
+
+        # Protege os registros em memória contra a thread de gravação
+        self.lock = threading.RLock()
+        if write_behind is None:
+            write_behind = os.environ.get("BARBEARIA_WRITE_BEHIND", "0") == "1"
+        if write_behind:
+            if atraso_gravacao is None:
+                atraso_gravacao = float(os.environ.get("BARBEARIA_WRITE_BEHIND_ATRASO", "0.5"))
+            if limite_gravacao is None:
+                limite_gravacao = int(os.environ.get("BARBEARIA_WRITE_BEHIND_LIMITE", "100"))
+            self.armazenamento = ArmazenamentoWriteBehind(
+                self.armazenamento, self.lock, atraso_gravacao, limite_gravacao
+            )
+
+        # Registros de cada coleção indexados por id, na ordem de inserção.
+        # Busca, edição e exclusão por id são O(1).
+        self.registros = {
+            colecao: self.carregar_dados(colecao, {}) for colecao in self.arquivos
+        }
+        # Listas entregues por get_*; reconstruídas só após edição/exclusão
+        self.listas = {}
+        # Posição de cada id na ordem de inserção (ordena o resultado de
+        # buscar); reconstruída só após exclusão, como as listas
+        self.posicoes = {}
+        # Versão de cada coleção, incrementada a cada mutação (invalida caches)
+        self.versoes = {colecao: 0 for colecao in self.arquivos}
+
+        # Métricas das buscas ao digitar, por origem (ex.: aba de clientes)
+        self.metricas_busca = {}
+
+        # Ouvintes avisados a cada registro adicionado, alterado ou removido
+        self.eventos = BarramentoEventos()
+
+        # Lote aberto por batch(): mutações a gravar, desfazer e avisar na saída
+        self.lote_atual = None
+
+        # Índices secundários em memória (mesmas colunas do SQLite), mantidos
+        # a cada adicionar/atualizar/remover; "data" é ordenado por dia
+        self.indices = {}
+        for colecao, registros in self.registros.items():
+            self.indices[colecao] = IndicesColecao(COLUNAS_INDEXADAS[colecao], ordenadas=("data",))
+            self.indices[colecao].construir(registros)
+
+        # Índice de prefixos para a busca textual (sem acentos; telefone por dígitos)
+        self.textos = {
+            "clientes": IndiceTexto(("nome", "email"), ("telefone",)),
+            "agendamentos": IndiceTexto(("cliente",)),
+        }
+        for colecao, indice in self.textos.items():
+            indice.construir(self.registros[colecao])
+
+        # Horários ocupados por dia, para detectar agendamentos sobrepostos
+        self.intervalos = {"agendamentos": IndiceIntervalos()}
+        for colecao, indice in self.intervalos.items():
+            indice.construir(self.registros[colecao])
+
+        # Agregados dos relatórios (rollups por dia, mês, tipo e status), lidos
+        # do arquivo se ele corresponde aos dados carregados; senão, recalculados
+        self.rollups_file = os.path.join(os.path.dirname(self.clientes_file), "rollups.json")
+        agregados = carregar_rollups(self.rollups_file, self.impressao_dados())
+        if agregados is None:
+            agregados = AgregadosRelatorio()
+            agregados.construir(self)
+        self.agregados = agregados
+        self.inscrever(agregados.ao_mudar_dados)
+
+        # Os rollups são regravados quando os arquivos ficam em dia com a
+        # memória (snapshot ou flush do write-behind), assim que os agregados
+        # tiverem recebido os avisos das mesmas mutações
+        self.avisos_em_curso = 0
+        self.rollups_atrasados = False
+        self.armazenamento.ao_gravar = self.ao_gravar_dados
+
+    def carregar_dados(self, colecao, padrao):
+        """Carrega uma coleção do backend de armazenamento"""
         try:
-            if os.path.exists(arquivo):
-                with open(arquivo, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return padrao
+            return self.armazenamento.carregar(colecao)
         except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao carregar {arquivo}: {str(e)}")
+            messagebox.showerror("Erro", f"Erro ao carregar {colecao}: {str(e)}")
             return padrao
-    
-    def salvar_dados(self, dados, arquivo):
-        """Salva dados em arquivo JSON"""
+
+    def registrar_mutacao(self, colecao, op, id_registro=None, registro=None):
+        """
+        Persiste uma única mutação no backend.
+
+        No backend JSON a mutação é anexada ao journal; no SQLite vira
+        um INSERT/UPDATE/DELETE de uma linha. Em nenhum caso a coleção
+        inteira é reescrita. Dentro de batch() a gravação fica para o fim.
+        """
+        if self.lote_atual is not None:
+            self.lote_atual["operacoes"].setdefault(colecao, []).append((op, id_registro, registro))
+            return
+        # O aviso desta mutação sai depois, em notificar()
+        self.avisos_em_curso += 1
         try:
-            os.makedirs(os.path.dirname(arquivo), exist_ok=True)
-            with open(arquivo, 'w', encoding='utf-8') as f:
-                json.dump(dados, f, indent=2, ensure_ascii=False)
+            self.armazenamento.registrar(colecao, self.registros[colecao], op, id_registro, registro)
         except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao salvar {arquivo}: {str(e)}")
-    
+            messagebox.showerror("Erro", f"Erro ao salvar {colecao}: {str(e)}")
+
+    def registrar_mutacoes(self, colecao, operacoes):
+        """
+        Persiste várias mutações de uma coleção em uma única gravação.
+
+        No JSON vira uma única escrita no journal (ou um snapshot, se o
+        journal atingiria o limite); no SQLite, uma única transação.
+
+        Args:
+            operacoes (list): Tuplas (op, id, registro), na ordem em que ocorreram
+        """
+        if not operacoes:
+            return
+        if self.lote_atual is not None:
+            self.lote_atual["operacoes"].setdefault(colecao, []).extend(operacoes)
+            return
+        try:
+            if self.armazenamento.precisa_compactar(colecao, len(operacoes)):
+                self.armazenamento.compactar(colecao, self.registros[colecao])
+            else:
+                self.armazenamento.registrar_lote(colecao, operacoes)
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao salvar {colecao}: {str(e)}")
+
+    def compactar_tudo(self):
+        """Compacta todas as coleções (ex.: ao encerrar a sessão)"""
+        for colecao, dados in self.registros.items():
+            try:
+                self.armazenamento.compactar(colecao, dados)
+            except Exception as e:
+                messagebox.showerror("Erro", f"Erro ao compactar {colecao}: {str(e)}")
+
+    def flush(self):
+        """Grava imediatamente as mutações pendentes do modo write-behind"""
+        if isinstance(self.armazenamento, ArmazenamentoWriteBehind):
+            self.armazenamento.flush()
+            erro = self.armazenamento.ultimo_erro
+            if self.armazenamento.estatisticas()["pendentes"] and erro:
+                messagebox.showerror("Erro", f"Erro ao salvar {erro}")
+
+    def fechar(self):
+        """Grava tudo, compacta e libera o backend (logout ou fechamento da janela)"""
+        # Os rollups são gravados uma vez, no fim, e não a cada snapshot
+        self.armazenamento.ao_gravar = None
+        self.flush()
+        self.compactar_tudo()
+        try:
+            self.armazenamento.fechar()
+            obter_politica().sincronizar_pendentes()
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao fechar armazenamento: {str(e)}")
+        self.gravar_rollups()
+
+    def impressao_dados(self):
+        """
+        Identifica o estado gravado dos dados (arquivos e quantidade de registros).
+
+        Os rollups gravados só valem se a impressão continuar a mesma; qualquer
+        gravação nos arquivos de dados a altera.
+        """
+        return {
+            "arquivos": self.armazenamento.impressao(),
+            "totais": {colecao: len(registros) for colecao, registros in self.registros.items()},
+        }
+
+    def gravar_rollups(self):
+        """Grava os rollups com a impressão atual dos dados (dados já gravados)"""
+        try:
+            with self.lock:
+                salvar_rollups(self.rollups_file, self.agregados, self.impressao_dados())
+        except Exception as e:
+            print(f"✗ Erro ao salvar rollups: {e}")
+
+    def ao_gravar_dados(self):
+        """Chamado pelo backend quando os arquivos ficam em dia com a memória"""
+        with self.lock:
+            self.rollups_atrasados = True
+        self.gravar_rollups_em_dia()
+
+    def concluir_avisos(self, quantidade):
+        """Desconta avisos já entregues aos ouvintes (ver avisos_em_curso)"""
+        with self.lock:
+            self.avisos_em_curso -= quantidade
+        self.gravar_rollups_em_dia()
+
+    def gravar_rollups_em_dia(self):
+        """
+        Regrava os rollups se houve snapshot ou flush desde a última vez.
+
+        Só grava quando os agregados correspondem aos arquivos: nenhum lote
+        aberto, nenhum aviso ainda a caminho dos agregados e nada na fila do
+        write-behind. Senão, fica para o próximo snapshot, flush ou aviso.
+        """
+        with self.lock:
+            if not self.rollups_atrasados or self.lote_atual is not None or self.avisos_em_curso:
+                return
+            fila = self.armazenamento
+            if isinstance(fila, ArmazenamentoWriteBehind) and fila.total_pendentes():
+                return
+            self.rollups_atrasados = False
+            self.gravar_rollups()
+
+    def reconstruir_rollups(self):
+        """
+        Recalcula os rollups a partir dos registros e grava o arquivo.
+
+        Útil se o arquivo de rollups foi apagado ou editado à mão; a aba de
+        relatórios continua usando o mesmo objeto, agora recalculado.
+        """
+        with self.lock:
+            self.agregados.limpar()
+            self.agregados.construir(self)
+        self.flush()
+        self.gravar_rollups()
+
+    def estatisticas_gravacao(self):
+        """
+        Métricas do modo write-behind (pendentes, latência de gravação etc.).
+
+        Returns:
+            dict: Ver ArmazenamentoWriteBehind.estatisticas; vazio no modo síncrono
+        """
+        if isinstance(self.armazenamento, ArmazenamentoWriteBehind):
+            return self.armazenamento.estatisticas()
+        return {}
+
+    def registrar_busca(self, origem, latencia_ms, resultados, cancelada=False):
+        """Registra a latência de uma busca feita pelas telas"""
+        metricas = self.metricas_busca.setdefault(origem, {
+            "consultas": 0, "canceladas": 0, "latencia_total_ms": 0.0,
+            "ultima_latencia_ms": 0.0, "maior_latencia_ms": 0.0, "ultimos_resultados": 0,
+            "recentes": deque(maxlen=50),
+        })
+        if cancelada:
+            metricas["canceladas"] += 1
+            return
+        metricas["consultas"] += 1
+        metricas["latencia_total_ms"] += latencia_ms
+        metricas["ultima_latencia_ms"] = latencia_ms
+        metricas["maior_latencia_ms"] = max(metricas["maior_latencia_ms"], latencia_ms)
+        metricas["ultimos_resultados"] = resultados
+        metricas["recentes"].append((round(latencia_ms, 3), resultados))
+
+    def estatisticas_busca(self):
+        """
+        Métricas das buscas ao digitar.
+
+        Returns:
+            dict: Por origem: consultas, canceladas, ultima_latencia_ms,
+                latencia_media_ms, maior_latencia_ms, ultimos_resultados e
+                recentes (latência e resultados das últimas 50 consultas)
+        """
+        estatisticas = {}
+        for origem, metricas in self.metricas_busca.items():
+            consultas = metricas["consultas"]
+            estatisticas[origem] = {
+                "consultas": consultas,
+                "canceladas": metricas["canceladas"],
+                "ultima_latencia_ms": metricas["ultima_latencia_ms"],
+                "latencia_media_ms": metricas["latencia_total_ms"] / consultas if consultas else 0.0,
+                "maior_latencia_ms": metricas["maior_latencia_ms"],
+                "ultimos_resultados": metricas["ultimos_resultados"],
+                "recentes": list(metricas["recentes"]),
+            }
+        return estatisticas
+
+    # NOTIFICAÇÕES
+    def inscrever(self, ouvinte, colecoes=None):
+        """
+        Registra uma função chamada a cada mutação de registro.
+
+        A função recebe um EventoMudanca (colecao, op, id, anterior, novo),
+        com op igual a "add", "update" ou "delete", e permite às telas
+        atualizar só a linha afetada.
+
+        Args:
+            ouvinte (callable): Função evento -> None
+            colecoes (iterable, optional): Só estas coleções (padrão: todas)
+        """
+        self.eventos.inscrever(ouvinte, colecoes)
+
+    def cancelar_inscricao(self, ouvinte):
+        self.eventos.cancelar_inscricao(ouvinte)
+
+    def notificar(self, colecao, op, id_registro, novo=None, anterior=None):
+        evento = EventoMudanca(colecao, op, id_registro, anterior, novo)
+        with self.lock:
+            if self.lote_atual is not None:
+                # Só avisa quando o lote terminar bem (um lote desfeito não avisa)
+                self.lote_atual["avisos"].append(evento)
+                return
+        self.eventos.publicar(evento)
+        self.concluir_avisos(1)
+
+    # CONSULTAS
+    def buscar(self, colecao, data_inicio=None, data_fim=None, texto=None, **filtros):
+        """
+        Busca registros por igualdade nas colunas indexadas e por intervalo de datas.
+
+        Usa os índices secundários em memória: parte do menor conjunto de
+        candidatos e confere os demais filtros só nele, sem percorrer a
+        coleção inteira. A ordem não depende de qual filtro foi usado:
+        com intervalo de datas, ordem de data; sem ele, ordem de inserção
+        (empates na data também seguem a ordem de inserção).
+
+        Args:
+            colecao (str): "clientes", "cortes" ou "agendamentos"
+            data_inicio (str, optional): Data mínima DD/MM/AAAA (inclusive)
+            data_fim (str, optional): Data máxima DD/MM/AAAA (inclusive)
+            texto (str, optional): Prefixos de palavras no índice textual
+                da coleção (ver pesquisar)
+            **filtros: Igualdade por coluna (ver COLUNAS_INDEXADAS); uma
+                lista/tupla/conjunto aceita qualquer um dos valores
+
+        Returns:
+            list: Registros encontrados
+        """
+        filtros = {coluna: valor for coluna, valor in filtros.items() if valor is not None}
+        indices = self.indices[colecao]
+        for coluna in filtros:
+            if coluna not in indices.indices:
+                raise ValueError(f"Coluna não indexada em {colecao}: {coluna}")
+
+        with self.lock:
+            candidatos = []
+            for coluna, valor in filtros.items():
+                if isinstance(valor, (list, tuple, set, frozenset)):
+                    candidatos.append([
+                        id_registro for item in valor for id_registro in indices[coluna].obter(item)
+                    ])
+                else:
+                    candidatos.append(indices[coluna].obter(valor))
+            if texto and texto.strip():
+                ids_texto = self.textos[colecao].buscar(texto)
+                if ids_texto is not None:
+                    candidatos.append(ids_texto)
+            if data_inicio or data_fim:
+                inicio = data_iso(data_inicio) if data_inicio else None
+                fim = data_iso(data_fim) if data_fim else None
+                candidatos.append(indices["data"].intervalo(inicio, fim))
+            if not candidatos:
+                return list(self.listar(colecao))
+
+            candidatos.sort(key=len)
+            ids = candidatos[0]
+            for outros in candidatos[1:]:
+                if not ids:
+                    break
+                outros = set(outros)
+                ids = [id_registro for id_registro in ids if id_registro in outros]
+            posicoes = self.posicoes_insercao(colecao)
+            if data_inicio or data_fim:
+                dias = indices["data"].chave_de
+                ids.sort(key=lambda id_registro: (dias[id_registro], posicoes[id_registro]))
+            else:
+                ids.sort(key=posicoes.__getitem__)
+            registros = self.registros[colecao]
+            return [registros[id_registro] for id_registro in ids]
+
+    def pesquisar(self, colecao, consulta, limite=None):
+        """
+        Busca textual por prefixo de palavras, ignorando acentos e maiúsculas.
+
+        "joao" encontra "João Silva"; "jo sil" exige as duas palavras;
+        dígitos buscam no telefone ("11 9999" ou "119999").
+
+        Args:
+            colecao (str): Coleção com índice textual (ex.: "clientes")
+            consulta (str): Texto digitado
+            limite (int, optional): Máximo de resultados
+
+        Returns:
+            list: Registros encontrados (todos se a consulta estiver vazia)
+        """
+        with self.lock:
+            ids = self.textos[colecao].buscar(consulta, limite)
+            if ids is None:
+                return self.listar(colecao)
+            registros = self.registros[colecao]
+            return [registros[id_registro] for id_registro in ids]
+
+    def pesquisar_aproximado(self, colecao, consulta, limite=20):
+        """
+        Busca tolerante a erros de digitação ("joao slva" encontra "João Silva").
+
+        Returns:
+            list: Tuplas (registro, nota) da mais para a menos parecida,
+                nota entre 0 e 1
+        """
+        with self.lock:
+            ranking = self.textos[colecao].buscar_aproximado(consulta, limite)
+            registros = self.registros[colecao]
+            return [(registros[id_registro], nota) for id_registro, nota in ranking]
+
+    def corresponde(self, colecao, registro, consulta):
+        """Indica se um registro atende à consulta de pesquisar()"""
+        return self.textos[colecao].corresponde(registro, consulta)
+
+    def conflitos_agendamento(self, agendamento, id_ignorar=None):
+        """
+        Agendamentos cujo horário se sobrepõe ao do agendamento informado.
+
+        Considera data, hora e a duração do serviço (DURACAO_SERVICO);
+        agendamentos cancelados não ocupam horário.
+
+        Args:
+            agendamento (dict): Agendamento a salvar
+            id_ignorar (str, optional): Id do próprio agendamento (edição)
+
+        Returns:
+            list: Agendamentos em conflito, em ordem de horário
+        """
+        with self.lock:
+            ids = self.intervalos["agendamentos"].conflitos(agendamento, id_ignorar)
+            registros = self.registros["agendamentos"]
+            return [registros[id_registro] for id_registro in ids]
+
+    def auditar_sobreposicoes(self):
+        """
+        Todos os pares de agendamentos sobrepostos em todo o histórico.
+
+        Returns:
+            list: Pares (agendamento, agendamento) em ordem de dia e horário
+        """
+        with self.lock:
+            registros = self.registros["agendamentos"]
+            return [
+                (registros[id_a], registros[id_b])
+                for id_a, id_b in self.intervalos["agendamentos"].sobreposicoes()
+            ]
+
+    def horarios_livres(self, servico=None, data_inicio=None, data_fim=None, limite=10,
+                        id_ignorar=None):
+        """
+        Próximos horários livres para um serviço, pela agenda em memória.
+
+        Respeita HORARIO_FUNCIONAMENTO e a duração do serviço; horários
+        que já passaram hoje não são oferecidos.
+
+        Args:
+            servico (str, optional): Serviço (define a duração)
+            data_inicio (str, optional): Primeiro dia DD/MM/AAAA (padrão: hoje)
+            data_fim (str, optional): Último dia DD/MM/AAAA (padrão:
+                DIAS_BUSCA_HORARIOS depois do primeiro)
+            limite (int): Quantidade máxima de horários
+            id_ignorar (str, optional): Agendamento em edição (seu horário
+                conta como livre)
+
+        Returns:
+            list: Tuplas ("DD/MM/AAAA", "HH:MM") em ordem cronológica
+
+        Raises:
+            ValueError: Se alguma data for inválida
+        """
+        agora = datetime.now()
+        inicio = datetime.strptime(data_inicio, "%d/%m/%Y").date() if data_inicio else agora.date()
+        if data_fim:
+            fim = datetime.strptime(data_fim, "%d/%m/%Y").date()
+        else:
+            fim = inicio + timedelta(days=self.DIAS_BUSCA_HORARIOS)
+        with self.lock:
+            livres = horarios_livres(self.intervalos["agendamentos"], servico, inicio, fim,
+                                     limite, agora, id_ignorar)
+        return [(dia.strftime("%d/%m/%Y"), hora) for dia, hora in livres]
+
+    def buscar_clientes(self, nome=None):
+        return self.buscar("clientes", nome=nome)
+
+    def buscar_cortes(self, tipo=None, data_inicio=None, data_fim=None):
+        return self.buscar("cortes", data_inicio, data_fim, tipo=tipo)
+
+    def buscar_agendamentos(self, cliente=None, status=None, servico=None,
+                            data_inicio=None, data_fim=None, texto=None):
+        return self.buscar("agendamentos", data_inicio, data_fim, texto,
+                           cliente=cliente, status=status, servico=servico)
+
+    def agendamentos_por_data(self, data):
+        """Agendamentos do dia informado (DD/MM/AAAA)"""
+        return self.buscar("agendamentos", data, data)
+
+    def agendamentos_por_cliente(self, cliente):
+        return self.buscar("agendamentos", cliente=cliente)
+
+    def agendamentos_por_status(self, status):
+        return self.buscar("agendamentos", status=status)
+
+    def cortes_por_tipo(self, tipo):
+        return self.buscar("cortes", tipo=tipo)
+
+    def cortes_por_dia(self, data):
+        """Cortes realizados no dia informado (DD/MM/AAAA)"""
+        return self.buscar("cortes", data, data)
+
+    # REGISTROS POR ID
+    def listar(self, colecao):
+        """Lista os registros da coleção na ordem de inserção"""
+        lista = self.listas.get(colecao)
+        if lista is None:
+            with self.lock:
+                lista = self.listas[colecao] = list(self.registros[colecao].values())
+        return lista
+
+    def posicoes_insercao(self, colecao):
+        """Dicionário id -> posição na ordem de inserção"""
+        posicoes = self.posicoes.get(colecao)
+        if posicoes is None:
+            with self.lock:
+                registros = self.registros[colecao]
+                posicoes = self.posicoes[colecao] = {
+                    id_registro: posicao for posicao, id_registro in enumerate(registros)
+                }
+        return posicoes
+
+    def contar(self, colecao):
+        """Quantidade de registros da coleção"""
+        return len(self.registros[colecao])
+
+    def iterar(self, colecao, tamanho_bloco=500):
+        """
+        Gera os registros na ordem de inserção, sem copiar a coleção.
+
+        Os registros são lidos em blocos sob o lock, então a thread da
+        interface não fica bloqueada durante uma exportação longa. Registros
+        excluídos durante a iteração são pulados; os incluídos depois do
+        início não aparecem.
+        """
+        with self.lock:
+            ids = list(self.registros[colecao])
+        registros = self.registros[colecao]
+        for inicio in range(0, len(ids), tamanho_bloco):
+            with self.lock:
+                bloco = [registros.get(id_registro) for id_registro in ids[inicio:inicio + tamanho_bloco]]
+            for registro in bloco:
+                if registro is not None:
+                    yield registro
+
+    def pagina(self, colecao, offset=0, limite=50, ordenar_por=None, decrescente=False):
+        """
+        Retorna só a fatia pedida da coleção.
+
+        Sem ordenação a fatia sai direto da ordem de inserção; por uma coluna
+        com índice ordenado (ex.: "data") ela é percorrida no índice. Nos
+        demais casos um heap guarda só os offset + limite primeiros, sem
+        ordenar a coleção inteira.
+
+        Args:
+            colecao (str): "clientes", "cortes" ou "agendamentos"
+            offset (int): Quantidade de registros a pular
+            limite (int): Tamanho máximo da página
+            ordenar_por (str | callable, optional): Coluna ou função registro -> chave
+            decrescente (bool): Inverte a ordem
+
+        Returns:
+            list: Registros da página
+        """
+        offset = max(0, offset)
+        fim = offset + max(0, limite)
+        indices = self.indices[colecao].indices
+
+        with self.lock:
+            registros = self.registros[colecao]
+            if ordenar_por is None:
+                # reversed() em dict só existe a partir do Python 3.8
+                valores = reversed(list(registros.values())) if decrescente else registros.values()
+                return list(islice(valores, offset, fim))
+
+            indice = indices.get(ordenar_por) if isinstance(ordenar_por, str) else None
+            if indice is not None and indice.chaves is not None:
+                # Registros sem valor na coluna ficam no fim, na ordem de inserção
+                ids = indice.em_ordem(decrescente)
+                sem_chave = (
+                    id_registro for id_registro in registros
+                    if id_registro not in indice.chave_de
+                )
+                ordem = (registros[id_registro] for id_registro in ids)
+                resto = (registros[id_registro] for id_registro in sem_chave)
+                return list(islice(chain(ordem, resto), offset, fim))
+
+            if isinstance(ordenar_por, str):
+                coluna = ordenar_por
+
+                def ordenar_por(registro):
+                    # Números em ordem numérica, o resto como texto e vazios
+                    # no fim; tipos misturados não são comparados entre si
+                    valor = registro.get(coluna)
+                    no_fim = (valor is None) != decrescente
+                    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+                        return (no_fim, 0, valor, "")
+                    return (no_fim, 1, 0, "" if valor is None else str(valor))
+
+            escolher = heapq.nlargest if decrescente else heapq.nsmallest
+            return escolher(fim, registros.values(), key=ordenar_por)[offset:]
+
+    def versao(self, colecao):
+        """Número que muda a cada mutação da coleção (para invalidar caches)"""
+        return self.versoes[colecao]
+
+    def obter(self, colecao, id_registro):
+        """Retorna o registro com o id informado, ou None"""
+        return self.registros[colecao].get(id_registro)
+
+    def adicionar(self, colecao, registro):
+        """
+        Adiciona um registro, gerando seu id.
+
+        Returns:
+            str: Id do novo registro
+        """
+        with self.lock:
+            id_registro = self.incluir_em_memoria(colecao, registro)
+            self.registrar_mutacao(colecao, "add", id_registro, registro)
+        self.notificar(colecao, "add", id_registro, registro)
+        return id_registro
+
+    def atualizar(self, colecao, id_registro, registro):
+        """
+        Substitui o registro com o id informado (o id é preservado).
+
+        Returns:
+            bool: False se o id não existir
+        """
+        with self.lock:
+            anterior = self.registros[colecao].get(id_registro)
+            if not self.substituir_em_memoria(colecao, id_registro, registro):
+                return False
+            self.registrar_mutacao(colecao, "update", id_registro, registro)
+        self.notificar(colecao, "update", id_registro, registro, anterior)
+        return True
+
+    def remover(self, colecao, id_registro):
+        """
+        Remove o registro com o id informado.
+
+        Returns:
+            bool: False se o id não existir
+        """
+        with self.lock:
+            anterior = self.registros[colecao].get(id_registro)
+            if not self.excluir_da_memoria(colecao, id_registro):
+                return False
+            self.registrar_mutacao(colecao, "delete", id_registro)
+        self.notificar(colecao, "delete", id_registro, anterior=anterior)
+        return True
+
+    @contextmanager
+    def batch(self):
+        """
+        Agrupa mutações de qualquer coleção em uma única gravação.
+
+        Dentro do bloco os registros e índices mudam na hora, mas nada é
+        gravado nem avisado aos ouvintes; na saída cada coleção alterada é
+        gravada uma vez (registrar_mutacoes) e os avisos são entregues.
+        Se o bloco lançar uma exceção, todas as mudanças são desfeitas em
+        memória e nada é gravado. Lotes aninhados fazem parte do lote de fora.
+
+        O lock fica com o bloco até o fim, então outras threads não veem
+        um lote pela metade.
+
+        Example:
+            with data_manager.batch():
+                data_manager.add_corte(corte)
+                data_manager.atualizar("agendamentos", id_agendamento, agendamento)
+        """
+        with self.lock:
+            if self.lote_atual is not None:
+                yield self
+                return
+            lote = self.lote_atual = {"operacoes": {}, "desfazer": [], "ordem": {}, "avisos": []}
+            try:
+                yield self
+            except BaseException:
+                self.lote_atual = None
+                self.desfazer_lote(lote)
+                raise
+            self.lote_atual = None
+            self.avisos_em_curso += len(lote["avisos"])
+            for colecao, operacoes in lote["operacoes"].items():
+                self.registrar_mutacoes(colecao, operacoes)
+        for evento in lote["avisos"]:
+            self.eventos.publicar(evento)
+        self.concluir_avisos(len(lote["avisos"]))
+
+    def desfazer_lote(self, lote):
+        """Reverte em memória, da última para a primeira, as mudanças do lote"""
+        for colecao, op, id_registro, anterior in reversed(lote["desfazer"]):
+            if op == "add":
+                self.excluir_da_memoria(colecao, id_registro)
+            elif op == "update":
+                self.substituir_em_memoria(colecao, id_registro, anterior)
+            else:
+                self.incluir_em_memoria(colecao, anterior)
+        # Registros excluídos e restaurados voltam à posição original
+        for colecao, ordem in lote["ordem"].items():
+            registros = self.registros[colecao]
+            restaurados = [(id_registro, registros[id_registro]) for id_registro in ordem
+                           if id_registro in registros]
+            registros.clear()
+            registros.update(restaurados)
+            self.listas[colecao] = None
+            self.posicoes[colecao] = None
+
+    def adicionar_varios(self, colecao, registros):
+        """
+        Adiciona vários registros com uma única gravação.
+
+        Returns:
+            list: Ids dos novos registros, na ordem recebida
+        """
+        with self.batch():
+            return [self.adicionar(colecao, registro) for registro in registros]
+
+    def atualizar_varios(self, colecao, alteracoes):
+        """
+        Substitui vários registros com uma única gravação (ex.: mudar o
+        status de vários agendamentos de uma vez).
+
+        Args:
+            alteracoes (dict): id -> registro novo; ids inexistentes são ignorados
+
+        Returns:
+            int: Quantidade de registros alterados
+        """
+        with self.batch():
+            return sum(
+                1 for id_registro, registro in alteracoes.items()
+                if self.atualizar(colecao, id_registro, registro)
+            )
+
+    def importar(self, dados):
+        """
+        Acrescenta registros de várias coleções em um único lote.
+
+        Tudo ou nada: um erro em qualquer registro desfaz a importação.
+
+        Args:
+            dados (dict): Coleção -> lista de registros; aceita também o
+                formato de exportação ("clientes.json": [...])
+
+        Returns:
+            dict: Coleção -> quantidade de registros importados
+        """
+        importados = {}
+        with self.batch():
+            for nome, registros in dados.items():
+                colecao = nome[:-len(".json")] if nome.endswith(".json") else nome
+                if colecao not in self.registros:
+                    raise ValueError(f"Coleção desconhecida: {nome}")
+                importados[colecao] = len(
+                    self.adicionar_varios(colecao, [dict(registro) for registro in registros])
+                )
+        return importados
+
+    # Alterações em memória (registros, lista e índices), sem gravar
+    def incluir_em_memoria(self, colecao, registro):
+        registros = self.registros[colecao]
+        if not registro.get("id") or registro["id"] in registros:
+            registro["id"] = gerar_id()
+        registros[registro["id"]] = registro
+        if self.lote_atual is not None:
+            self.lote_atual["desfazer"].append((colecao, "add", registro["id"], None))
+        self.indices[colecao].adicionar(registro["id"], registro)
+        if colecao in self.textos:
+            self.textos[colecao].adicionar(registro["id"], registro)
+        if colecao in self.intervalos:
+            self.intervalos[colecao].adicionar(registro["id"], registro)
+        if self.listas.get(colecao) is not None:
+            self.listas[colecao].append(registro)
+        if self.posicoes.get(colecao) is not None:
+            self.posicoes[colecao][registro["id"]] = len(registros) - 1
+        self.versoes[colecao] += 1
+        return registro["id"]
+
+    def substituir_em_memoria(self, colecao, id_registro, registro):
+        registros = self.registros[colecao]
+        if id_registro not in registros:
+            return False
+        registro["id"] = id_registro
+        if self.lote_atual is not None:
+            self.lote_atual["desfazer"].append((colecao, "update", id_registro, registros[id_registro]))
+        registros[id_registro] = registro
+        self.indices[colecao].atualizar(id_registro, registro)
+        if colecao in self.textos:
+            self.textos[colecao].atualizar(id_registro, registro)
+        if colecao in self.intervalos:
+            self.intervalos[colecao].atualizar(id_registro, registro)
+        self.listas[colecao] = None
+        self.versoes[colecao] += 1
+        return True
+
+    def excluir_da_memoria(self, colecao, id_registro):
+        registros = self.registros[colecao]
+        if id_registro not in registros:
+            return False
+        if self.lote_atual is not None:
+            self.lote_atual["ordem"].setdefault(colecao, list(registros))
+            self.lote_atual["desfazer"].append((colecao, "delete", id_registro, registros[id_registro]))
+        del registros[id_registro]
+        self.indices[colecao].remover(id_registro)
+        if colecao in self.textos:
+            self.textos[colecao].remover(id_registro)
+        if colecao in self.intervalos:
+            self.intervalos[colecao].remover(id_registro)
+        self.listas[colecao] = None
+        self.posicoes[colecao] = None
+        self.versoes[colecao] += 1
+        return True
+
+    def id_na_posicao(self, colecao, index):
+        """Id do registro na posição informada (API antiga baseada em índice)"""
+        lista = self.listar(colecao)
+        if 0 <= index < len(lista):
+            return lista[index]["id"]
+        return None
+
     # CLIENTES
     def get_clientes(self):
-        return self.clientes
-    
+        return self.listar("clientes")
+
+    def iter_clientes(self):
+        return self.iterar("clientes")
+
+    def page_clientes(self, offset=0, limite=50, ordenar_por=None, decrescente=False):
+        return self.pagina("clientes", offset, limite, ordenar_por, decrescente)
+
     def add_cliente(self, cliente_data):
-        self.clientes.append(cliente_data)
-        self.salvar_dados(self.clientes, self.clientes_file)
-    
+        return self.adicionar("clientes", cliente_data)
+
     def update_cliente(self, index, cliente_data):
-        if 0 <= index < len(self.clientes):
-            self.clientes[index] = cliente_data
-            self.salvar_dados(self.clientes, self.clientes_file)
-    
+        id_cliente = self.id_na_posicao("clientes", index)
+        if id_cliente:
+            self.atualizar("clientes", id_cliente, cliente_data)
+
     def delete_cliente(self, index):
-        if 0 <= index < len(self.clientes):
-            del self.clientes[index]
-            self.salvar_dados(self.clientes, self.clientes_file)
-    
+        id_cliente = self.id_na_posicao("clientes", index)
+        if id_cliente:
+            self.remover("clientes", id_cliente)
+
     # CORTES
     def get_cortes(self):
-        return self.cortes
-    
+        return self.listar("cortes")
+
+    def iter_cortes(self):
+        return self.iterar("cortes")
+
+    def page_cortes(self, offset=0, limite=50, ordenar_por=None, decrescente=False):
+        return self.pagina("cortes", offset, limite, ordenar_por, decrescente)
+
     def add_corte(self, corte_data):
-        self.cortes.append(corte_data)
-        self.salvar_dados(self.cortes, self.cortes_file)
-    
+        return self.adicionar("cortes", corte_data)
+
     def update_corte(self, index, corte_data):
-        if 0 <= index < len(self.cortes):
-            self.cortes[index] = corte_data
-            self.salvar_dados(self.cortes, self.cortes_file)
-    
+        id_corte = self.id_na_posicao("cortes", index)
+        if id_corte:
+            self.atualizar("cortes", id_corte, corte_data)
+
     def delete_corte(self, index):
-        if 0 <= index < len(self.cortes):
-            del self.cortes[index]
-            self.salvar_dados(self.cortes, self.cortes_file)
-    
+        id_corte = self.id_na_posicao("cortes", index)
+        if id_corte:
+            self.remover("cortes", id_corte)
+
     # AGENDAMENTOS
     def get_agendamentos(self):
-        return self.agendamentos
-    
+        return self.listar("agendamentos")
+
+    def iter_agendamentos(self):
+        return self.iterar("agendamentos")
+
+    def page_agendamentos(self, offset=0, limite=50, ordenar_por=None, decrescente=False):
+        return self.pagina("agendamentos", offset, limite, ordenar_por, decrescente)
+
     def add_agendamento(self, agendamento_data):
-        self.agendamentos.append(agendamento_data)
-        self.salvar_dados(self.agendamentos, self.agendamentos_file)
-    
+        return self.adicionar("agendamentos", agendamento_data)
+
     def update_agendamento(self, index, agendamento_data):
-        if 0 <= index < len(self.agendamentos):
-            self.agendamentos[index] = agendamento_data
-            self.salvar_dados(self.agendamentos, self.agendamentos_file)
-    
+        id_agendamento = self.id_na_posicao("agendamentos", index)
+        if id_agendamento:
+            self.atualizar("agendamentos", id_agendamento, agendamento_data)
+
     def delete_agendamento(self, index):
-        if 0 <= index < len(self.agendamentos):
-            del self.agendamentos[index]
-            self.salvar_dados(self.agendamentos, self.agendamentos_file)
+        id_agendamento = self.id_na_posicao("agendamentos", index)
+        if id_agendamento:
+            self.remover("agendamentos", id_agendamento)
@@ -0,0 +1,65 @@
+"""
+Módulo de eventos de mudança nos dados (barramento do DataManager)
+"""
+
+
+class EventoMudanca:
+    """
+    Uma mudança em um único registro.
+
+    Attributes:
+        colecao (str): "clientes", "cortes" ou "agendamentos"
+        op (str): "add", "update" ou "delete"
+        id (str): Id do registro afetado
+        anterior (dict): Registro antes da mudança (None em "add")
+        novo (dict): Registro depois da mudança (None em "delete")
+    """
+
+    __slots__ = ("colecao", "op", "id", "anterior", "novo")
+
+    def __init__(self, colecao, op, id_registro, anterior=None, novo=None):
+        self.colecao = colecao
+        self.op = op
+        self.id = id_registro
+        self.anterior = anterior
+        self.novo = novo
+
+    def __repr__(self):
+        return f"EventoMudanca({self.colecao!r}, {self.op!r}, {self.id!r})"
+
+
+class BarramentoEventos:
+    """
+    Entrega cada EventoMudanca só aos inscritos na coleção do evento.
+
+    Attributes:
+        inscritos (dict): Coleção -> lista de ouvintes (None = todas as coleções)
+    """
+
+    def __init__(self):
+        self.inscritos = {}
+
+    def inscrever(self, ouvinte, colecoes=None):
+        """
+        Inscreve um ouvinte, que recebe um EventoMudanca por mudança.
+
+        Args:
+            ouvinte (callable): Função evento -> None
+            colecoes (iterable, optional): Coleções de interesse (padrão: todas)
+        """
+        for colecao in (colecoes or (None,)):
+            self.inscritos.setdefault(colecao, []).append(ouvinte)
+
+    def cancelar_inscricao(self, ouvinte):
+        for ouvintes in self.inscritos.values():
+            while ouvinte in ouvintes:
+                ouvintes.remove(ouvinte)
+
+    def publicar(self, evento):
+        """Entrega o evento; o erro de um ouvinte não impede os demais"""
+        ouvintes = self.inscritos.get(evento.colecao, []) + self.inscritos.get(None, [])
+        for ouvinte in ouvintes:
+            try:
+                ouvinte(evento)
+            except Exception as e:
+                print(f"✗ Erro ao notificar mudança em {evento.colecao}: {e}")
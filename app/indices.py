@@ -0,0 +1,117 @@
+"""
+Módulo de índices secundários em memória do DataManager
+"""
+from bisect import bisect_left, bisect_right, insort
+
+
+class IndiceSecundario:
+    """
+    Índice de uma coluna: valor -> ids dos registros com esse valor.
+
+    A chave de cada id é guardada no próprio índice, então a remoção não
+    depende do registro ainda ter o valor antigo (ex.: dicionário alterado
+    no lugar antes de salvar). Índices ordenados mantêm também a lista
+    das chaves distintas em ordem, para consultas por intervalo.
+
+    Attributes:
+        extrair (callable): Função registro -> chave (None = não indexar)
+        ids (dict): chave -> {id: None}, na ordem de inserção
+        chave_de (dict): id -> chave atual
+        chaves (list): Chaves distintas ordenadas (só em índices ordenados)
+    """
+
+    def __init__(self, extrair, ordenado=False):
+        self.extrair = extrair
+        self.ids = {}
+        self.chave_de = {}
+        self.chaves = [] if ordenado else None
+
+    def adicionar(self, id_registro, registro):
+        chave = self.extrair(registro)
+        if chave is None:
+            return
+        grupo = self.ids.get(chave)
+        if grupo is None:
+            grupo = self.ids[chave] = {}
+            if self.chaves is not None:
+                insort(self.chaves, chave)
+        grupo[id_registro] = None
+        self.chave_de[id_registro] = chave
+
+    def remover(self, id_registro):
+        chave = self.chave_de.pop(id_registro, None)
+        if chave is None:
+            return
+        grupo = self.ids[chave]
+        del grupo[id_registro]
+        if not grupo:
+            del self.ids[chave]
+            if self.chaves is not None:
+                del self.chaves[bisect_left(self.chaves, chave)]
+
+    def obter(self, chave):
+        """Ids com a chave informada"""
+        return list(self.ids.get(chave, ()))
+
+    def contar(self, chave):
+        return len(self.ids.get(chave, ()))
+
+    def intervalo(self, inicio=None, fim=None):
+        """
+        Ids com chave entre inicio e fim (inclusive), em ordem de chave.
+
+        Custa O(log k) para localizar o intervalo mais o tamanho do resultado.
+        """
+        if self.chaves is None:
+            raise ValueError("Índice não ordenado não suporta intervalos")
+        esquerda = bisect_left(self.chaves, inicio) if inicio is not None else 0
+        direita = bisect_right(self.chaves, fim) if fim is not None else len(self.chaves)
+        resultado = []
+        for chave in self.chaves[esquerda:direita]:
+            resultado.extend(self.ids[chave])
+        return resultado
+
+    def em_ordem(self, decrescente=False):
+        """Gera os ids em ordem de chave, sem montar a lista inteira"""
+        if self.chaves is None:
+            raise ValueError("Índice não ordenado não suporta ordenação")
+        chaves = reversed(self.chaves) if decrescente else iter(self.chaves)
+        for chave in chaves:
+            grupo = self.ids[chave]
+            # reversed() em dict só existe a partir do Python 3.8
+            yield from (reversed(list(grupo)) if decrescente else grupo)
+
+
+class IndicesColecao:
+    """
+    Conjunto de índices secundários de uma coleção.
+
+    Attributes:
+        indices (dict): Nome da coluna -> IndiceSecundario
+    """
+
+    def __init__(self, colunas, ordenadas=()):
+        self.indices = {
+            coluna: IndiceSecundario(extrair, ordenado=coluna in ordenadas)
+            for coluna, extrair in colunas.items()
+        }
+
+    def construir(self, registros):
+        """Indexa todos os registros de uma vez (carga inicial)"""
+        for id_registro, registro in registros.items():
+            self.adicionar(id_registro, registro)
+
+    def adicionar(self, id_registro, registro):
+        for indice in self.indices.values():
+            indice.adicionar(id_registro, registro)
+
+    def remover(self, id_registro):
+        for indice in self.indices.values():
+            indice.remover(id_registro)
+
+    def atualizar(self, id_registro, registro):
+        self.remover(id_registro)
+        self.adicionar(id_registro, registro)
+
+    def __getitem__(self, coluna):
+        return self.indices[coluna]
@@ -0,0 +1,122 @@
+"""
+Módulo de journal (write-ahead log) das coleções de dados
+"""
+import json
+import os
+from utils.atomic_write import anexar
+
+
+class JournalColecao:
+    """
+    Journal append-only de uma coleção persistida em JSON.
+
+    Cada mutação (add, update, delete) é gravada como uma linha JSON, com o
+    id do registro afetado, no arquivo `<base>.journal`, ao lado do arquivo
+    base. O arquivo base passa a ser apenas o snapshot e só é reescrito na
+    compactação, que incorpora o journal ao snapshot e descarta o journal.
+
+    Reaplicar é idempotente (add/update gravam dados[id], delete remove o
+    id), então o journal é sempre reaplicado: se uma queda entre gravar o
+    snapshot e apagar o journal deixar um journal já incorporado, reaplicá-lo
+    sobre o snapshot novo dá o mesmo estado.
+
+    Attributes:
+        arquivo_base (str): Caminho do snapshot JSON
+        arquivo_journal (str): Caminho do journal
+        limite_compactacao (int): Registros no journal que disparam compactação
+        registros (int): Registros gravados no journal desde o último snapshot
+        politica (PoliticaDurabilidade): Política de fsync (padrão do sistema se None)
+    """
+
+    def __init__(self, arquivo_base, limite_compactacao=500, politica=None):
+        self.arquivo_base = arquivo_base
+        self.politica = politica
+        self.arquivo_journal = os.path.splitext(arquivo_base)[0] + ".journal"
+        self.limite_compactacao = limite_compactacao
+        self.registros = 0
+
+    def reaplicar(self, dados):
+        """
+        Reaplica as mutações do journal sobre os dados do snapshot.
+
+        Linhas corrompidas no final (gravação interrompida) são ignoradas.
+
+        Args:
+            dados (dict): Registros do snapshot por id (alterado no lugar)
+
+        Returns:
+            dict: O mesmo dicionário, com o journal aplicado
+        """
+        self.registros = 0
+        if not os.path.exists(self.arquivo_journal):
+            return dados
+
+        with open(self.arquivo_journal, 'r', encoding='utf-8') as f:
+            linhas = f.readlines()
+
+        for linha in linhas:
+            try:
+                registro = json.loads(linha)
+            except ValueError:
+                break
+            self.aplicar(dados, registro)
+            self.registros += 1
+
+        return dados
+
+    @staticmethod
+    def aplicar(dados, registro):
+        """Aplica um registro do journal aos registros em memória (por id)"""
+        op = registro.get("op")
+        id_registro = registro.get("id")
+        if op == "add":
+            novo = registro["dados"]
+            dados[novo["id"]] = novo
+        elif op == "update" and id_registro in dados:
+            dados[id_registro] = registro["dados"]
+        elif op == "delete":
+            dados.pop(id_registro, None)
+
+    def registrar(self, op, id_registro=None, dados=None):
+        """
+        Anexa uma mutação ao journal.
+
+        Args:
+            op (str): "add", "update" ou "delete"
+            id_registro (str, optional): Id do registro afetado
+            dados (dict, optional): Registro novo (add/update)
+        """
+        self.registrar_lote([(op, id_registro, dados)])
+
+    def registrar_lote(self, operacoes):
+        """
+        Anexa várias mutações ao journal em uma única escrita.
+
+        Args:
+            operacoes (list): Tuplas (op, id, dados), na ordem em que ocorreram
+        """
+        if not operacoes:
+            return
+        novo = not os.path.exists(self.arquivo_journal) or self.registros == 0
+
+        linhas = []
+        for op, id_registro, dados in operacoes:
+            registro = {"op": op}
+            if id_registro is not None:
+                registro["id"] = id_registro
+            if dados is not None:
+                registro["dados"] = dados
+            linhas.append(json.dumps(registro, ensure_ascii=False) + "\n")
+
+        anexar(self.arquivo_journal, "".join(linhas), self.politica, truncar=novo)
+        self.registros += len(operacoes)
+
+    def precisa_compactar(self, adicionais=0):
+        """Indica se o journal atingiu (ou atingirá) o limite de compactação"""
+        return self.registros + adicionais >= self.limite_compactacao
+
+    def descartar(self):
+        """Remove o journal (após o snapshot ter sido gravado)"""
+        if os.path.exists(self.arquivo_journal):
+            os.remove(self.arquivo_journal)
+        self.registros = 0
@@ -26,6 +26,7 @@ import tkinter as tk
 from tkinter import messagebox
 import json
 import os
+from utils.atomic_write import salvar_json_atomico
 
 
 class LoginManager:
@@ -257,10 +258,7 @@ class LoginManager:
     def salvar_usuarios(self):
         """Salva usuários no arquivo JSON"""
         try:
-            # Criar diretório data se não existir
-            os.makedirs(os.path.dirname(self.usuarios_file), exist_ok=True)
-            
-            with open(self.usuarios_file, 'w', encoding='utf-8') as f:
-                json.dump(self.usuarios, f, indent=4, ensure_ascii=False)
+            # Gravação atômica (cria o diretório data se não existir)
+            salvar_json_atomico(self.usuarios_file, self.usuarios, indent=4)
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao salvar usuários: {str(e)}")
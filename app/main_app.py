@@ -65,6 +65,9 @@ class BarbeariaApp:
             # Ignora se ícone não existe
             pass
         
+        # Garantir gravação dos dados ao fechar a janela
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
         # Inicializar componentes principais
         self.login_manager = LoginManager(self.root)  # Gerenciador de login
         self.main_window = None  # Será inicializado após login
@@ -115,3 +118,12 @@ class BarbeariaApp:
         # Criar nova instância do login manager e mostrar login
         self.login_manager = LoginManager(self.root)
         self.login_manager.show_login(self.on_login_success)
+    
+    def on_close(self):
+        """
+        Callback executado ao fechar a janela principal.
+        Grava as alterações pendentes antes de encerrar a aplicação.
+        """
+        if self.main_window and self.main_window.data_manager:
+            self.main_window.data_manager.fechar()
+        self.root.destroy()
@@ -92,16 +92,8 @@ class MainWindow:
         self.agendamentos_tab = AgendamentosTab(notebook, self.data_manager)
         self.relatorios_tab = RelatoriosTab(notebook, self.data_manager)
         
-        # Configurar callbacks entre abas
-        self.configurar_callbacks()
-    
-    def configurar_callbacks(self):
-        """Configura callbacks entre abas para sincronização"""
-        # Quando cliente é salvo, atualizar aba de agendamentos
-        self.clientes_tab.set_callback(self.agendamentos_tab.atualizar_lista)
-        
-        # Quando agendamento é realizado, criar corte automaticamente
-        self.agendamentos_tab.set_callback(self.cortes_tab.atualizar_lista)
+        # Não há callbacks entre abas: cada aba se inscreve no DataManager
+        # só nas coleções que exibe e recebe um evento por registro alterado
     
     def atualizar_todas_abas(self):
         """Atualiza todas as abas"""
@@ -112,6 +104,9 @@ class MainWindow:
     
     def logout(self):
         """Faz logout utilizando o callback centralizado"""
+        # Gravar pendências e incorporar os journals aos snapshots antes de sair
+        self.data_manager.fechar()
+        
         if self.logout_callback:
             self.logout_callback()
         else:
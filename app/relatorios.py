@@ -0,0 +1,521 @@
+"""
+Módulo de agregados dos relatórios, mantidos a cada mudança nos dados
+
+Os agregados (rollups por dia, mês, tipo e status) também são gravados em
+um arquivo ao lado dos dados, para que a próxima sessão não precise
+percorrer as coleções.
+"""
+import json
+import os
+from bisect import bisect_left, insort
+from datetime import date, datetime
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from app.storage import data_iso
+from utils.atomic_write import salvar_json_atomico
+
+SEM_VALOR = "Não especificado"
+
+CENTAVO = Decimal("0.01")
+
+# Dias de folga ao redimensionar o índice por dia (evita refazê-lo a cada dia novo)
+MARGEM_DIAS = 366
+
+# Formato do arquivo de rollups; outro valor faz o arquivo ser ignorado
+VERSAO_ROLLUPS = 1
+
+
+def preco_decimal(preco):
+    """
+    Converte o preço de um corte ("25,50", "25.5", 25.5) em Decimal.
+
+    É a regra única de preço dos relatórios: cada preço é arredondado ao
+    centavo (meio centavo para cima) uma vez, aqui. Decimais em centavos
+    somam e subtraem sem erro, então o total mantido aos poucos é igual ao
+    de um recálculo completo e ao do MotorAnalise.
+
+    Returns:
+        Decimal: Preço em reais com 2 casas, ou None se o preço for inválido
+    """
+    try:
+        valor = Decimal(str(preco).replace(",", ".").strip())
+        if not valor.is_finite():
+            return None
+        return valor.quantize(CENTAVO, rounding=ROUND_HALF_UP)
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def preco_centavos(preco):
+    """Preço em centavos inteiros (mesma regra de preco_decimal), ou None"""
+    valor = preco_decimal(preco)
+    return None if valor is None else int(valor.scaleb(2))
+
+
+def ordinal_iso(dia):
+    """ "AAAA-MM-DD" -> date.toordinal() (strptime: date.fromisoformat é 3.7+)"""
+    return datetime.strptime(dia, "%Y-%m-%d").date().toordinal()
+
+
+def dia_ordinal(data_str):
+    """ "DD/MM/AAAA ..." -> date.toordinal() (None se a data for inválida)"""
+    dia = data_iso(data_str)
+    if dia is None:
+        return None
+    try:
+        return ordinal_iso(dia)
+    except ValueError:
+        return None
+
+
+class MulticonjuntoOrdenado:
+    """
+    Valores com repetição, com menor e maior em O(1).
+
+    Guarda a contagem de cada valor e a lista ordenada dos valores
+    distintos; preços distintos são poucos, então inserir e remover custa
+    pouco mesmo com milhões de cortes.
+    """
+
+    def __init__(self):
+        self.contagem = {}
+        self.valores = []
+
+    def adicionar(self, valor):
+        if valor in self.contagem:
+            self.contagem[valor] += 1
+        else:
+            self.contagem[valor] = 1
+            insort(self.valores, valor)
+
+    def remover(self, valor):
+        restante = self.contagem[valor] - 1
+        if restante:
+            self.contagem[valor] = restante
+        else:
+            del self.contagem[valor]
+            del self.valores[bisect_left(self.valores, valor)]
+
+    def menor(self):
+        return self.valores[0] if self.valores else None
+
+    def maior(self):
+        return self.valores[-1] if self.valores else None
+
+
+class ArvoreFenwick:
+    """
+    Somas de prefixo com atualização pontual, ambas em O(log n).
+
+    Attributes:
+        arvore (list): Somas parciais (posição 0 não usada)
+        zero: Elemento neutro da soma (0, Decimal(0), ...)
+    """
+
+    def __init__(self, valores, zero=0):
+        """Monta a árvore a partir dos valores iniciais em O(n)"""
+        self.zero = zero
+        self.arvore = [zero] + list(valores)
+        for i in range(1, len(self.arvore)):
+            pai = i + (i & -i)
+            if pai < len(self.arvore):
+                self.arvore[pai] += self.arvore[i]
+
+    def __len__(self):
+        return len(self.arvore) - 1
+
+    def somar(self, posicao, valor):
+        """Soma valor à posição (base 0)"""
+        i = posicao + 1
+        while i < len(self.arvore):
+            self.arvore[i] += valor
+            i += i & -i
+
+    def prefixo(self, posicao):
+        """Soma das posições 0..posicao (inclusive); posição < 0 dá zero"""
+        total = self.zero
+        i = min(posicao + 1, len(self))
+        while i > 0:
+            total += self.arvore[i]
+            i -= i & -i
+        return total
+
+    def intervalo(self, inicio, fim):
+        """Soma das posições inicio..fim (inclusive)"""
+        if fim < inicio:
+            return self.zero
+        return self.prefixo(fim) - self.prefixo(inicio - 1)
+
+
+class ReceitaPorDia:
+    """
+    Receita e quantidade de cortes por dia, com soma de qualquer período
+    em O(log n).
+
+    Os dias são posições em duas árvores de Fenwick (receita e quantidade)
+    a partir de `base`. As árvores são montadas na primeira consulta (a
+    carga inicial só preenche `valores`); depois, um dia fora da faixa atual
+    as remonta com MARGEM_DIAS de folga, o que raramente acontece.
+
+    Attributes:
+        base (int): Ordinal do dia na posição 0
+        valores (dict): Ordinal -> [receita, quantidade] de cada dia
+        receita (ArvoreFenwick): Receita por posição (Decimal)
+        quantidade (ArvoreFenwick): Cortes por posição
+        montada (bool): As árvores refletem `valores`
+    """
+
+    def __init__(self):
+        self.base = 0
+        self.valores = {}
+        self.receita = ArvoreFenwick([], Decimal(0))
+        self.quantidade = ArvoreFenwick([])
+        self.montada = False
+
+    def somar(self, dia, receita, quantidade):
+        """Soma (ou desconta, com valores negativos) um corte no dia (ordinal)"""
+        valor = self.valores.setdefault(dia, [Decimal(0), 0])
+        valor[0] += receita
+        valor[1] += quantidade
+        if not valor[1] and not valor[0]:
+            del self.valores[dia]
+        if not self.montada:
+            return
+        if self.base <= dia < self.base + len(self.quantidade):
+            self.receita.somar(dia - self.base, receita)
+            self.quantidade.somar(dia - self.base, quantidade)
+        else:
+            self.montada = False
+
+    def montar(self):
+        """Monta as árvores a partir de `valores` em O(dias)"""
+        self.montada = True
+        if not self.valores:
+            self.base = 0
+            self.receita, self.quantidade = ArvoreFenwick([], Decimal(0)), ArvoreFenwick([])
+            return
+        self.base = min(self.valores) - MARGEM_DIAS
+        tamanho = max(self.valores) + MARGEM_DIAS - self.base + 1
+        receitas, quantidades = [Decimal(0)] * tamanho, [0] * tamanho
+        for dia, (receita, quantidade) in self.valores.items():
+            receitas[dia - self.base] = receita
+            quantidades[dia - self.base] = quantidade
+        self.receita = ArvoreFenwick(receitas, Decimal(0))
+        self.quantidade = ArvoreFenwick(quantidades)
+
+    def periodo(self, inicio, fim):
+        """
+        Receita e quantidade de cortes entre duas datas.
+
+        Args:
+            inicio, fim (date): Primeiro e último dia (inclusive)
+
+        Returns:
+            tuple: (receita Decimal, quantidade int)
+        """
+        if not self.montada:
+            self.montar()
+        primeiro = max(inicio.toordinal() - self.base, 0)
+        ultimo = min(fim.toordinal() - self.base, len(self.quantidade) - 1)
+        return self.receita.intervalo(primeiro, ultimo), self.quantidade.intervalo(primeiro, ultimo)
+
+
+class AgregadosRelatorio:
+    """
+    Números da aba de relatórios mantidos a partir dos eventos do DataManager.
+
+    Cada evento desconta o registro anterior e soma o novo, então consultar
+    os números não depende do tamanho do histórico.
+
+    Attributes:
+        totais (dict): Coleção -> quantidade de registros
+        receita (Decimal): Soma dos preços válidos
+        precos (MulticonjuntoOrdenado): Preços positivos
+        quantidade_precos (int): Quantidade de preços positivos
+        soma_precos (Decimal): Soma dos preços positivos (para a média)
+        por_tipo (dict): Tipo de corte -> quantidade
+        receita_por_tipo (dict): Tipo de corte -> receita (só tipos com receita)
+        por_status (dict): Status do agendamento -> quantidade
+        por_dia (ReceitaPorDia): Receita e cortes por dia (cortes com data)
+        por_mes (dict): "AAAA-MM" -> [receita, quantidade] (cortes com data)
+    """
+
+    def __init__(self, data_manager=None):
+        self.limpar()
+        if data_manager is not None:
+            self.construir(data_manager)
+            data_manager.inscrever(self.ao_mudar_dados)
+
+    def limpar(self):
+        """Zera todos os números"""
+        self.totais = {"clientes": 0, "cortes": 0, "agendamentos": 0}
+        self.receita = Decimal(0)
+        self.precos = MulticonjuntoOrdenado()
+        self.soma_precos = Decimal(0)
+        self.quantidade_precos = 0
+        self.por_tipo = {}
+        self.receita_por_tipo = {}
+        self.por_status = {}
+        self.por_dia = ReceitaPorDia()
+        self.por_mes = {}
+
+    def construir(self, data_manager):
+        """Calcula tudo a partir dos dados atuais (uma vez, ao abrir)"""
+        with data_manager.lock:
+            for colecao in self.totais:
+                for registro in data_manager.registros[colecao].values():
+                    self.somar(colecao, registro, 1)
+
+    def ao_mudar_dados(self, evento):
+        if evento.colecao not in self.totais:
+            return
+        if evento.anterior is not None:
+            self.somar(evento.colecao, evento.anterior, -1)
+        if evento.novo is not None:
+            self.somar(evento.colecao, evento.novo, 1)
+
+    def somar(self, colecao, registro, sinal):
+        """Soma (sinal 1) ou desconta (sinal -1) a contribuição de um registro"""
+        self.totais[colecao] += sinal
+        if colecao == "cortes":
+            preco = preco_decimal(registro.get("preco", "0"))
+            dia = dia_ordinal(registro.get("data_hora"))
+            if dia is not None:
+                receita = sinal * (preco or 0)
+                self.por_dia.somar(dia, receita, sinal)
+                data = date.fromordinal(dia)
+                chave = f"{data.year:04d}-{data.month:02d}"
+                mes = self.por_mes.setdefault(chave, [Decimal(0), 0])
+                mes[0] += receita
+                mes[1] += sinal
+                if not mes[1] and not mes[0]:
+                    del self.por_mes[chave]
+            if preco is not None:
+                self.receita += sinal * preco
+                self.contar(self.receita_por_tipo, registro.get("corte"), sinal * preco)
+                if preco > 0:
+                    self.soma_precos += sinal * preco
+                    self.quantidade_precos += sinal
+                    if sinal > 0:
+                        self.precos.adicionar(preco)
+                    else:
+                        self.precos.remover(preco)
+            self.contar(self.por_tipo, registro.get("corte"), sinal)
+        elif colecao == "agendamentos":
+            self.contar(self.por_status, registro.get("status"), sinal)
+
+    @staticmethod
+    def contar(contagens, chave, sinal):
+        chave = SEM_VALOR if chave is None else chave
+        restante = contagens.get(chave, 0) + sinal
+        if restante:
+            contagens[chave] = restante
+        else:
+            contagens.pop(chave, None)
+
+    # Consultas (valores em reais, como float para formatação)
+    def receita_total(self):
+        return float(self.receita)
+
+    def media_preco(self):
+        if not self.quantidade_precos:
+            return None
+        return float(self.soma_precos / self.quantidade_precos)
+
+    def maior_preco(self):
+        maior = self.precos.maior()
+        return float(maior) if maior is not None else None
+
+    def menor_preco(self):
+        menor = self.precos.menor()
+        return float(menor) if menor is not None else None
+
+    def receita_periodo(self, inicio, fim):
+        """
+        Receita e quantidade de cortes entre duas datas, em O(log n).
+
+        Args:
+            inicio, fim (date): Primeiro e último dia (inclusive)
+
+        Returns:
+            tuple: (receita float, quantidade int)
+        """
+        receita, quantidade = self.por_dia.periodo(inicio, fim)
+        return float(receita), quantidade
+
+    def tipos_populares(self, limite=3):
+        """Tipos de corte mais frequentes, do mais para o menos frequente"""
+        return sorted(self.por_tipo.items(), key=lambda item: item[1], reverse=True)[:limite]
+
+    def tipos_que_mais_faturam(self, limite=3):
+        """(tipo, receita float) dos tipos com maior receita"""
+        maiores = sorted(self.receita_por_tipo.items(), key=lambda item: item[1], reverse=True)
+        return [(tipo, float(receita)) for tipo, receita in maiores[:limite]]
+
+    def receita_ultimos_meses(self, limite=6):
+        """("AAAA-MM", receita float) dos últimos meses com cortes, em ordem cronológica"""
+        meses = sorted(self.por_mes.items())[-limite:]
+        return [(mes, float(receita)) for mes, (receita, quantidade) in meses]
+
+    def resumo(self):
+        """Todos os números em um dicionário (ex.: para comparar com recalcular)"""
+        return {
+            "totais": dict(self.totais),
+            "receita": self.receita,
+            "soma_precos": self.soma_precos,
+            "quantidade_precos": self.quantidade_precos,
+            "precos": dict(self.precos.contagem),
+            "por_tipo": dict(self.por_tipo),
+            "receita_por_tipo": dict(self.receita_por_tipo),
+            "por_status": dict(self.por_status),
+            "por_dia": {dia: tuple(valor) for dia, valor in self.por_dia.valores.items()},
+            "por_mes": {mes: tuple(valor) for mes, valor in self.por_mes.items()},
+        }
+
+    # Rollups gravados em arquivo (valores Decimal como texto)
+    def para_json(self):
+        return {
+            "totais": self.totais,
+            "receita": str(self.receita),
+            "soma_precos": str(self.soma_precos),
+            "quantidade_precos": self.quantidade_precos,
+            "precos": {str(preco): quantidade for preco, quantidade in self.precos.contagem.items()},
+            "por_tipo": self.por_tipo,
+            "receita_por_tipo": {tipo: str(receita) for tipo, receita in self.receita_por_tipo.items()},
+            "por_status": self.por_status,
+            "dias": {
+                date.fromordinal(dia).isoformat(): [str(receita), quantidade]
+                for dia, (receita, quantidade) in sorted(self.por_dia.valores.items())
+            },
+            "meses": {
+                mes: [str(receita), quantidade] for mes, (receita, quantidade) in sorted(self.por_mes.items())
+            },
+        }
+
+    def carregar_json(self, dados):
+        """Substitui os números pelos de um rollup gravado por para_json()"""
+        self.limpar()
+        self.totais = dict(dados["totais"])
+        self.receita = Decimal(dados["receita"])
+        self.soma_precos = Decimal(dados["soma_precos"])
+        self.quantidade_precos = dados["quantidade_precos"]
+        for preco, quantidade in dados["precos"].items():
+            self.precos.contagem[Decimal(preco)] = quantidade
+        self.precos.valores = sorted(self.precos.contagem)
+        self.por_tipo = dict(dados["por_tipo"])
+        self.receita_por_tipo = {
+            tipo: Decimal(receita) for tipo, receita in dados["receita_por_tipo"].items()
+        }
+        self.por_status = dict(dados["por_status"])
+        self.por_dia.valores = {
+            ordinal_iso(dia): [Decimal(receita), quantidade]
+            for dia, (receita, quantidade) in dados["dias"].items()
+        }
+        self.por_mes = {
+            mes: [Decimal(receita), quantidade] for mes, (receita, quantidade) in dados["meses"].items()
+        }
+
+
+class CacheRelatorios:
+    """
+    Resultado de cada seção dos relatórios, ligado às versões das coleções
+    de que ela depende.
+
+    A chave de uma seção é a tupla de DataManager.versao() das suas
+    coleções; enquanto nenhuma delas muda, a seção não é recalculada.
+
+    Attributes:
+        entradas (dict): Seção -> (chave, valor)
+        acertos (dict): Seção -> consultas respondidas pelo cache
+        falhas (dict): Seção -> consultas que precisaram recalcular
+    """
+
+    def __init__(self):
+        self.entradas = {}
+        self.acertos = {}
+        self.falhas = {}
+
+    def obter(self, secao, chave, calcular):
+        """
+        Valor da seção para a chave, calculado só se a chave mudou.
+
+        Args:
+            secao (str): Nome da seção (ex.: "cortes")
+            chave (tuple): Versões das coleções de que a seção depende
+            calcular (callable): Função sem argumentos que produz o valor
+        """
+        entrada = self.entradas.get(secao)
+        if entrada is not None and entrada[0] == chave:
+            self.acertos[secao] = self.acertos.get(secao, 0) + 1
+            return entrada[1]
+        self.falhas[secao] = self.falhas.get(secao, 0) + 1
+        valor = calcular()
+        self.entradas[secao] = (chave, valor)
+        return valor
+
+    def invalidar(self, secao=None):
+        """Descarta uma seção (ou todas), forçando o próximo cálculo"""
+        if secao is None:
+            self.entradas.clear()
+        else:
+            self.entradas.pop(secao, None)
+
+    def estatisticas(self):
+        """
+        Acertos e falhas por seção, para ajuste.
+
+        Returns:
+            dict: Seção -> {"acertos", "falhas", "taxa_acerto"}
+        """
+        estatisticas = {}
+        for secao in sorted(set(self.acertos) | set(self.falhas)):
+            acertos, falhas = self.acertos.get(secao, 0), self.falhas.get(secao, 0)
+            estatisticas[secao] = {
+                "acertos": acertos,
+                "falhas": falhas,
+                "taxa_acerto": acertos / (acertos + falhas),
+            }
+        return estatisticas
+
+
+def carregar_rollups(caminho, impressao):
+    """
+    Lê os rollups gravados, se correspondem aos dados carregados.
+
+    Args:
+        caminho (str): Arquivo de rollups
+        impressao (dict): Impressão atual dos dados (ver
+            DataManager.impressao_dados); precisa ser igual à gravada
+
+    Returns:
+        AgregadosRelatorio: Agregados lidos, ou None se o arquivo não existe,
+            é de outra versão ou está desatualizado
+    """
+    if not os.path.exists(caminho):
+        return None
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            dados = json.load(f)
+        if dados.get("versao") != VERSAO_ROLLUPS or dados.get("impressao") != impressao:
+            return None
+        agregados = AgregadosRelatorio()
+        agregados.carregar_json(dados["agregados"])
+        return agregados
+    except (OSError, ValueError, KeyError, TypeError, InvalidOperation) as e:
+        print(f"✗ Rollups ignorados ({caminho}): {e}")
+        return None
+
+
+def salvar_rollups(caminho, agregados, impressao):
+    """Grava os rollups (atomicamente) com a impressão dos dados que resumem"""
+    salvar_json_atomico(caminho, {
+        "versao": VERSAO_ROLLUPS,
+        "impressao": impressao,
+        "agregados": agregados.para_json(),
+    })
+
+
+def recalcular(data_manager):
+    """Resumo calculado do zero, para conferir os agregados incrementais"""
+    agregados = AgregadosRelatorio()
+    agregados.construir(data_manager)
+    return agregados.resumo()
@@ -0,0 +1,326 @@
+"""
+Módulo de backends de armazenamento do DataManager
+
+Backends disponíveis:
+- ArmazenamentoJson: snapshot JSON + journal append-only por coleção
+- ArmazenamentoSQLite: tabelas sqlite3 com índices por nome, data, status e tipo
+
+Todos os backends expõem a mesma interface usada pelo DataManager:
+carregar(colecao), registrar(colecao, dados, op, id_registro, registro),
+registrar_lote(colecao, operacoes), precisa_compactar(colecao, adicionais),
+compactar(colecao, dados), impressao() e fechar(). As consultas são feitas
+nos índices em memória do DataManager, não nos backends.
+
+O atributo ao_gravar (callable ou None) é chamado sempre que os arquivos
+ficam em dia com a memória: após um snapshot (JSON) ou após cada gravação
+do write-behind. O DataManager o usa para regravar os rollups.
+
+Os dados de cada coleção circulam como um dicionário {id: registro} na
+ordem de inserção; as mutações são endereçadas pelo id do registro.
+"""
+import json
+import os
+import sqlite3
+from app.journal import JournalColecao
+from models.models import gerar_id
+from utils.atomic_write import FSYNC_GRUPO, FSYNC_NUNCA, obter_politica, salvar_json_atomico
+
+
+COLECOES = ("clientes", "cortes", "agendamentos")
+
+
+def data_iso(data_str):
+    """
+    Converte "DD/MM/AAAA" (ou "DD/MM/AAAA HH:MM") em "AAAA-MM-DD".
+
+    O formato ISO ordena lexicograficamente, o que permite consultas
+    por intervalo direto no índice. Retorna None se o texto for inválido.
+    """
+    if not isinstance(data_str, str):
+        return None
+    partes = data_str.strip().split(" ")[0].split("/")
+    if len(partes) != 3 or not all(p.isdigit() for p in partes):
+        return None
+    dia, mes, ano = partes
+    return f"{ano.zfill(4)}-{mes.zfill(2)}-{dia.zfill(2)}"
+
+
+def impressao_arquivo(caminho):
+    """[tamanho, mtime_ns] do arquivo; None se não existir ou estiver vazio"""
+    try:
+        stat = os.stat(caminho)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns] if stat.st_size else None
+
+
+def indexar_por_id(registros):
+    """
+    Converte uma lista de registros em {id: registro}, na mesma ordem.
+
+    Registros antigos, sem id, recebem um novo id gerado na hora.
+
+    Returns:
+        tuple: (dicionário por id, True se algum id foi gerado)
+    """
+    dados = {}
+    migrado = False
+    for registro in registros:
+        if not registro.get("id"):
+            registro["id"] = gerar_id()
+            migrado = True
+        dados[registro["id"]] = registro
+    return dados, migrado
+
+
+# Colunas indexadas de cada coleção (tabelas do SQLite e índices em memória do
+# DataManager) e como extraí-las do registro
+COLUNAS_INDEXADAS = {
+    "clientes": {
+        "nome": lambda r: r.get("nome"),
+    },
+    "cortes": {
+        "tipo": lambda r: r.get("corte"),
+        "data": lambda r: data_iso(r.get("data_hora")),
+    },
+    "agendamentos": {
+        "cliente": lambda r: r.get("cliente"),
+        "data": lambda r: data_iso(r.get("data")),
+        "status": lambda r: r.get("status"),
+        "servico": lambda r: r.get("servico"),
+    },
+}
+
+
+class ArmazenamentoJson:
+    """
+    Backend padrão: um arquivo JSON (snapshot) e um journal por coleção.
+
+    Attributes:
+        arquivos (dict): Caminho do snapshot de cada coleção
+        journals (dict): JournalColecao de cada coleção
+        ao_gravar (callable): Chamado após cada snapshot (None = nada)
+    """
+
+    def __init__(self, arquivos):
+        self.arquivos = arquivos
+        self.ao_gravar = None
+        self.journals = {colecao: JournalColecao(arquivo) for colecao, arquivo in arquivos.items()}
+
+    def carregar(self, colecao):
+        """
+        Carrega o snapshot da coleção e reaplica o journal.
+
+        Se algum registro antigo recebeu id agora, a coleção é compactada
+        para que os ids fiquem gravados.
+        """
+        arquivo = self.arquivos[colecao]
+        registros = []
+        if os.path.exists(arquivo):
+            with open(arquivo, 'r', encoding='utf-8') as f:
+                registros = json.load(f)
+
+        dados, migrado = indexar_por_id(registros)
+        journal = self.journals[colecao]
+        journal.reaplicar(dados)
+        if migrado or journal.precisa_compactar():
+            self.compactar(colecao, dados)
+        return dados
+
+    def registrar(self, colecao, dados, op, id_registro=None, registro=None):
+        """Anexa a mutação ao journal, compactando ao atingir o limite"""
+        journal = self.journals[colecao]
+        journal.registrar(op, id_registro, registro)
+        if journal.precisa_compactar():
+            self.compactar(colecao, dados)
+
+    def registrar_lote(self, colecao, operacoes):
+        """Anexa várias mutações ao journal em uma única escrita (sem compactar)"""
+        self.journals[colecao].registrar_lote(operacoes)
+
+    def precisa_compactar(self, colecao, adicionais=0):
+        return self.journals[colecao].precisa_compactar(adicionais)
+
+    def compactar(self, colecao, dados):
+        """Grava o snapshot completo (atomicamente) e descarta o journal"""
+        salvar_json_atomico(self.arquivos[colecao], list(dados.values()))
+        self.journals[colecao].descartar()
+        if self.ao_gravar:
+            self.ao_gravar()
+
+    def impressao(self):
+        """Tamanho e mtime do snapshot e do journal de cada coleção"""
+        return {
+            colecao: [impressao_arquivo(arquivo), impressao_arquivo(self.journals[colecao].arquivo_journal)]
+            for colecao, arquivo in self.arquivos.items()
+        }
+
+    def fechar(self):
+        """Nada a liberar: cada gravação abre e fecha seu arquivo"""
+
+
+class ArmazenamentoSQLite:
+    """
+    Backend sqlite3 com uma tabela por coleção.
+
+    Cada linha guarda o id do registro (índice único), o registro completo
+    (JSON) e as colunas indexadas de COLUNAS_INDEXADAS, mantidas a cada
+    mutação. A ordem da coleção é a ordem de inserção (seq). Na primeira
+    execução o banco é populado a partir dos arquivos JSON.
+
+    Attributes:
+        caminho (str): Caminho do arquivo .db
+        conexao (sqlite3.Connection): Conexão aberta com o banco
+        ao_gravar (callable): Não é chamado (cada mutação já é um commit)
+    """
+
+    def __init__(self, caminho="data/barbearia.db", arquivos_json=None):
+        self.caminho = caminho
+        self.ao_gravar = None
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        self.conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self.configurar_durabilidade(obter_politica().modo)
+        self.criar_tabelas()
+
+        if arquivos_json and not self.obter_meta("importado_json"):
+            self.importar_json(arquivos_json)
+
+    def configurar_durabilidade(self, modo):
+        """
+        Traduz a política de fsync do sistema para os PRAGMAs do SQLite.
+
+        "sempre" usa synchronous=FULL; "grupo" usa WAL com synchronous=NORMAL
+        (commits sincronizados em grupo no checkpoint); "nunca" desliga o fsync.
+        """
+        if modo == FSYNC_NUNCA:
+            self.conexao.execute("PRAGMA synchronous = OFF")
+        elif modo == FSYNC_GRUPO:
+            self.conexao.execute("PRAGMA journal_mode = WAL")
+            self.conexao.execute("PRAGMA synchronous = NORMAL")
+        else:
+            self.conexao.execute("PRAGMA synchronous = FULL")
+
+    def criar_tabelas(self):
+        """Cria tabelas e índices (idempotente)"""
+        with self.conexao:
+            self.conexao.execute(
+                "CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor TEXT)"
+            )
+            for colecao, colunas in COLUNAS_INDEXADAS.items():
+                definicoes = "".join(f", {coluna} TEXT" for coluna in colunas)
+                self.conexao.execute(
+                    f"CREATE TABLE IF NOT EXISTS {colecao} "
+                    f"(seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT, dados TEXT NOT NULL{definicoes})"
+                )
+                self.migrar_ids(colecao)
+                self.conexao.execute(
+                    f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{colecao}_id ON {colecao} (id)"
+                )
+                for coluna in colunas:
+                    self.conexao.execute(
+                        f"CREATE INDEX IF NOT EXISTS idx_{colecao}_{coluna} ON {colecao} ({coluna})"
+                    )
+
+    def migrar_ids(self, colecao):
+        """Adiciona a coluna id a bancos antigos e gera ids para linhas sem id"""
+        colunas = [linha[1] for linha in self.conexao.execute(f"PRAGMA table_info({colecao})")]
+        if "id" not in colunas:
+            self.conexao.execute(f"ALTER TABLE {colecao} ADD COLUMN id TEXT")
+
+        sem_id = self.conexao.execute(
+            f"SELECT seq, dados FROM {colecao} WHERE id IS NULL"
+        ).fetchall()
+        for seq, dados in sem_id:
+            registro = json.loads(dados)
+            registro["id"] = registro.get("id") or gerar_id()
+            self.conexao.execute(
+                f"UPDATE {colecao} SET id = ?, dados = ? WHERE seq = ?",
+                (registro["id"], json.dumps(registro, ensure_ascii=False), seq)
+            )
+
+    def obter_meta(self, chave):
+        linha = self.conexao.execute("SELECT valor FROM meta WHERE chave = ?", (chave,)).fetchone()
+        return linha[0] if linha else None
+
+    def importar_json(self, arquivos_json):
+        """Popula o banco com os dados atuais dos arquivos JSON (snapshot + journal)"""
+        origem = ArmazenamentoJson(arquivos_json)
+        with self.conexao:
+            for colecao in COLECOES:
+                for registro in origem.carregar(colecao).values():
+                    self.conexao.execute(*self.sql_insert(colecao, registro))
+            self.conexao.execute(
+                "INSERT OR REPLACE INTO meta (chave, valor) VALUES ('importado_json', '1')"
+            )
+
+    def valores_indexados(self, colecao, registro):
+        return [extrair(registro) for extrair in COLUNAS_INDEXADAS[colecao].values()]
+
+    def sql_insert(self, colecao, registro):
+        colunas = list(COLUNAS_INDEXADAS[colecao])
+        marcadores = ", ".join("?" * (len(colunas) + 2))
+        sql = f"INSERT INTO {colecao} (id, dados, {', '.join(colunas)}) VALUES ({marcadores})"
+        valores = [registro["id"], json.dumps(registro, ensure_ascii=False)]
+        return sql, valores + self.valores_indexados(colecao, registro)
+
+    def carregar(self, colecao):
+        """Carrega a coleção como {id: registro}, na ordem de inserção"""
+        linhas = self.conexao.execute(f"SELECT id, dados FROM {colecao} ORDER BY seq").fetchall()
+        return {id_registro: json.loads(dados) for id_registro, dados in linhas}
+
+    def registrar(self, colecao, dados, op, id_registro=None, registro=None):
+        """Aplica a mutação na tabela"""
+        self.registrar_lote(colecao, [(op, id_registro, registro)])
+
+    def registrar_lote(self, colecao, operacoes):
+        """Aplica várias mutações, na ordem, em uma única transação"""
+        with self.conexao:
+            for op, id_registro, registro in operacoes:
+                self.aplicar(colecao, op, id_registro, registro)
+
+    def aplicar(self, colecao, op, id_registro, registro):
+        """Executa o SQL de uma mutação"""
+        if op == "add":
+            self.conexao.execute(*self.sql_insert(colecao, registro))
+        elif op == "update":
+            colunas = list(COLUNAS_INDEXADAS[colecao])
+            atribuicoes = ", ".join(f"{coluna} = ?" for coluna in ["dados"] + colunas)
+            valores = [json.dumps(registro, ensure_ascii=False)] + self.valores_indexados(colecao, registro)
+            self.conexao.execute(
+                f"UPDATE {colecao} SET {atribuicoes} WHERE id = ?", valores + [id_registro]
+            )
+        elif op == "delete":
+            self.conexao.execute(f"DELETE FROM {colecao} WHERE id = ?", (id_registro,))
+
+    def precisa_compactar(self, colecao, adicionais=0):
+        return False
+
+    def compactar(self, colecao, dados):
+        """O SQLite não usa journal próprio do sistema; nada a compactar"""
+
+    def impressao(self):
+        """Tamanho e mtime do banco e do WAL (commits ainda fora do banco)"""
+        return {"banco": [impressao_arquivo(self.caminho), impressao_arquivo(self.caminho + "-wal")]}
+
+    def fechar(self):
+        """Fecha a conexão com o banco"""
+        self.conexao.close()
+
+
+def criar_armazenamento(tipo, arquivos):
+    """
+    Cria o backend de armazenamento escolhido.
+
+    Args:
+        tipo (str): "json" ou "sqlite"
+        arquivos (dict): Arquivos JSON de cada coleção
+
+    Returns:
+        Backend de armazenamento
+    """
+    if tipo == "sqlite":
+        pasta = os.path.dirname(next(iter(arquivos.values())))
+        return ArmazenamentoSQLite(os.path.join(pasta, "barbearia.db"), arquivos_json=arquivos)
+    if tipo == "json":
+        return ArmazenamentoJson(arquivos)
+    raise ValueError(f"Backend de armazenamento desconhecido: {tipo}")
@@ -4,13 +4,16 @@ Aba de gerenciamento de agendamentos
 import tkinter as tk
 from tkinter import ttk, messagebox
 from gui.cadastros import CadastroAgendamentoWindow
+from gui.busca_adiada import BuscaAdiada
+from gui.lista_virtual import ListaVirtual
+from utils.validations import Validador, TIPOS_CORTE, STATUS_AGENDAMENTO
+from app.storage import data_iso
 
 
 class AgendamentosTab:
     def __init__(self, notebook, data_manager):
         self.notebook = notebook
         self.data_manager = data_manager
-        self.callback = None
         
         # Criar frame da aba
         self.frame = ttk.Frame(notebook)
@@ -18,10 +21,9 @@ class AgendamentosTab:
         
         self.criar_interface()
         self.atualizar_lista()
-    
-    def set_callback(self, callback):
-        """Define callback para quando dados são alterados"""
-        self.callback = callback
+        
+        # Mudanças feitas em qualquer aba chegam registro a registro
+        self.data_manager.inscrever(self.ao_mudar_dados, colecoes=("agendamentos",))
     
     def criar_interface(self):
         """Cria a interface da aba de agendamentos"""
@@ -53,6 +55,11 @@ class AgendamentosTab:
         tk.Button(btn_frame, text="🔄 Atualizar", command=self.atualizar_lista,
                  bg="#95a5a6", fg="white", font=("Arial", 12, "bold"), cursor="hand2").pack(side="right", padx=5)
         
+        tk.Button(btn_frame, text="⚠️ Conflitos", command=self.auditar_conflitos,
+                 bg="#e67e22", fg="white", font=("Arial", 12, "bold"), cursor="hand2").pack(side="right", padx=5)
+        
+        self.criar_filtros()
+        
         # Treeview
         columns = ("Cliente", "Data", "Hora", "Serviço", "Status")
         self.tree = ttk.Treeview(self.frame, columns=columns, show="headings", height=18)
@@ -62,61 +69,209 @@ class AgendamentosTab:
             self.tree.heading(col, text=col)
             self.tree.column(col, width=120)
         
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        # Scrollbar (controlada pela lista virtual: só as linhas visíveis existem)
+        scrollbar = ttk.Scrollbar(self.frame, orient="vertical")
+        self.lista = ListaVirtual(self.tree, scrollbar, self.valores_agendamento)
+        
+        # Filtros respondidos pelos índices do DataManager em uma thread;
+        # texto e datas esperam a pausa na digitação, status e serviço não
+        self.busca = BuscaAdiada(
+            self.entry_cliente, self.filtrar_registros, self.exibir_resultado,
+            registrar=lambda *metricas: self.data_manager.registrar_busca("agendamentos", *metricas),
+            coletar=self.filtros_atuais
+        )
+        for entry in (self.entry_data_inicio, self.entry_data_fim):
+            entry.bind("<KeyRelease>", self.busca.agendar)
         
         self.tree.pack(side="left", fill="both", expand=True, padx=15, pady=15)
         scrollbar.pack(side="right", fill="y", padx=(0, 15), pady=15)
     
+    def criar_filtros(self):
+        """Cria a barra de filtros (cliente, período, status e serviço)"""
+        filtro_frame = tk.Frame(self.frame, bg="#ecf0f1")
+        filtro_frame.pack(fill="x", padx=15)
+        
+        tk.Label(filtro_frame, text="🔍 Cliente:", font=("Arial", 11), bg="#ecf0f1").pack(side="left")
+        self.entry_cliente = tk.Entry(filtro_frame, font=("Arial", 11), width=20)
+        self.entry_cliente.pack(side="left", padx=(5, 10))
+        
+        tk.Label(filtro_frame, text="📅 De:", font=("Arial", 11), bg="#ecf0f1").pack(side="left")
+        self.entry_data_inicio = tk.Entry(filtro_frame, font=("Arial", 11), width=11)
+        self.entry_data_inicio.pack(side="left", padx=(5, 10))
+        
+        tk.Label(filtro_frame, text="Até:", font=("Arial", 11), bg="#ecf0f1").pack(side="left")
+        self.entry_data_fim = tk.Entry(filtro_frame, font=("Arial", 11), width=11)
+        self.entry_data_fim.pack(side="left", padx=(5, 10))
+        
+        tk.Label(filtro_frame, text="✂️ Serviço:", font=("Arial", 11), bg="#ecf0f1").pack(side="left")
+        self.combo_servico = ttk.Combobox(filtro_frame, font=("Arial", 11), width=22, state="readonly",
+                                          values=["Todos"] + TIPOS_CORTE)
+        self.combo_servico.set("Todos")
+        self.combo_servico.pack(side="left", padx=(5, 10))
+        self.combo_servico.bind("<<ComboboxSelected>>", lambda e: self.busca.buscar_agora())
+        
+        self.label_total = tk.Label(filtro_frame, text="", font=("Arial", 10, "italic"),
+                                    bg="#ecf0f1", fg="#7f8c8d")
+        self.label_total.pack(side="right")
+        
+        status_frame = tk.Frame(self.frame, bg="#ecf0f1")
+        status_frame.pack(fill="x", padx=15, pady=(5, 0))
+        
+        tk.Label(status_frame, text="Status:", font=("Arial", 11), bg="#ecf0f1").pack(side="left")
+        self.status_marcados = {}
+        for status in STATUS_AGENDAMENTO:
+            marcado = tk.BooleanVar(value=True)
+            self.status_marcados[status] = marcado
+            tk.Checkbutton(status_frame, text=status, variable=marcado, font=("Arial", 10),
+                           bg="#ecf0f1", command=lambda: self.busca.buscar_agora()).pack(side="left", padx=5)
+    
+    def valores_agendamento(self, agendamento):
+        """Valores das colunas do Treeview para um agendamento"""
+        return (
+            agendamento.get("cliente", ""),
+            agendamento.get("data", ""),
+            agendamento.get("hora", ""),
+            agendamento.get("servico", ""),
+            agendamento.get("status", "")
+        )
+    
     def atualizar_lista(self):
-        """Atualiza a lista de agendamentos"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        for agendamento in self.data_manager.get_agendamentos():
-            self.tree.insert("", "end", values=(
-                agendamento.get("cliente", ""),
-                agendamento.get("data", ""),
-                agendamento.get("hora", ""),
-                agendamento.get("servico", ""),
-                agendamento.get("status", "")
-            ))
+        """Atualiza a lista de agendamentos (respeitando os filtros atuais)"""
+        self.exibir_resultado(self.filtrar_registros(self.filtros_atuais()))
+    
+    def filtros_atuais(self):
+        """
+        Lê os filtros da tela no formato de DataManager.buscar_agendamentos.
+        
+        Datas incompletas ou inválidas são ignoradas (o usuário ainda está
+        digitando); status com todos marcados e serviço "Todos" não filtram.
+        """
+        datas = {}
+        for chave, entry in (("data_inicio", self.entry_data_inicio), ("data_fim", self.entry_data_fim)):
+            data = entry.get().strip()
+            datas[chave] = data if Validador.validar_data(data) else None
+        
+        status = [status for status, marcado in self.status_marcados.items() if marcado.get()]
+        servico = self.combo_servico.get()
+        return {
+            "texto": self.entry_cliente.get(),
+            "status": None if len(status) == len(self.status_marcados) else status,
+            "servico": None if servico in ("", "Todos") else servico,
+            **datas
+        }
+    
+    def filtrar_registros(self, filtros, cancelado=lambda: False):
+        """
+        Agendamentos que atendem aos filtros (também roda na thread de busca).
+        
+        Returns:
+            list: Agendamentos encontrados, ou None se a busca foi cancelada
+        """
+        if cancelado():
+            return None
+        return self.data_manager.buscar_agendamentos(**filtros)
+    
+    def exibir_resultado(self, agendamentos):
+        """Mostra o resultado em blocos, para não travar com listas grandes"""
+        total = len(agendamentos)
+        self.label_total.config(text=f"{total} agendamento{'s' if total != 1 else ''}")
+        self.lista.carregar_em_blocos(agendamentos)
+    
+    def corresponde_filtros(self, agendamento):
+        """Indica se o agendamento passa pelos filtros atuais"""
+        filtros = self.filtros_atuais()
+        if filtros["status"] is not None and agendamento.get("status") not in filtros["status"]:
+            return False
+        if filtros["servico"] is not None and agendamento.get("servico") != filtros["servico"]:
+            return False
+        if filtros["data_inicio"] or filtros["data_fim"]:
+            data = data_iso(agendamento.get("data"))
+            if data is None:
+                return False
+            if filtros["data_inicio"] and data < data_iso(filtros["data_inicio"]):
+                return False
+            if filtros["data_fim"] and data > data_iso(filtros["data_fim"]):
+                return False
+        return self.data_manager.corresponde("agendamentos", agendamento, filtros["texto"])
+    
+    def ao_mudar_dados(self, evento):
+        """Aplica na lista só a linha do registro alterado"""
+        registro = evento.novo
+        incluir = registro is not None and self.corresponde_filtros(registro)
+        self.lista.aplicar(evento.op, evento.id, registro, incluir)
+    
+    def sugerir_clientes(self, texto, limite=20):
+        """Nomes de clientes para o campo cliente: exatos primeiro, depois parecidos"""
+        # dict mantém a ordem e descarta nomes repetidos (homônimos)
+        nomes = dict.fromkeys(cliente["nome"] for cliente in self.data_manager.pesquisar("clientes", texto, limite))
+        if len(nomes) < limite:
+            for cliente, _ in self.data_manager.pesquisar_aproximado("clientes", texto, limite):
+                nomes.setdefault(cliente["nome"])
+        return list(nomes)[:limite]
+    
+    def existe_cliente(self, nome):
+        """Consulta o índice por nome, sem percorrer os clientes"""
+        return bool(self.data_manager.buscar_clientes(nome))
+    
+    def clientes_iniciais(self):
+        """Primeira página de clientes para a lista do formulário (não todos)"""
+        return self.data_manager.page_clientes(0, 20)
+    
+    def sugerir_horarios(self, servico, data=None, id_ignorar=None):
+        """Próximos 10 horários livres para o serviço, a partir da data (ou hoje)"""
+        return self.data_manager.horarios_livres(servico or None, data, limite=10,
+                                                 id_ignorar=id_ignorar)
     
     def novo_agendamento(self):
         """Abre janela de novo agendamento"""
-        clientes = self.data_manager.get_clientes()
-        if not clientes:
+        if not self.data_manager.contar("clientes"):
             messagebox.showwarning("Aviso", "Cadastre clientes primeiro!")
             return
         
-        CadastroAgendamentoWindow(self.frame, clientes, self.callback_agendamento_salvo)
+        CadastroAgendamentoWindow(self.frame, self.clientes_iniciais(), self.callback_agendamento_salvo,
+                                  sugerir_clientes=self.sugerir_clientes,
+                                  cliente_existe=self.existe_cliente,
+                                  verificar_conflitos=self.data_manager.conflitos_agendamento,
+                                  sugerir_horarios=self.sugerir_horarios)
     
     def editar_agendamento(self):
         """Edita o agendamento selecionado"""
-        selected = self.tree.selection()
+        selected = self.lista.selecao()
         if not selected:
             messagebox.showwarning("Aviso", "Selecione um agendamento para editar!")
             return
         
-        item = selected[0]
-        values = self.tree.item(item, 'values')
-        cliente_nome = values[0]
-        data_agendamento = values[1]
-        hora_agendamento = values[2]
-        
-        # Encontrar agendamento
-        agendamentos = self.data_manager.get_agendamentos()
-        for i, agendamento in enumerate(agendamentos):
-            if (agendamento['cliente'] == cliente_nome and 
-                agendamento['data'] == data_agendamento and 
-                agendamento['hora'] == hora_agendamento):
-                
-                clientes = self.data_manager.get_clientes()
-                CadastroAgendamentoWindow(self.frame, clientes, 
-                                        lambda dados: self.callback_agendamento_editado(dados, i),
-                                        agendamento)
-                break
+        # O iid do item é o id do agendamento
+        id_agendamento = selected[0]
+        agendamento = self.data_manager.obter("agendamentos", id_agendamento)
+        if agendamento is None:
+            self.agendamento_removido()
+            return
+        CadastroAgendamentoWindow(self.frame, self.clientes_iniciais(), 
+                                lambda dados: self.callback_agendamento_editado(dados, id_agendamento),
+                                agendamento, sugerir_clientes=self.sugerir_clientes,
+                                cliente_existe=self.existe_cliente,
+                                verificar_conflitos=lambda dados: self.data_manager.conflitos_agendamento(
+                                    dados, id_agendamento),
+                                sugerir_horarios=lambda servico, data: self.sugerir_horarios(
+                                    servico, data, id_agendamento))
+    
+    def auditar_conflitos(self):
+        """Lista os agendamentos com horários sobrepostos em todo o histórico"""
+        pares = self.data_manager.auditar_sobreposicoes()
+        if not pares:
+            messagebox.showinfo("Conflitos de Horário", "Nenhum agendamento sobreposto!")
+            return
+        
+        linhas = [
+            f"• {a.get('data', '')}: {a.get('hora', '')} {a.get('cliente', '')} × "
+            f"{b.get('hora', '')} {b.get('cliente', '')}"
+            for a, b in pares[:15]
+        ]
+        if len(pares) > 15:
+            linhas.append(f"... e mais {len(pares) - 15}")
+        messagebox.showwarning("Conflitos de Horário",
+                               f"{len(pares)} sobreposição(ões) encontrada(s):\n\n" + "\n".join(linhas))
     
     def confirmar_agendamento(self):
         """Confirma o agendamento selecionado"""
@@ -127,34 +282,45 @@ class AgendamentosTab:
         self.alterar_status_agendamento("Em Andamento")
     
     def marcar_realizado(self):
-        """Marca o agendamento como realizado"""
-        selected = self.tree.selection()
+        """Marca os agendamentos selecionados como realizados"""
+        selected = self.lista.selecao()
         if not selected:
             messagebox.showwarning("Aviso", "Selecione um agendamento!")
             return
         
-        resposta = messagebox.askyesno("Marcar como Realizado", 
-                                      "Marcar agendamento como realizado?\n\n"
-                                      "Isso criará automaticamente um registro de corte.")
+        if len(selected) == 1:
+            pergunta = "Marcar agendamento como realizado?\n\nIsso criará automaticamente um registro de corte."
+        else:
+            pergunta = (f"Marcar {len(selected)} agendamentos como realizados?\n\n"
+                        "Isso criará automaticamente um registro de corte para cada um.")
+        resposta = messagebox.askyesno("Marcar como Realizado", pergunta)
         if not resposta:
             return
         
-        # Alterar status e criar corte
-        item = selected[0]
-        values = self.tree.item(item, 'values')
-        
-        # Criar corte automaticamente
+        # Criar cortes automaticamente
         from datetime import datetime
-        corte_data = {
-            "corte": values[3],  # serviço
-            "preco": 0.0,  # será preenchido depois
-            "data_hora": datetime.now().strftime("%d/%m/%Y %H:%M"),
-            "observacoes": f"Gerado automaticamente do agendamento de {values[1]} {values[2]}"
-        }
+        agora = datetime.now().strftime("%d/%m/%Y %H:%M")
+        agendamentos = [self.data_manager.obter("agendamentos", id_agendamento) for id_agendamento in selected]
+        cortes = [
+            {
+                "corte": agendamento.get("servico", ""),
+                "preco": 0.0,  # será preenchido depois
+                "data_hora": agora,
+                "observacoes": f"Gerado automaticamente do agendamento de "
+                               f"{agendamento.get('data', '')} {agendamento.get('hora', '')}"
+            }
+            for agendamento in agendamentos if agendamento
+        ]
         
-        self.data_manager.add_corte(corte_data)
-        self.alterar_status_agendamento("Realizado")
-        messagebox.showinfo("Sucesso", "Agendamento marcado como realizado e corte registrado!")
+        # Cortes e status em um único lote: gravados juntos ou não gravados
+        with self.lista.em_lote(), self.data_manager.batch():
+            self.data_manager.adicionar_varios("cortes", cortes)
+            self.aplicar_status(selected, "Realizado")
+        
+        if len(cortes) == 1:
+            messagebox.showinfo("Sucesso", "Agendamento marcado como realizado e corte registrado!")
+        else:
+            messagebox.showinfo("Sucesso", f"{len(cortes)} agendamentos marcados como realizados e cortes registrados!")
     
     def cancelar_agendamento(self):
         """Cancela o agendamento selecionado"""
@@ -162,68 +328,80 @@ class AgendamentosTab:
     
     def remover_agendamento(self):
         """Remove agendamentos selecionados"""
-        selected = self.tree.selection()
+        selected = self.lista.selecao()
         if not selected:
             messagebox.showwarning("Aviso", "Selecione um agendamento para remover!")
             return
         
+        if len(selected) == 1:
+            pergunta = "Tem certeza que deseja remover este agendamento?"
+        else:
+            pergunta = f"Tem certeza que deseja remover {len(selected)} agendamentos?"
         resposta = messagebox.askyesno("Confirmar Remoção", 
-                                      "Tem certeza que deseja remover este agendamento?\n\n"
-                                      "Esta ação não pode ser desfeita!")
+                                      f"{pergunta}\n\nEsta ação não pode ser desfeita!")
         if not resposta:
             return
         
-        item = selected[0]
-        values = self.tree.item(item, 'values')
-        
-        # Encontrar e remover agendamento
-        agendamentos = self.data_manager.get_agendamentos()
-        for i, agendamento in enumerate(agendamentos):
-            if (agendamento['cliente'] == values[0] and 
-                agendamento['data'] == values[1] and 
-                agendamento['hora'] == values[2]):
-                self.data_manager.delete_agendamento(i)
-                break
+        # Todos em um único lote: uma gravação e um redesenho da lista
+        with self.lista.em_lote(), self.data_manager.batch():
+            removidos = sum(
+                1 for id_agendamento in selected
+                if self.data_manager.remover("agendamentos", id_agendamento)
+            )
         
+        if not removidos:
+            self.agendamento_removido()
+        elif removidos == 1:
+            messagebox.showinfo("Sucesso", "Agendamento removido!")
+        else:
+            messagebox.showinfo("Sucesso", f"{removidos} agendamentos removidos!")
+    
+    def agendamento_removido(self):
+        """O agendamento selecionado foi excluído em outro lugar: avisa e recarrega"""
+        messagebox.showwarning("Aviso", "O agendamento selecionado não existe mais.")
         self.atualizar_lista()
-        messagebox.showinfo("Sucesso", "Agendamento removido!")
     
     def alterar_status_agendamento(self, novo_status):
-        """Altera status do agendamento selecionado"""
-        selected = self.tree.selection()
+        """Altera o status dos agendamentos selecionados (Ctrl/Shift + clique)"""
+        selected = self.lista.selecao()
         if not selected:
             messagebox.showwarning("Aviso", "Selecione um agendamento!")
             return
         
-        item = selected[0]
-        values = self.tree.item(item, 'values')
+        if len(selected) > 1:
+            resposta = messagebox.askyesno("Alterar Status",
+                                          f"Alterar o status de {len(selected)} agendamentos para: {novo_status}?")
+            if not resposta:
+                return
         
-        # Encontrar e alterar status
-        agendamentos = self.data_manager.get_agendamentos()
-        for i, agendamento in enumerate(agendamentos):
-            if (agendamento['cliente'] == values[0] and 
-                agendamento['data'] == values[1] and 
-                agendamento['hora'] == values[2]):
-                
-                agendamento['status'] = novo_status
-                self.data_manager.update_agendamento(i, agendamento)
-                break
+        alterados = self.aplicar_status(selected, novo_status)
         
-        self.atualizar_lista()
-        messagebox.showinfo("Sucesso", f"Status alterado para: {novo_status}")
+        if len(selected) == 1:
+            messagebox.showinfo("Sucesso", f"Status alterado para: {novo_status}")
+        else:
+            messagebox.showinfo("Sucesso", f"Status de {alterados} agendamentos alterado para: {novo_status}")
     
-    def callback_agendamento_editado(self, agendamento_data, index):
-        """Callback para agendamento editado"""
-        self.data_manager.update_agendamento(index, agendamento_data)
-        self.atualizar_lista()
+    def aplicar_status(self, ids_agendamentos, novo_status):
+        """
+        Muda o status de vários agendamentos com uma única gravação e um
+        único redesenho da lista.
         
-        if self.callback:
-            self.callback()
+        Returns:
+            int: Quantidade de agendamentos alterados
+        """
+        alteracoes = {}
+        for id_agendamento in ids_agendamentos:
+            agendamento = self.data_manager.obter("agendamentos", id_agendamento)
+            if agendamento:
+                alteracoes[id_agendamento] = dict(agendamento, status=novo_status)
+        
+        with self.lista.em_lote():
+            return self.data_manager.atualizar_varios("agendamentos", alteracoes)
+    
+    def callback_agendamento_editado(self, agendamento_data, id_agendamento):
+        """Callback para agendamento editado"""
+        self.data_manager.atualizar("agendamentos", id_agendamento, agendamento_data)
     
     def callback_agendamento_salvo(self, agendamento_data):
         """Callback executado quando agendamento é salvo"""
         self.data_manager.add_agendamento(agendamento_data)
-        self.atualizar_lista()
-        
-        if self.callback:
-            self.callback()
@@ -4,13 +4,15 @@ Aba de gerenciamento de clientes
 import tkinter as tk
 from tkinter import ttk, messagebox
 from gui.cadastros import CadastroClienteWindow
+from gui.busca_adiada import BuscaAdiada
+from gui.lista_virtual import ListaVirtual
 
 
 class ClientesTab:
     def __init__(self, notebook, data_manager):
         self.notebook = notebook
         self.data_manager = data_manager
-        self.callback = None
+        self.resultado_aproximado = False
         
         # Criar frame da aba
         self.frame = ttk.Frame(notebook)
@@ -18,10 +20,9 @@ class ClientesTab:
         
         self.criar_interface()
         self.atualizar_lista()
-    
-    def set_callback(self, callback):
-        """Define callback para quando dados são alterados"""
-        self.callback = callback
+        
+        # Mudanças feitas em qualquer aba chegam registro a registro
+        self.data_manager.inscrever(self.ao_mudar_dados, colecoes=("clientes",))
     
     def criar_interface(self):
         """Cria a interface da aba de clientes"""
@@ -48,7 +49,11 @@ class ClientesTab:
         tk.Label(search_frame, text="🔍 Buscar:", font=("Arial", 11), bg="#ecf0f1").pack(side="left")
         self.entry_busca = tk.Entry(search_frame, font=("Arial", 11), width=30)
         self.entry_busca.pack(side="left", padx=10)
-        self.entry_busca.bind("<KeyRelease>", self.filtrar_clientes)
+        
+        # Aviso de resultados aproximados (busca tolerante a erros de digitação)
+        self.label_aproximado = tk.Label(search_frame, text="", font=("Arial", 10, "italic"),
+                                         bg="#ecf0f1", fg="#7f8c8d")
+        self.label_aproximado.pack(side="left")
         
         # Treeview
         columns = ("Nome", "Telefone", "Email", "Data Nascimento")
@@ -65,9 +70,16 @@ class ClientesTab:
         self.tree.column("Email", width=200)
         self.tree.column("Data Nascimento", width=120)
         
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        # Scrollbar (controlada pela lista virtual: só as linhas visíveis existem)
+        scrollbar = ttk.Scrollbar(self.frame, orient="vertical")
+        self.lista = ListaVirtual(self.tree, scrollbar, self.valores_cliente)
+        
+        # Busca ao digitar: espera uma pausa, cancela buscas obsoletas e
+        # filtra em uma thread; a latência de cada consulta vai para as métricas
+        self.busca = BuscaAdiada(
+            self.entry_busca, self.filtrar_registros, self.exibir_resultado,
+            registrar=lambda *metricas: self.data_manager.registrar_busca("clientes", *metricas)
+        )
         
         self.tree.pack(side="left", fill="both", expand=True, padx=(15, 0), pady=(0, 15))
         scrollbar.pack(side="right", fill="y", padx=(0, 15), pady=(0, 15))
@@ -75,36 +87,63 @@ class ClientesTab:
         # Evento de duplo clique
         self.tree.bind("<Double-1>", lambda e: self.editar_cliente())
     
+    def valores_cliente(self, cliente):
+        """Valores das colunas do Treeview para um cliente"""
+        return (
+            cliente.get("nome", ""),
+            cliente.get("telefone", ""),
+            cliente.get("email", ""),
+            cliente.get("data_nascimento", "")
+        )
+    
     def atualizar_lista(self):
-        """Atualiza a lista de clientes"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        for cliente in self.data_manager.get_clientes():
-            self.tree.insert("", "end", values=(
-                cliente.get("nome", ""),
-                cliente.get("telefone", ""),
-                cliente.get("email", ""),
-                cliente.get("data_nascimento", "")
-            ))
+        """Atualiza a lista de clientes (respeitando a busca atual)"""
+        self.filtrar_clientes()
+    
+    def corresponde_busca(self, cliente):
+        """Indica se o cliente passa pela busca atual"""
+        return self.data_manager.corresponde("clientes", cliente, self.entry_busca.get())
+    
+    def ao_mudar_dados(self, evento):
+        """Aplica na lista só a linha do registro alterado"""
+        registro = evento.novo
+        if self.resultado_aproximado:
+            # Lista de sugestões: só atualiza quem já está nela
+            incluir = registro is not None and evento.id in self.lista.indice_posicoes()
+        else:
+            incluir = registro is not None and self.corresponde_busca(registro)
+        self.lista.aplicar(evento.op, evento.id, registro, incluir)
+    
+    def filtrar_registros(self, termo, cancelado=lambda: False):
+        """
+        Clientes que correspondem ao termo (também roda na thread de busca).
+
+        Usa o índice de prefixos do DataManager: nome e email por palavra,
+        sem acentos ("joao" encontra "João"), e telefone só pelos dígitos.
+        Sem resultado exato, devolve os clientes mais parecidos (erros de
+        digitação), do mais para o menos parecido.
+
+        Returns:
+            list: Clientes encontrados, ou None se a busca foi cancelada
+        """
+        if cancelado():
+            return None
+        clientes = self.data_manager.pesquisar("clientes", termo)
+        if clientes or not termo.strip() or cancelado():
+            return clientes
+        return [cliente for cliente, _ in self.data_manager.pesquisar_aproximado("clientes", termo)]
+    
+    def exibir_resultado(self, clientes):
+        """Mostra o resultado da busca, avisando quando são sugestões aproximadas"""
+        self.resultado_aproximado = bool(clientes) and not self.corresponde_busca(clientes[0])
+        self.label_aproximado.config(
+            text="≈ nenhum resultado exato; mostrando nomes parecidos" if self.resultado_aproximado else ""
+        )
+        self.lista.definir_registros(clientes)
     
     def filtrar_clientes(self, event=None):
-        """Filtra clientes conforme busca"""
-        termo = self.entry_busca.get().lower()
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        for cliente in self.data_manager.get_clientes():
-            if (termo in cliente.get("nome", "").lower() or 
-                termo in cliente.get("telefone", "").lower() or
-                termo in cliente.get("email", "").lower()):
-                
-                self.tree.insert("", "end", values=(
-                    cliente.get("nome", ""),
-                    cliente.get("telefone", ""),
-                    cliente.get("email", ""),
-                    cliente.get("data_nascimento", "")
-                ))
+        """Filtra clientes conforme busca (imediatamente, sem espera)"""
+        self.exibir_resultado(self.filtrar_registros(self.entry_busca.get()))
     
     def cadastrar_cliente(self):
         """Abre janela de cadastro de cliente"""
@@ -112,36 +151,35 @@ class ClientesTab:
     
     def editar_cliente(self):
         """Edita o cliente selecionado"""
-        selected = self.tree.selection()
+        selected = self.lista.selecao()
         if not selected:
             messagebox.showwarning("Aviso", "Selecione um cliente para editar!")
             return
         
-        # Obter dados do cliente selecionado
-        item = selected[0]
-        values = self.tree.item(item, 'values')
-        nome_cliente = values[0]
-        
-        # Encontrar cliente na lista
-        clientes = self.data_manager.get_clientes()
-        for i, cliente in enumerate(clientes):
-            if cliente['nome'] == nome_cliente:
-                CadastroClienteWindow(self.frame, 
-                                    lambda dados: self.callback_cliente_editado(dados, i),
-                                    cliente)
-                break
+        # O iid do item é o id do cliente
+        id_cliente = selected[0]
+        cliente = self.data_manager.obter("clientes", id_cliente)
+        if cliente is None:
+            self.cliente_removido()
+            return
+        CadastroClienteWindow(self.frame, 
+                            lambda dados: self.callback_cliente_editado(dados, id_cliente),
+                            cliente)
     
     def excluir_cliente(self):
         """Exclui o cliente selecionado"""
-        selected = self.tree.selection()
+        selected = self.lista.selecao()
         if not selected:
             messagebox.showwarning("Aviso", "Selecione um cliente para excluir!")
             return
         
-        # Obter dados do cliente selecionado
-        item = selected[0]
-        values = self.tree.item(item, 'values')
-        nome_cliente = values[0]
+        # Obter dados do cliente selecionado (a seleção guarda ids)
+        id_cliente = selected[0]
+        cliente = self.data_manager.obter("clientes", id_cliente)
+        if cliente is None:
+            self.cliente_removido()
+            return
+        nome_cliente = cliente.get("nome", "")
         
         # Confirmar exclusão
         resposta = messagebox.askyesno("Confirmar Exclusão", 
@@ -150,31 +188,20 @@ class ClientesTab:
         if not resposta:
             return
         
-        # Encontrar e remover cliente
-        clientes = self.data_manager.get_clientes()
-        for i, cliente in enumerate(clientes):
-            if cliente['nome'] == nome_cliente:
-                self.data_manager.delete_cliente(i)
-                break
+        self.data_manager.remover("clientes", id_cliente)
         
-        self.atualizar_lista()
         messagebox.showinfo("Sucesso", f"Cliente '{nome_cliente}' excluído com sucesso!")
         
-        if self.callback:
-            self.callback()
+    
+    def cliente_removido(self):
+        """O cliente selecionado foi excluído em outro lugar: avisa e recarrega"""
+        messagebox.showwarning("Aviso", "O cliente selecionado não existe mais.")
+        self.atualizar_lista()
     
     def callback_cliente_salvo(self, cliente_data):
         """Callback executado quando cliente é salvo"""
         self.data_manager.add_cliente(cliente_data)
-        self.atualizar_lista()
-        
-        if self.callback:
-            self.callback()
     
-    def callback_cliente_editado(self, cliente_data, index):
+    def callback_cliente_editado(self, cliente_data, id_cliente):
         """Callback executado quando cliente é editado"""
-        self.data_manager.update_cliente(index, cliente_data)
-        self.atualizar_lista()
-        
-        if self.callback:
-            self.callback()
+        self.data_manager.atualizar("clientes", id_cliente, cliente_data)
@@ -4,14 +4,17 @@ Aba de gerenciamento de cortes (sem campo cliente)
 import tkinter as tk
 from tkinter import ttk, messagebox
 from gui.cadastros import CadastroCorteWindow
-from utils.validations import Formatador
+from app.busca import CacheBusca
+from gui.busca_adiada import BuscaAdiada
+from gui.lista_virtual import ListaVirtual
 
 
 class CortesTab:
     def __init__(self, notebook, data_manager):
         self.notebook = notebook
         self.data_manager = data_manager
-        self.callback = None
+        # Resultados recentes da busca, válidos enquanto os cortes não mudarem
+        self.cache_busca = CacheBusca(capacidade=16)
         
         # Criar frame da aba
         self.frame = ttk.Frame(notebook)
@@ -19,10 +22,9 @@ class CortesTab:
         
         self.criar_interface()
         self.atualizar_lista()
-    
-    def set_callback(self, callback):
-        """Define callback para quando dados são alterados"""
-        self.callback = callback
+        
+        # Mudanças feitas em qualquer aba chegam registro a registro
+        self.data_manager.inscrever(self.ao_mudar_dados, colecoes=("cortes",))
     
     def criar_interface(self):
         """Cria a interface da aba de cortes"""
@@ -49,7 +51,6 @@ class CortesTab:
         tk.Label(search_frame, text="🔍 Buscar:", font=("Arial", 11), bg="#ecf0f1").pack(side="left")
         self.entry_busca = tk.Entry(search_frame, font=("Arial", 11), width=30)
         self.entry_busca.pack(side="left", padx=10)
-        self.entry_busca.bind("<KeyRelease>", self.filtrar_cortes)
         
         # Treeview
         columns = ("Tipo", "Preço", "Data/Hora")
@@ -64,53 +65,90 @@ class CortesTab:
         self.tree.column("Preço", width=120)
         self.tree.column("Data/Hora", width=150)
         
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        # Scrollbar (controlada pela lista virtual: só as linhas visíveis existem)
+        scrollbar = ttk.Scrollbar(self.frame, orient="vertical")
+        self.lista = ListaVirtual(self.tree, scrollbar, self.valores_corte)
+        
+        # Busca ao digitar: espera uma pausa, cancela buscas obsoletas e
+        # filtra em uma thread; a latência de cada consulta vai para as métricas
+        self.busca = BuscaAdiada(
+            self.entry_busca, self.filtrar_registros, self.lista.definir_registros,
+            registrar=lambda *metricas: self.data_manager.registrar_busca("cortes", *metricas)
+        )
         
         self.tree.pack(side="left", fill="both", expand=True, padx=(15, 0), pady=(0, 15))
         scrollbar.pack(side="right", fill="y", padx=(0, 15), pady=(0, 15))
     
+    def valores_corte(self, corte):
+        """Valores das colunas do Treeview para um corte"""
+        # Formatação do preço
+        preco = corte.get("preco", "0")
+        try:
+            if isinstance(preco, str):
+                preco_float = float(preco.replace(',', '.'))
+            else:
+                preco_float = float(preco)
+            preco_formatado = f"R$ {preco_float:.2f}".replace('.', ',')
+        except (ValueError, TypeError):
+            preco_formatado = "R$ 0,00"
+        
+        return (
+            corte.get("corte", ""),
+            preco_formatado,
+            corte.get("data_hora", "")
+        )
+    
     def atualizar_lista(self):
-        """Atualiza a lista de cortes"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        for corte in self.data_manager.get_cortes():
-            # Formatação do preço
-            preco = corte.get("preco", "0")
-            try:
-                if isinstance(preco, str):
-                    preco_float = float(preco.replace(',', '.'))
-                else:
-                    preco_float = float(preco)
-                preco_formatado = f"R$ {preco_float:.2f}".replace('.', ',')
-            except (ValueError, TypeError):
-                preco_formatado = "R$ 0,00"
-            
-            self.tree.insert("", "end", values=(
-                corte.get("corte", ""),
-                preco_formatado,
-                corte.get("data_hora", "")
-            ))
+        """Atualiza a lista de cortes (respeitando a busca atual)"""
+        self.filtrar_cortes()
+    
+    def corresponde_busca(self, corte, termo=None):
+        """Indica se o corte passa pelo termo (padrão: o da busca atual)"""
+        if termo is None:
+            termo = self.entry_busca.get().lower()
+        return termo in corte.get("corte", "").lower()
+    
+    def ao_mudar_dados(self, evento):
+        """Aplica na lista só a linha do registro alterado"""
+        registro = evento.novo
+        incluir = registro is not None and self.corresponde_busca(registro)
+        self.lista.aplicar(evento.op, evento.id, registro, incluir)
+    
+    def filtrar_registros(self, termo, cancelado=lambda: False):
+        """
+        Cortes que correspondem ao termo (também roda na thread de busca).
+
+        Se o termo estende uma busca recente ("cor" -> "cort"), filtra só o
+        resultado dela; uma busca repetida sai direto do cache. O custo de
+        digitar acompanha o número de resultados, não o total de cortes.
+
+        Returns:
+            list: Cortes encontrados, ou None se a busca foi cancelada
+        """
+        termo = termo.lower()
+        # A versão é lida antes dos dados: nunca guarda dados novos como antigos
+        versao = self.data_manager.versao("cortes")
+        if not termo:
+            return self.data_manager.get_cortes()
+        
+        cortes, exato = self.cache_busca.obter(versao, termo)
+        if exato:
+            return cortes
+        if cortes is None:
+            cortes = self.data_manager.get_cortes()
+        
+        resultado = []
+        for posicao, corte in enumerate(cortes):
+            if posicao % 1000 == 0 and cancelado():
+                return None
+            if self.corresponde_busca(corte, termo):
+                resultado.append(corte)
+        self.cache_busca.guardar(versao, termo, resultado)
+        return resultado
     
     def filtrar_cortes(self, event=None):
-        """Filtra cortes conforme busca"""
-        termo = self.entry_busca.get().lower()
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        for corte in self.data_manager.get_cortes():
-            if termo in corte.get("corte", "").lower():
-                
-                preco = corte.get("preco", 0)
-                preco_formatado = Formatador.formatar_preco(preco) if preco else "R$ 0,00"
-                
-                self.tree.insert("", "end", values=(
-                    corte.get("corte", ""),
-                    preco_formatado,
-                    corte.get("data_hora", "")
-                ))
+        """Filtra cortes conforme busca (imediatamente, sem espera)"""
+        self.lista.definir_registros(self.filtrar_registros(self.entry_busca.get()))
     
     def registrar_corte(self):
         """Abre janela de registro de corte"""
@@ -118,41 +156,36 @@ class CortesTab:
     
     def editar_corte(self):
         """Edita o corte selecionado"""
-        selected = self.tree.selection()
+        selected = self.lista.selecao()
         if not selected:
             messagebox.showwarning("Aviso", "Selecione um corte para editar!")
             return
         
-        # Obter dados do corte selecionado
-        item = selected[0]
-        values = self.tree.item(item, 'values')
-        tipo_corte = values[0] 
-        data_hora = values[2] if len(values) > 2 else ""
-        
-        # Encontrar o corte completo na lista
-        cortes = self.data_manager.get_cortes()
-        for i, corte in enumerate(cortes):
-            if (corte['corte'] == tipo_corte and 
-                corte.get('data_hora', '') == data_hora):
-                
-                def callback_with_index(dados, index=i):
-                    return self.callback_corte_editado(dados, index)
-                
-                CadastroCorteWindow(self.frame, callback_with_index, corte)
-                break
+        # O iid do item é o id do corte
+        id_corte = selected[0]
+        corte = self.data_manager.obter("cortes", id_corte)
+        if corte is None:
+            self.corte_removido()
+            return
+        CadastroCorteWindow(self.frame,
+                          lambda dados: self.callback_corte_editado(dados, id_corte),
+                          corte)
     
     def excluir_corte(self):
         """Exclui o corte selecionado"""
-        selected = self.tree.selection()
+        selected = self.lista.selecao()
         if not selected:
             messagebox.showwarning("Aviso", "Selecione um corte para excluir!")
             return
         
-        # Obter dados do corte selecionado
-        item = selected[0]
-        values = self.tree.item(item, 'values')
-        tipo_corte = values[0]
-        data_hora = values[2] if len(values) > 2 else ""
+        # Obter dados do corte selecionado (a seleção guarda ids)
+        id_corte = selected[0]
+        corte = self.data_manager.obter("cortes", id_corte)
+        if corte is None:
+            self.corte_removido()
+            return
+        tipo_corte = corte.get("corte", "")
+        data_hora = corte.get("data_hora", "")
         
         # Confirmar exclusão
         resposta = messagebox.askyesno("Confirmar Exclusão", 
@@ -163,29 +196,19 @@ class CortesTab:
         if not resposta:
             return
         
-        # Encontrar e remover corte
-        cortes = self.data_manager.get_cortes()
-        for i, corte in enumerate(cortes):
-            if (corte['corte'] == tipo_corte and 
-                corte.get('data_hora', '') == data_hora):
-                self.data_manager.delete_corte(i)
-                break
+        self.data_manager.remover("cortes", id_corte)
         
-        self.atualizar_lista()
         messagebox.showinfo("Sucesso", "Corte excluído com sucesso!")
     
+    def corte_removido(self):
+        """O corte selecionado foi excluído em outro lugar: avisa e recarrega"""
+        messagebox.showwarning("Aviso", "O corte selecionado não existe mais.")
+        self.atualizar_lista()
+    
     def callback_corte_salvo(self, corte_data):
         """Callback executado quando corte é salvo"""
         self.data_manager.add_corte(corte_data)
-        self.atualizar_lista()
-        
-        if self.callback:
-            self.callback()
     
-    def callback_corte_editado(self, corte_data, index):
+    def callback_corte_editado(self, corte_data, id_corte):
         """Callback executado quando corte é editado"""
-        self.data_manager.update_corte(index, corte_data)
-        self.atualizar_lista()
-        
-        if self.callback:
-            self.callback()
+        self.data_manager.atualizar("cortes", id_corte, corte_data)
@@ -27,7 +27,20 @@ Tecnologias utilizadas:
 - Layout responsivo com centralização
 """
 import tkinter as tk
-from tkinter import ttk
+from datetime import date, datetime, timedelta
+from tkinter import ttk, messagebox
+from app.relatorios import CacheRelatorios
+from utils.validations import Validador
+
+PERIODOS = ("Hoje", "Esta semana", "Este mês", "Personalizado")
+
+# Coleções que cada seção exibe; a seção só é redesenhada se uma delas mudou
+DEPENDENCIAS_SECOES = {
+    "resumo": ("clientes", "cortes", "agendamentos"),
+    "clientes": ("clientes",),
+    "cortes": ("cortes",),
+    "agendamentos": ("agendamentos",),
+}
 
 
 class RelatoriosTab:
@@ -46,6 +59,10 @@ class RelatoriosTab:
         frame (ttk.Frame): Frame principal da aba
         stats_frame (tk.Frame): Frame dos cards de estatísticas
         detalhes_frame (tk.Frame): Frame dos relatórios detalhados
+        agregados (AgregadosRelatorio): Totais mantidos a cada mudança nos dados
+        secoes (dict): Seção -> frame onde ela é desenhada
+        cache (CacheRelatorios): Versões com que cada seção foi desenhada
+        pendente (bool): Houve mudança nos dados desde o último cálculo
     """
     
     def __init__(self, notebook, data_manager):
@@ -63,9 +80,20 @@ class RelatoriosTab:
         self.frame = ttk.Frame(notebook)
         notebook.add(self.frame, text="📊 Relatórios")
         
+        # Rollups mantidos pelo DataManager; inscritos antes da aba, então
+        # já estão em dia quando ela é avisada da mudança
+        self.agregados = data_manager.agregados
+        self.cache = CacheRelatorios()
+        
         # Configurar interface e carregar dados iniciais
+        self.pendente = False
         self.criar_interface()
         self.atualizar_relatorios()
+        
+        # Mudanças em qualquer coleção deixam os relatórios desatualizados;
+        # o recálculo acontece uma vez, quando a aba está (ou fica) visível
+        self.data_manager.inscrever(self.ao_mudar_dados)
+        notebook.bind("<<NotebookTabChanged>>", self.ao_trocar_aba, add="+")
     
     def criar_interface(self):
         """
@@ -87,6 +115,8 @@ class RelatoriosTab:
         self.stats_frame = tk.Frame(self.frame, bg="#ecf0f1")
         self.stats_frame.pack(pady=20)
         
+        self.criar_periodo()
+        
         # Botão de atualizar
         tk.Button(self.frame, text="🔄 Atualizar Relatórios", command=self.atualizar_relatorios,
                  bg="#3498db", fg="white", font=("Arial", 12, "bold"), cursor="hand2").pack(pady=10)
@@ -109,12 +139,89 @@ class RelatoriosTab:
             lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
         )
         
+        # Um frame fixo por seção, para redesenhar uma sem mexer nas outras
+        self.secoes = {"resumo": self.stats_frame}
+        for secao in ("clientes", "cortes", "agendamentos"):
+            self.secoes[secao] = tk.Frame(self.detalhes_frame, bg="#ecf0f1")
+            self.secoes[secao].pack(fill="x")
+        
         canvas.create_window((0, 0), window=self.detalhes_frame, anchor="nw")
         canvas.configure(yscrollcommand=scrollbar.set)
         
         canvas.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
     
+    def criar_periodo(self):
+        """Cria o seletor de período da receita (hoje, semana, mês ou datas)"""
+        periodo_frame = tk.Frame(self.frame, bg="#ecf0f1")
+        periodo_frame.pack()
+        
+        tk.Label(periodo_frame, text="📆 Receita do período:", font=("Arial", 11), bg="#ecf0f1").pack(side="left")
+        self.combo_periodo = ttk.Combobox(periodo_frame, font=("Arial", 11), width=14, state="readonly",
+                                          values=PERIODOS)
+        self.combo_periodo.set(PERIODOS[0])
+        self.combo_periodo.pack(side="left", padx=(5, 10))
+        self.combo_periodo.bind("<<ComboboxSelected>>", lambda e: self.atualizar_periodo())
+        
+        tk.Label(periodo_frame, text="De:", font=("Arial", 11), bg="#ecf0f1").pack(side="left")
+        self.entry_periodo_inicio = tk.Entry(periodo_frame, font=("Arial", 11), width=11)
+        self.entry_periodo_inicio.pack(side="left", padx=(5, 10))
+        
+        tk.Label(periodo_frame, text="Até:", font=("Arial", 11), bg="#ecf0f1").pack(side="left")
+        self.entry_periodo_fim = tk.Entry(periodo_frame, font=("Arial", 11), width=11)
+        self.entry_periodo_fim.pack(side="left", padx=(5, 10))
+        
+        tk.Button(periodo_frame, text="Aplicar", command=self.aplicar_periodo,
+                 bg="#27ae60", fg="white", font=("Arial", 10, "bold"), cursor="hand2").pack(side="left")
+        
+        self.label_periodo = tk.Label(self.frame, text="", font=("Arial", 12, "bold"),
+                                      bg="#ecf0f1", fg="#2c3e50")
+        self.label_periodo.pack(pady=(5, 0))
+    
+    def intervalo_periodo(self):
+        """
+        Datas do período escolhido.
+        
+        Returns:
+            tuple: (início, fim) como date, ou None se as datas digitadas
+                forem inválidas
+        """
+        hoje = date.today()
+        periodo = self.combo_periodo.get()
+        if periodo == "Hoje":
+            return hoje, hoje
+        if periodo == "Esta semana":
+            return hoje - timedelta(days=hoje.weekday()), hoje
+        if periodo == "Este mês":
+            return hoje.replace(day=1), hoje
+        
+        datas = [self.entry_periodo_inicio.get().strip(), self.entry_periodo_fim.get().strip()]
+        if not all(Validador.validar_data(data) for data in datas):
+            return None
+        return tuple(datetime.strptime(data, "%d/%m/%Y").date() for data in datas)
+    
+    def aplicar_periodo(self):
+        """Botão Aplicar: datas digitadas valem como período personalizado"""
+        if self.entry_periodo_inicio.get().strip() or self.entry_periodo_fim.get().strip():
+            self.combo_periodo.set("Personalizado")
+        if self.combo_periodo.get() == "Personalizado" and self.intervalo_periodo() is None:
+            messagebox.showerror("Erro", "Informe as datas no formato DD/MM/AAAA!")
+            return
+        self.atualizar_periodo()
+    
+    def atualizar_periodo(self):
+        """Receita e cortes do período, consultados no índice por dia (O(log n))"""
+        intervalo = self.intervalo_periodo()
+        if intervalo is None:
+            self.label_periodo.config(text="Informe as datas (DD/MM/AAAA) e clique em Aplicar")
+            return
+        inicio, fim = intervalo
+        receita, quantidade = self.agregados.receita_periodo(inicio, fim)
+        self.label_periodo.config(
+            text=f"💰 R$ {receita:.2f} em {quantidade} cortes "
+                 f"({inicio.strftime('%d/%m/%Y')} a {fim.strftime('%d/%m/%Y')})"
+        )
+    
     def criar_card_estatistica(self, parent, icone, titulo, valor, cor):
         """Cria um card de estatística"""
         card = tk.Frame(parent, bg=cor, relief="raised", bd=2)
@@ -129,48 +236,62 @@ class RelatoriosTab:
         # Título
         tk.Label(card, text=titulo, font=("Arial", 10), bg=cor, fg="white").pack()
     
+    def ao_mudar_dados(self, evento):
+        """Marca os relatórios como desatualizados (várias mudanças, um recálculo)"""
+        if self.pendente:
+            return
+        self.pendente = True
+        if self.visivel():
+            self.frame.after_idle(self.atualizar_se_pendente)
+    
+    def visivel(self):
+        return self.notebook.select() == str(self.frame)
+    
+    def ao_trocar_aba(self, event=None):
+        if self.visivel():
+            self.atualizar_se_pendente()
+    
+    def atualizar_se_pendente(self):
+        if self.pendente:
+            self.atualizar_relatorios()
+    
     def atualizar_relatorios(self):
-        """Atualiza os relatórios"""
-        # Limpar cards existentes
-        for widget in self.stats_frame.winfo_children():
-            widget.destroy()
+        """Atualiza os relatórios, redesenhando só as seções cujos dados mudaram"""
+        self.pendente = False
         
-        # Limpar detalhes existentes
-        for widget in self.detalhes_frame.winfo_children():
-            widget.destroy()
+        # Totais e receita já agregados (nenhuma coleção é percorrida aqui)
+        totais = self.agregados.totais
+        construtores = {
+            "resumo": self.criar_cards_resumo,
+            "clientes": lambda: self.criar_detalhes_clientes(totais["clientes"]),
+            "cortes": lambda: self.criar_detalhes_cortes(totais["cortes"], self.agregados.receita_total()),
+            "agendamentos": lambda: self.criar_detalhes_agendamentos(totais["agendamentos"]),
+        }
+        for secao, construir in construtores.items():
+            chave = tuple(self.data_manager.versao(colecao) for colecao in DEPENDENCIAS_SECOES[secao])
+            self.cache.obter(secao, chave, lambda: self.redesenhar_secao(secao, construir))
         
-        # Dados
-        clientes = self.data_manager.get_clientes()
-        cortes = self.data_manager.get_cortes()
-        agendamentos = self.data_manager.get_agendamentos()
-        
-        # Calcular receita total
-        receita_total = 0
-        precos = []
-        for corte in cortes:
-            try:
-                preco_str = str(corte.get('preco', '0')).replace(',', '.')
-                preco = float(preco_str)
-                receita_total += preco
-                if preco > 0:
-                    precos.append(preco)
-            except (ValueError, AttributeError):
-                continue
-        
-        # Criar cards de estatísticas
-        self.criar_card_estatistica(self.stats_frame, "👥", "Total de Clientes", len(clientes), "#3498db")
-        self.criar_card_estatistica(self.stats_frame, "✂️", "Cortes Realizados", len(cortes), "#27ae60")
-        self.criar_card_estatistica(self.stats_frame, "📅", "Agendamentos", len(agendamentos), "#f39c12")
+        # O período depende da data de hoje; a consulta é O(log n)
+        self.atualizar_periodo()
+    
+    def redesenhar_secao(self, secao, construir):
+        """Limpa o frame da seção e a desenha de novo"""
+        for widget in self.secoes[secao].winfo_children():
+            widget.destroy()
+        construir()
+    
+    def criar_cards_resumo(self):
+        """Cria os cards de estatísticas principais"""
+        totais = self.agregados.totais
+        receita_total = self.agregados.receita_total()
+        self.criar_card_estatistica(self.stats_frame, "👥", "Total de Clientes", totais["clientes"], "#3498db")
+        self.criar_card_estatistica(self.stats_frame, "✂️", "Cortes Realizados", totais["cortes"], "#27ae60")
+        self.criar_card_estatistica(self.stats_frame, "📅", "Agendamentos", totais["agendamentos"], "#f39c12")
         self.criar_card_estatistica(self.stats_frame, "💰", f"Receita Total", f"R$ {receita_total:.2f}", "#e74c3c")
-        
-        # Criar seção de detalhes
-        self.criar_detalhes_clientes(clientes)
-        self.criar_detalhes_cortes(cortes, precos, receita_total)
-        self.criar_detalhes_agendamentos(agendamentos)
     
-    def criar_detalhes_clientes(self, clientes):
+    def criar_detalhes_clientes(self, total_clientes):
         """Cria detalhes dos clientes"""
-        frame = tk.LabelFrame(self.detalhes_frame, text="👥 Detalhes dos Clientes", 
+        frame = tk.LabelFrame(self.secoes["clientes"], text="👥 Detalhes dos Clientes", 
                              font=("Arial", 12, "bold"), bg="#ecf0f1", relief="solid", bd=1)
         frame.pack(fill="x", padx=20, pady=10)
         
@@ -178,12 +299,12 @@ class RelatoriosTab:
         container = tk.Frame(frame, bg="#ecf0f1")
         container.pack(expand=True, fill="x", padx=20, pady=15)
         
-        if clientes:
+        if total_clientes:
             # Card principal com largura centralizada
             main_card = tk.Frame(container, bg="#3498db", relief="flat", bd=2)
             main_card.pack(anchor="center", pady=(0, 15))
             
-            tk.Label(main_card, text=f"📊 {len(clientes)} CLIENTES CADASTRADOS", 
+            tk.Label(main_card, text=f"📊 {total_clientes} CLIENTES CADASTRADOS", 
                     font=("Arial", 12, "bold"), bg="#3498db", fg="white").pack(padx=30, pady=10)
             
             # Seção de clientes recentes
@@ -193,8 +314,9 @@ class RelatoriosTab:
             tk.Label(recent_card, text="🆕 Clientes Mais Recentes", 
                     font=("Arial", 11, "bold"), bg="white", fg="#2c3e50").pack(pady=(10, 5))
             
-            # Lista de clientes
-            for i, cliente in enumerate(clientes[-5:], 1):
+            # Lista de clientes (os 5 últimos cadastrados, em ordem de cadastro)
+            recentes = self.data_manager.page_clientes(0, 5, decrescente=True)
+            for i, cliente in enumerate(reversed(recentes), 1):
                 cliente_info = f"{i}. {cliente.get('nome', 'N/A')} - {cliente.get('telefone', 'N/A')}"
                 tk.Label(recent_card, text=cliente_info, font=("Arial", 10), 
                         bg="white", fg="#34495e").pack(pady=2)
@@ -208,9 +330,9 @@ class RelatoriosTab:
             tk.Label(empty_card, text="⚠️ NENHUM CLIENTE CADASTRADO", 
                     font=("Arial", 12, "bold"), bg="#e74c3c", fg="white").pack(padx=30, pady=15)
     
-    def criar_detalhes_cortes(self, cortes, precos, receita_total):
+    def criar_detalhes_cortes(self, total_cortes, receita_total):
         """Cria detalhes dos cortes"""
-        frame = tk.LabelFrame(self.detalhes_frame, text="✂️ Detalhes dos Cortes", 
+        frame = tk.LabelFrame(self.secoes["cortes"], text="✂️ Detalhes dos Cortes", 
                              font=("Arial", 12, "bold"), bg="#ecf0f1", relief="solid", bd=1)
         frame.pack(fill="x", padx=20, pady=10)
         
@@ -218,19 +340,19 @@ class RelatoriosTab:
         container = tk.Frame(frame, bg="#ecf0f1")
         container.pack(expand=True, fill="x", padx=20, pady=15)
         
-        if cortes:
+        if total_cortes:
             # Card principal de receita
             main_card = tk.Frame(container, bg="#27ae60", relief="flat", bd=2)
             main_card.pack(anchor="center", pady=(0, 15))
             
-            tk.Label(main_card, text=f"💰 R$ {receita_total:.2f} EM {len(cortes)} CORTES", 
+            tk.Label(main_card, text=f"💰 R$ {receita_total:.2f} EM {total_cortes} CORTES", 
                     font=("Arial", 12, "bold"), bg="#27ae60", fg="white").pack(padx=30, pady=10)
             
             # Estatísticas financeiras
-            if precos:
-                media_corte = sum(precos) / len(precos)
-                maior_valor = max(precos)
-                menor_valor = min(precos)
+            media_corte = self.agregados.media_preco()
+            if media_corte is not None:
+                maior_valor = self.agregados.maior_preco()
+                menor_valor = self.agregados.menor_preco()
                 
                 # Frame para as 3 estatísticas
                 stats_container = tk.Frame(container, bg="#ecf0f1")
@@ -262,18 +384,32 @@ class RelatoriosTab:
             tk.Label(tipos_card, text="🏆 Tipos de Corte Mais Populares", 
                     font=("Arial", 11, "bold"), bg="white", fg="#2c3e50").pack(pady=(10, 5))
             
-            # Contar e mostrar tipos
-            tipos_corte = {}
-            for corte in cortes:
-                tipo = corte.get('corte', 'Não especificado')
-                tipos_corte[tipo] = tipos_corte.get(tipo, 0) + 1
-            
-            for i, (tipo, count) in enumerate(sorted(tipos_corte.items(), key=lambda x: x[1], reverse=True)[:3], 1):
+            # Mostrar os tipos mais frequentes (contagens já agregadas)
+            for i, (tipo, count) in enumerate(self.agregados.tipos_populares(3), 1):
                 medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉"
                 tk.Label(tipos_card, text=f"{medal} {tipo}: {count} vezes", 
                         font=("Arial", 10), bg="white", fg="#34495e").pack(pady=2)
             
             tk.Frame(tipos_card, bg="white", height=10).pack()  # Espaçamento
+            
+            # Receita por tipo e por mês (já agregadas)
+            receita_card = tk.Frame(container, bg="white", relief="solid", bd=1)
+            receita_card.pack(anchor="center", fill="x", pady=10)
+            
+            tk.Label(receita_card, text="💵 Tipos que Mais Faturam", 
+                    font=("Arial", 11, "bold"), bg="white", fg="#2c3e50").pack(pady=(10, 5))
+            for tipo, receita in self.agregados.tipos_que_mais_faturam(3):
+                tk.Label(receita_card, text=f"{tipo}: R$ {receita:.2f}", 
+                        font=("Arial", 10), bg="white", fg="#34495e").pack(pady=2)
+            
+            tk.Label(receita_card, text="📆 Receita dos Últimos Meses", 
+                    font=("Arial", 11, "bold"), bg="white", fg="#2c3e50").pack(pady=(10, 5))
+            for mes, receita in self.agregados.receita_ultimos_meses(6):
+                ano, numero = mes.split("-")
+                tk.Label(receita_card, text=f"{numero}/{ano}: R$ {receita:.2f}", 
+                        font=("Arial", 10), bg="white", fg="#34495e").pack(pady=2)
+            
+            tk.Frame(receita_card, bg="white", height=10).pack()  # Espaçamento
         else:
             # Card de vazio
             empty_card = tk.Frame(container, bg="#e74c3c", relief="flat", bd=2)
@@ -282,9 +418,9 @@ class RelatoriosTab:
             tk.Label(empty_card, text="⚠️ NENHUM CORTE REGISTRADO", 
                     font=("Arial", 12, "bold"), bg="#e74c3c", fg="white").pack(padx=30, pady=15)
     
-    def criar_detalhes_agendamentos(self, agendamentos):
+    def criar_detalhes_agendamentos(self, total_agendamentos):
         """Cria detalhes dos agendamentos"""
-        frame = tk.LabelFrame(self.detalhes_frame, text="📅 Detalhes dos Agendamentos", 
+        frame = tk.LabelFrame(self.secoes["agendamentos"], text="📅 Detalhes dos Agendamentos", 
                              font=("Arial", 12, "bold"), bg="#ecf0f1", relief="solid", bd=1)
         frame.pack(fill="x", padx=20, pady=10)
         
@@ -292,19 +428,16 @@ class RelatoriosTab:
         container = tk.Frame(frame, bg="#ecf0f1")
         container.pack(expand=True, fill="x", padx=20, pady=15)
         
-        if agendamentos:
+        if total_agendamentos:
             # Card principal
             main_card = tk.Frame(container, bg="#f39c12", relief="flat", bd=2)
             main_card.pack(anchor="center", pady=(0, 15))
             
-            tk.Label(main_card, text=f"📋 {len(agendamentos)} AGENDAMENTOS REGISTRADOS", 
+            tk.Label(main_card, text=f"📋 {total_agendamentos} AGENDAMENTOS REGISTRADOS", 
                     font=("Arial", 12, "bold"), bg="#f39c12", fg="white").pack(padx=30, pady=10)
             
-            # Status dos agendamentos
-            status_count = {}
-            for agendamento in agendamentos:
-                status = agendamento.get('status', 'Não especificado')
-                status_count[status] = status_count.get(status, 0) + 1
+            # Status dos agendamentos (contagens já agregadas)
+            status_count = self.agregados.por_status
             
             # Cards de status
             if status_count:
@@ -335,7 +468,7 @@ class RelatoriosTab:
                     font=("Arial", 11, "bold"), bg="white", fg="#2c3e50").pack(pady=(10, 5))
             
             # Lista de agendamentos
-            for i, agendamento in enumerate(agendamentos[:5], 1):
+            for i, agendamento in enumerate(self.data_manager.page_agendamentos(0, 5), 1):
                 cliente = agendamento.get('cliente', 'N/A')
                 data = agendamento.get('data', 'N/A')
                 hora = agendamento.get('hora', 'N/A')
@@ -0,0 +1,245 @@
+"""
+Módulo de gravação assíncrona (write-behind) do DataManager
+"""
+import atexit
+import threading
+import time
+
+
+class ArmazenamentoWriteBehind:
+    """
+    Envolve um backend de armazenamento e adia as gravações para uma thread.
+
+    Cada mutação apenas entra na fila da sua coleção (marcando-a como
+    "suja"). A thread de gravação descarrega as filas quando não há novas
+    mutações por `atraso` segundos ou quando a fila atinge `limite`
+    registros, gravando cada coleção em uma única escrita (uma append no
+    journal ou uma transação no SQLite). flush() força a gravação imediata
+    e é chamado no logout, no fechamento da janela e na saída do processo.
+
+    O `lock` é compartilhado com o DataManager: a mutação da lista em
+    memória e a entrada na fila acontecem sob o mesmo lock, de modo que um
+    snapshot de compactação nunca inclui uma mutação que ainda está na fila.
+
+    Ordem dos locks: `lock_gravacao` e depois `lock`. Quem está com o `lock`
+    (ex.: o DataManager dentro de um batch()) nunca espera `lock_gravacao`;
+    por isso compactar() só agenda o snapshot, em vez de gravar na hora.
+
+    Attributes:
+        backend: Backend real (ArmazenamentoJson ou ArmazenamentoSQLite)
+        atraso (float): Período de silêncio, em segundos, antes de gravar
+        limite (int): Registros pendentes que forçam a gravação
+        lock (threading.RLock): Lock compartilhado com o DataManager
+        pendentes (dict): Fila de mutações (op, id, registro) por coleção
+        compactacoes (set): Coleções com snapshot agendado para o próximo flush
+        ao_gravar (callable): Chamado após cada flush que gravou algo
+            (fora dos locks); None = nada
+    """
+
+    def __init__(self, backend, lock, atraso=0.5, limite=100):
+        self.backend = backend
+        self.atraso = atraso
+        self.limite = limite
+        self.lock = lock
+        self.condicao = threading.Condition(lock)
+        self.lock_gravacao = threading.Lock()
+
+        self.pendentes = {}
+        self.compactacoes = set()
+        self.dados = {}
+        self.ultima_mutacao = 0.0
+        self.primeira_pendente = None
+        self.encerrado = False
+
+        # Métricas para ajuste de atraso/limite
+        self.flushes = 0
+        self.registros_gravados = 0
+        self.latencia_total_ms = 0.0
+        self.ultima_latencia_ms = 0.0
+        self.ultimo_atraso_ms = 0.0
+        self.ultimo_erro = None
+        self.ao_gravar = None
+
+        self.thread = threading.Thread(target=self.executar, name="write-behind", daemon=True)
+        self.thread.start()
+        atexit.register(self.flush)
+
+    # Interface de backend
+    def carregar(self, colecao):
+        self.dados[colecao] = self.backend.carregar(colecao)
+        return self.dados[colecao]
+
+    def registrar(self, colecao, dados, op, id_registro=None, registro=None):
+        """Enfileira a mutação; a gravação acontece na thread de fundo"""
+        # Cópia rasa: as abas às vezes alteram o dicionário após salvar
+        if registro is not None:
+            registro = dict(registro)
+        with self.condicao:
+            self.dados[colecao] = dados
+            self.pendentes.setdefault(colecao, []).append((op, id_registro, registro))
+            agora = time.monotonic()
+            self.ultima_mutacao = agora
+            if self.primeira_pendente is None:
+                self.primeira_pendente = agora
+            self.condicao.notify()
+
+    def registrar_lote(self, colecao, operacoes):
+        """Enfileira várias mutações de uma vez (uma só notificação à thread)"""
+        operacoes = [
+            (op, id_registro, dict(registro) if registro is not None else None)
+            for op, id_registro, registro in operacoes
+        ]
+        with self.condicao:
+            self.pendentes.setdefault(colecao, []).extend(operacoes)
+            agora = time.monotonic()
+            self.ultima_mutacao = agora
+            if self.primeira_pendente is None:
+                self.primeira_pendente = agora
+            self.condicao.notify()
+
+    def precisa_compactar(self, colecao, adicionais=0):
+        return self.backend.precisa_compactar(colecao, adicionais)
+
+    def compactar(self, colecao, dados):
+        """
+        Agenda um snapshot completo da coleção para o próximo flush.
+
+        As mutações da coleção ainda na fila são dispensadas: o snapshot,
+        tirado sob o lock no flush, já as inclui.
+        """
+        with self.condicao:
+            self.dados[colecao] = dados
+            self.pendentes[colecao] = []
+            self.compactacoes.add(colecao)
+            agora = time.monotonic()
+            self.ultima_mutacao = agora
+            if self.primeira_pendente is None:
+                self.primeira_pendente = agora
+            self.condicao.notify()
+
+    def impressao(self):
+        return self.backend.impressao()
+
+    def fechar(self):
+        """Grava as pendências, encerra a thread e fecha o backend"""
+        self.flush()
+        with self.condicao:
+            self.encerrado = True
+            self.condicao.notify()
+        self.thread.join(timeout=5)
+        atexit.unregister(self.flush)
+        self.backend.fechar()
+
+    # Gravação
+    def total_pendentes(self):
+        return sum(len(operacoes) for operacoes in self.pendentes.values()) + len(self.compactacoes)
+
+    def executar(self):
+        """Laço da thread de fundo: espera o período de silêncio e grava"""
+        while True:
+            with self.condicao:
+                while not self.encerrado:
+                    total = self.total_pendentes()
+                    if not total:
+                        self.condicao.wait()
+                        continue
+                    restante = self.atraso - (time.monotonic() - self.ultima_mutacao)
+                    if restante <= 0 or total >= self.limite:
+                        break
+                    self.condicao.wait(restante)
+                if self.encerrado:
+                    return
+            self.flush()
+
+    def flush(self):
+        """
+        Grava imediatamente todas as mutações pendentes.
+
+        Returns:
+            int: Quantidade de mutações gravadas
+        """
+        gravados = self.gravar_pendentes()
+        if gravados is None:
+            return 0
+        if self.ao_gravar:
+            self.ao_gravar()
+        return gravados
+
+    def gravar_pendentes(self):
+        """Grava a fila; None se não havia nada (nem snapshot) a gravar"""
+        with self.lock_gravacao:
+            with self.lock:
+                compactacoes, self.compactacoes = self.compactacoes, set()
+                lotes = {
+                    colecao: ops for colecao, ops in self.pendentes.items()
+                    if ops or colecao in compactacoes
+                }
+                if not lotes:
+                    return None
+                self.pendentes = {}
+                atraso = time.monotonic() - self.primeira_pendente
+                self.primeira_pendente = None
+
+                # Snapshots são copiados junto com o esvaziamento da fila,
+                # então refletem exatamente as mutações deste lote. Os
+                # registros são planos e trocados inteiros na edição, então
+                # uma cópia rasa de cada um basta; a serialização fica fora
+                # do lock
+                snapshots = {}
+                for colecao, operacoes in lotes.items():
+                    if colecao in compactacoes or self.backend.precisa_compactar(colecao, len(operacoes)):
+                        snapshots[colecao] = {
+                            id_registro: dict(registro)
+                            for id_registro, registro in self.dados[colecao].items()
+                        }
+
+            inicio = time.perf_counter()
+            gravados = 0
+            for colecao, operacoes in lotes.items():
+                try:
+                    if colecao in snapshots:
+                        self.backend.compactar(colecao, snapshots[colecao])
+                    else:
+                        self.backend.registrar_lote(colecao, operacoes)
+                    gravados += len(operacoes)
+                except Exception as e:
+                    # Devolve o lote à fila para nova tentativa
+                    print(f"✗ Erro ao gravar {colecao}: {e}")
+                    self.ultimo_erro = f"{colecao}: {e}"
+                    with self.lock:
+                        if colecao in snapshots:
+                            self.compactacoes.add(colecao)
+                        self.pendentes[colecao] = operacoes + self.pendentes.get(colecao, [])
+                        self.ultima_mutacao = time.monotonic()
+                        if self.primeira_pendente is None:
+                            self.primeira_pendente = self.ultima_mutacao
+
+            latencia_ms = (time.perf_counter() - inicio) * 1000
+            self.flushes += 1
+            self.registros_gravados += gravados
+            self.latencia_total_ms += latencia_ms
+            self.ultima_latencia_ms = latencia_ms
+            self.ultimo_atraso_ms = atraso * 1000
+            return gravados
+
+    def estatisticas(self):
+        """
+        Métricas da gravação assíncrona.
+
+        Returns:
+            dict: pendentes, flushes, registros_gravados, ultima_latencia_ms
+                (duração da última gravação), latencia_media_ms,
+                ultimo_atraso_ms (idade da mutação mais antiga do último
+                lote), ultimo_erro
+        """
+        with self.lock:
+            pendentes = self.total_pendentes()
+        return {
+            "pendentes": pendentes,
+            "flushes": self.flushes,
+            "registros_gravados": self.registros_gravados,
+            "ultima_latencia_ms": self.ultima_latencia_ms,
+            "latencia_media_ms": self.latencia_total_ms / self.flushes if self.flushes else 0.0,
+            "ultimo_atraso_ms": self.ultimo_atraso_ms,
+            "ultimo_erro": self.ultimo_erro,
+        }
@@ -0,0 +1,105 @@
+"""
+Busca ao digitar com espera (debounce), cancelamento e execução em thread
+"""
+import queue
+import threading
+import time
+
+
+class BuscaAdiada:
+    """
+    Liga um campo de busca a uma função de filtro sem travar a digitação.
+
+    Cada tecla reinicia a espera de `atraso_ms`; só quando o usuário para de
+    digitar a busca começa, em uma thread. Uma tecla nova incrementa a
+    geração e com isso cancela a busca em andamento: a função de filtro
+    recebe `cancelado()` para interromper o laço, e resultados de gerações
+    antigas são descartados. O resultado volta à thread do Tk por uma fila
+    consultada com `after`, pois widgets não podem ser tocados pela thread.
+
+    Attributes:
+        entry (tk.Entry): Campo de busca
+        buscar (callable): (termo, cancelado) -> resultado, ou None se cancelado
+        exibir (callable): Recebe o resultado na thread do Tk
+        atraso_ms (int): Tempo sem teclas antes de buscar
+        registrar (callable, optional): (latencia_ms, total, cancelada) para métricas
+        coletar (callable, optional): Lê a consulta na thread do Tk (padrão:
+            o texto do campo); útil quando há outros filtros além do texto
+        geracao (int): Número da busca mais recente
+    """
+
+    INTERVALO_VERIFICACAO_MS = 15
+
+    def __init__(self, entry, buscar, exibir, atraso_ms=250, registrar=None, coletar=None):
+        self.entry = entry
+        self.buscar = buscar
+        self.exibir = exibir
+        self.atraso_ms = atraso_ms
+        self.registrar = registrar
+        self.coletar = coletar or entry.get
+
+        self.geracao = 0
+        self.agendada = None
+        self.em_andamento = 0
+        self.resultados = queue.Queue()
+
+        entry.bind("<KeyRelease>", self.agendar)
+
+    def agendar(self, event=None):
+        """Reinicia a espera; a busca anterior, se houver, fica obsoleta"""
+        if self.agendada is not None:
+            self.entry.after_cancel(self.agendada)
+        self.geracao += 1
+        self.agendada = self.entry.after(self.atraso_ms, self.iniciar)
+
+    def buscar_agora(self, event=None):
+        """Busca sem esperar (ex.: clique em um filtro), cancelando a anterior"""
+        if self.agendada is not None:
+            self.entry.after_cancel(self.agendada)
+        self.geracao += 1
+        self.iniciar()
+
+    def iniciar(self):
+        """Dispara a busca do termo atual em uma thread"""
+        self.agendada = None
+        geracao = self.geracao
+        termo = self.coletar()
+        inicio = time.perf_counter()
+
+        self.em_andamento += 1
+        if self.em_andamento == 1:
+            self.entry.after(self.INTERVALO_VERIFICACAO_MS, self.verificar)
+        threading.Thread(
+            target=self.executar, args=(geracao, termo, inicio), name="busca", daemon=True
+        ).start()
+
+    def executar(self, geracao, termo, inicio):
+        """Corpo da thread: roda o filtro e devolve o resultado pela fila"""
+        def cancelado():
+            return geracao != self.geracao
+
+        try:
+            resultado = self.buscar(termo, cancelado)
+        except Exception as e:
+            print(f"✗ Erro na busca por '{termo}': {e}")
+            resultado = None
+        self.resultados.put((geracao, resultado, inicio))
+
+    def verificar(self):
+        """Recebe resultados prontos na thread do Tk"""
+        while True:
+            try:
+                geracao, resultado, inicio = self.resultados.get_nowait()
+            except queue.Empty:
+                break
+            self.em_andamento -= 1
+            cancelada = geracao != self.geracao or resultado is None
+            if not cancelada:
+                self.exibir(resultado)
+            if self.registrar:
+                latencia_ms = (time.perf_counter() - inicio) * 1000
+                total = 0 if cancelada else len(resultado)
+                self.registrar(latencia_ms, total, cancelada)
+
+        if self.em_andamento:
+            self.entry.after(self.INTERVALO_VERIFICACAO_MS, self.verificar)
@@ -323,11 +323,38 @@ class CadastroCorteWindow:
 
 
 class CadastroAgendamentoWindow:
-    def __init__(self, parent, clientes, callback_sucesso=None, agendamento_editando=None):
+    ATRASO_COMPLETAR_MS = 150
+    
+    def __init__(self, parent, clientes, callback_sucesso=None, agendamento_editando=None,
+                 sugerir_clientes=None, cliente_existe=None, verificar_conflitos=None,
+                 sugerir_horarios=None):
+        """
+        Args:
+            clientes (list): Clientes oferecidos ao abrir a lista (com
+                sugerir_clientes basta uma primeira página, não todos)
+            sugerir_clientes (callable, optional): texto -> nomes de clientes
+                parecidos, do mais para o menos parecido. Quando informado, o
+                campo cliente aceita digitação, completa o nome enquanto se
+                digita e a lista mostra as sugestões.
+            cliente_existe (callable, optional): nome -> bool, usado para
+                validar o nome digitado sem carregar todos os clientes
+            verificar_conflitos (callable, optional): agendamento -> lista de
+                agendamentos com horário sobreposto; havendo algum, pede
+                confirmação antes de salvar
+            sugerir_horarios (callable, optional): (serviço, data DD/MM/AAAA
+                ou None) -> lista de (data, hora) livres; quando informado, o
+                formulário oferece os próximos horários livres
+        """
         self.parent = parent
         self.clientes = clientes
         self.callback_sucesso = callback_sucesso
         self.agendamento_editando = agendamento_editando
+        self.sugerir_clientes = sugerir_clientes
+        self.cliente_existe = cliente_existe
+        self.verificar_conflitos = verificar_conflitos
+        self.sugerir_horarios = sugerir_horarios
+        self.horarios_livres = []
+        self.completar_agendado = None
         
         if not clientes:
             messagebox.showwarning("Aviso", "Cadastre clientes primeiro!")
@@ -335,7 +362,7 @@ class CadastroAgendamentoWindow:
         
         self.janela = tk.Toplevel(parent)
         self.janela.title("Novo Agendamento" if not agendamento_editando else "Editar Agendamento")
-        self.janela.geometry("500x650")  # Aumentei de 600 para 650
+        self.janela.geometry("500x710" if sugerir_horarios else "500x650")
         self.janela.configure(bg="#ecf0f1")
         self.janela.resizable(True, True)  # Permitir redimensionar
         
@@ -369,8 +396,15 @@ class CadastroAgendamentoWindow:
         tk.Label(main_frame, text="Cliente*:", font=("Arial", 11, "bold"), 
                 bg="#ecf0f1", fg="#2c3e50").pack(anchor="w", pady=(0,3))
         
-        self.combo_cliente = ttk.Combobox(main_frame, font=("Arial", 11), width=47, state="readonly")
-        self.combo_cliente['values'] = [cliente['nome'] for cliente in self.clientes]
+        self.nomes_clientes = [cliente['nome'] for cliente in self.clientes]
+        if self.sugerir_clientes:
+            # Digitável: ao abrir a lista, mostra os clientes parecidos com o texto
+            self.combo_cliente = ttk.Combobox(main_frame, font=("Arial", 11), width=47,
+                                              postcommand=self.atualizar_sugestoes)
+            self.combo_cliente.bind("<KeyRelease>", self.ao_digitar_cliente)
+        else:
+            self.combo_cliente = ttk.Combobox(main_frame, font=("Arial", 11), width=47, state="readonly")
+        self.combo_cliente['values'] = self.nomes_clientes
         self.combo_cliente.pack(pady=(0,10))
         
         # Data
@@ -387,6 +421,16 @@ class CadastroAgendamentoWindow:
         self.entry_hora = tk.Entry(main_frame, font=("Arial", 11), width=50, relief="solid", bd=1)
         self.entry_hora.pack(pady=(0,10))
         
+        # Próximos horários livres (para o serviço escolhido, a partir da data)
+        if self.sugerir_horarios:
+            tk.Label(main_frame, text="Horários livres:", font=("Arial", 11, "bold"), 
+                    bg="#ecf0f1", fg="#34495e").pack(anchor="w", pady=(0,3))
+            
+            self.combo_livres = ttk.Combobox(main_frame, font=("Arial", 11), width=47, state="readonly",
+                                             postcommand=self.atualizar_horarios_livres)
+            self.combo_livres.pack(pady=(0,10))
+            self.combo_livres.bind("<<ComboboxSelected>>", self.escolher_horario_livre)
+        
         # Serviço
         tk.Label(main_frame, text="Serviço:", font=("Arial", 11, "bold"), 
                 bg="#ecf0f1", fg="#34495e").pack(anchor="w", pady=(0,3))
@@ -426,6 +470,72 @@ class CadastroAgendamentoWindow:
         tk.Label(main_frame, text="* Campos obrigatórios", 
                 font=("Arial", 9), bg="#ecf0f1", fg="#7f8c8d").pack(anchor="w", pady=(10,0))
     
+    def atualizar_sugestoes(self):
+        """Troca as opções do campo cliente pelos nomes parecidos com o texto"""
+        texto = self.combo_cliente.get().strip()
+        if not texto:
+            self.combo_cliente['values'] = self.nomes_clientes
+            return
+        self.combo_cliente['values'] = self.sugerir_clientes(texto)
+    
+    def ao_digitar_cliente(self, event):
+        """Agenda a busca de sugestões para quando o usuário pausar a digitação"""
+        if self.completar_agendado is not None:
+            self.janela.after_cancel(self.completar_agendado)
+        # Só completa após um caractere digitado (não após apagar ou navegar)
+        completar = bool(event.char) and event.char.isprintable()
+        self.completar_agendado = self.janela.after(
+            self.ATRASO_COMPLETAR_MS, self.completar_cliente, completar
+        )
+    
+    def completar_cliente(self, completar=True):
+        """
+        Atualiza as opções com os clientes do índice de prefixos e completa
+        o nome no próprio campo, deixando selecionada a parte sugerida.
+        """
+        self.completar_agendado = None
+        if not self.janela.winfo_exists():
+            return
+        texto = self.combo_cliente.get()
+        if not texto.strip():
+            self.combo_cliente['values'] = self.nomes_clientes
+            return
+        
+        sugestoes = self.sugerir_clientes(texto)
+        self.combo_cliente['values'] = sugestoes
+        if not completar:
+            return
+        for nome in sugestoes:
+            if len(nome) > len(texto) and nome.casefold().startswith(texto.casefold()):
+                self.combo_cliente.set(texto + nome[len(texto):])
+                self.combo_cliente.icursor(len(texto))
+                self.combo_cliente.select_range(len(texto), "end")
+                break
+    
+    def atualizar_horarios_livres(self):
+        """Busca os próximos horários livres para o serviço e a data do formulário"""
+        data = self.entry_data.get().strip()
+        inicio = data if Validador.validar_data(data) else None
+        self.horarios_livres = self.sugerir_horarios(self.combo_servico.get(), inicio)
+        self.combo_livres['values'] = [f"{dia} às {hora}" for dia, hora in self.horarios_livres]
+    
+    def escolher_horario_livre(self, event=None):
+        """Preenche data e hora com o horário livre escolhido"""
+        posicao = self.combo_livres.current()
+        if posicao < 0 or posicao >= len(self.horarios_livres):
+            return
+        dia, hora = self.horarios_livres[posicao]
+        self.entry_data.delete(0, "end")
+        self.entry_data.insert(0, dia)
+        self.entry_hora.delete(0, "end")
+        self.entry_hora.insert(0, hora)
+    
+    def existe_cliente(self, nome):
+        """Indica se há cliente com o nome exato informado"""
+        if self.cliente_existe:
+            return self.cliente_existe(nome)
+        return nome in self.nomes_clientes
+    
     def salvar_agendamento(self):
         """Valida e salva o agendamento"""
         cliente = self.combo_cliente.get()
@@ -439,6 +549,12 @@ class CadastroAgendamentoWindow:
         
         if not cliente:
             erros.append("Selecione um cliente")
+        elif self.sugerir_clientes and not self.existe_cliente(cliente):
+            sugestoes = self.sugerir_clientes(cliente)[:3]
+            if sugestoes:
+                erros.append(f"Cliente não encontrado. Você quis dizer: {', '.join(sugestoes)}?")
+            else:
+                erros.append("Cliente não encontrado")
         
         if not data:
             erros.append("Data é obrigatória")
@@ -463,6 +579,21 @@ class CadastroAgendamentoWindow:
             "observacoes": observacoes
         }
         
+        if self.verificar_conflitos:
+            conflitos = self.verificar_conflitos(agendamento_data)
+            if conflitos:
+                linhas = [
+                    f"• {a.get('hora', '')} - {a.get('cliente', '')} ({a.get('servico') or 'sem serviço'})"
+                    for a in conflitos[:5]
+                ]
+                if len(conflitos) > 5:
+                    linhas.append(f"... e mais {len(conflitos) - 5}")
+                resposta = messagebox.askyesno("Conflito de Horário",
+                                               "Este horário se sobrepõe a:\n\n" + "\n".join(linhas) +
+                                               "\n\nSalvar mesmo assim?", icon="warning")
+                if not resposta:
+                    return
+        
         if self.callback_sucesso:
             self.callback_sucesso(agendamento_data)
         
@@ -477,10 +608,8 @@ class CadastroAgendamentoWindow:
         
         # Preencher cliente
         cliente_nome = self.agendamento_editando.get('cliente', '')
-        for i, cliente in enumerate(self.clientes):
-            if cliente['nome'] == cliente_nome:
-                self.combo_cliente.set(cliente_nome)
-                break
+        if self.existe_cliente(cliente_nome):
+            self.combo_cliente.set(cliente_nome)
         
         # Preencher data
         data = self.agendamento_editando.get('data', '')
@@ -0,0 +1,345 @@
+"""
+Lista virtualizada sobre um ttk.Treeview
+"""
+from contextlib import contextmanager
+
+
+class ListaVirtual:
+    """
+    Mostra uma lista grande de registros em um Treeview sem inserir todos.
+
+    Só as linhas que cabem na altura do Treeview existem de fato no widget;
+    a barra de rolagem é controlada pela lista, que converte a posição da
+    barra em um deslocamento (offset) nos registros. Atualizar ou rolar custa
+    proporcional à altura da janela, não ao tamanho da coleção.
+
+    O iid de cada linha é o id do registro, e a seleção é guardada por id,
+    então continua valendo para registros que saíram da área visível.
+
+    Attributes:
+        tree (ttk.Treeview): Treeview que exibe as linhas visíveis
+        scrollbar (ttk.Scrollbar): Barra de rolagem vertical
+        formatar (callable): Função registro -> tupla de valores das colunas
+        registros (list): Cópia dos registros exibidos (todos ou os filtrados)
+        offset (int): Índice do primeiro registro visível
+        visiveis (int): Quantidade de linhas que cabem no Treeview
+        selecionados (dict): Ids selecionados, na ordem de seleção
+        removidos_lote (set): Ids a remover ao fim de um em_lote()
+    """
+
+    def __init__(self, tree, scrollbar, formatar):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.formatar = formatar
+
+        self.registros = []
+        self.offset = 0
+        self.visiveis = max(1, int(tree.cget("height")))
+        self.selecionados = {}
+        self.selecao_exibida = set()
+        self.acumular_selecao = False
+        self.posicoes = None
+        self.geracao_blocos = 0
+        self.descartados = set()
+        self.lote = 0
+        self.removidos_lote = set()
+        self.redesenho_pendente = False
+
+        scrollbar.configure(command=self.rolar)
+        tree.configure(yscrollcommand="")
+
+        tree.bind("<Configure>", self.ao_redimensionar)
+        tree.bind("<<TreeviewSelect>>", self.ao_selecionar, add="+")
+        tree.bind("<ButtonPress-1>", self.ao_clicar, add="+")
+        tree.bind("<MouseWheel>", self.ao_rolar_roda)
+        tree.bind("<Button-4>", lambda e: self.rolar_evento(-3, "units"))
+        tree.bind("<Button-5>", lambda e: self.rolar_evento(3, "units"))
+        tree.bind("<Prior>", lambda e: self.rolar_evento(-1, "pages"))
+        tree.bind("<Next>", lambda e: self.rolar_evento(1, "pages"))
+        tree.bind("<Up>", lambda e: self.mover_foco(-1))
+        tree.bind("<Down>", lambda e: self.mover_foco(1))
+
+    # Dados
+    def definir_registros(self, registros, completos=None):
+        """
+        Troca os registros exibidos e redesenha a área visível.
+
+        A posição de rolagem é mantida (limitada ao novo tamanho) e ids
+        selecionados que não existem mais deixam a seleção.
+
+        Args:
+            completos (list, optional): Resultado inteiro, quando `registros`
+                é só o primeiro bloco; a seleção é conferida contra ele
+        """
+        self.geracao_blocos += 1
+        self.descartados = set()
+        self.removidos_lote = set()
+        self.registros = list(registros)
+        self.posicoes = None
+        if self.selecionados:
+            if completos is not None:
+                existentes = {registro["id"] for registro in completos}
+            else:
+                existentes = self.indice_posicoes()
+            self.selecionados = {
+                id_registro: None for id_registro in self.selecionados
+                if id_registro in existentes
+            }
+        self.renderizar()
+
+    def carregar_em_blocos(self, registros, tamanho=500):
+        """
+        Exibe um resultado grande aos poucos, sem travar a janela.
+
+        O primeiro bloco aparece na hora; os demais entram a cada volta do
+        laço de eventos. Um novo definir_registros (ou outro carregamento)
+        interrompe os blocos que faltam.
+        """
+        self.definir_registros(registros[:tamanho], completos=registros)
+        geracao = self.geracao_blocos
+
+        def proximo(inicio):
+            if geracao != self.geracao_blocos:
+                return
+            bloco = registros[inicio:inicio + tamanho]
+            if not bloco:
+                self.descartados = set()
+                return
+            self.estender(bloco)
+            self.tree.after(1, proximo, inicio + tamanho)
+
+        if len(registros) > tamanho:
+            self.tree.after(1, proximo, tamanho)
+
+    def estender(self, registros):
+        """Acrescenta registros ao fim da lista (ignora os já presentes)"""
+        posicoes = self.indice_posicoes()
+        for registro in registros:
+            id_registro = registro["id"]
+            if id_registro in posicoes or id_registro in self.descartados:
+                continue
+            posicoes[id_registro] = len(self.registros)
+            self.registros.append(registro)
+        if len(self.tree.get_children()) < self.visiveis:
+            self.renderizar()
+        else:
+            self.atualizar_barra()
+
+    @contextmanager
+    def em_lote(self):
+        """
+        Agrupa várias chamadas a aplicar() em um único redesenho.
+
+        Exclusões são acumuladas e feitas em uma passada ao final, em vez de
+        uma cópia da lista e um redesenho por registro.
+        """
+        self.lote += 1
+        try:
+            yield self
+        finally:
+            self.lote -= 1
+            if not self.lote:
+                self.concluir_lote()
+
+    def concluir_lote(self):
+        removidos, self.removidos_lote = self.removidos_lote, set()
+        if removidos:
+            antes = sum(
+                1 for registro in self.registros[:self.offset] if registro["id"] in removidos
+            )
+            self.registros = [
+                registro for registro in self.registros if registro["id"] not in removidos
+            ]
+            self.posicoes = None
+            self.offset -= antes
+            self.redesenho_pendente = True
+        if self.redesenho_pendente:
+            self.redesenho_pendente = False
+            self.renderizar()
+
+    def redesenhar(self):
+        """Redesenha agora, ou ao fim do lote em andamento"""
+        if self.lote:
+            self.redesenho_pendente = True
+        else:
+            self.renderizar()
+
+    def aplicar(self, op, id_registro, registro=None, incluir=True):
+        """
+        Aplica a mudança de um único registro sem redesenhar a lista.
+
+        Edição altera só a linha do registro, se ela estiver visível;
+        inclusão entra no fim da lista. Rolagem e seleção são mantidas.
+
+        Args:
+            op (str): "add", "update" ou "delete"
+            id_registro (str): Id do registro alterado
+            registro (dict, optional): Novo conteúdo (None na exclusão)
+            incluir (bool): False se o registro não deve aparecer (ex.: não
+                corresponde ao filtro atual); equivale a uma exclusão
+        """
+        posicoes = self.indice_posicoes()
+        posicao = posicoes.get(id_registro)
+        # Blocos ainda não exibidos não devem trazer de volta a versão antiga
+        self.descartados.add(id_registro)
+
+        if op == "delete" or not incluir:
+            if posicao is not None:
+                self.remover_posicao(posicao, id_registro)
+        elif posicao is not None:
+            self.removidos_lote.discard(id_registro)
+            self.registros[posicao] = registro
+            if self.tree.exists(id_registro):
+                self.tree.item(id_registro, values=self.formatar(registro))
+        else:
+            posicoes[id_registro] = len(self.registros)
+            self.registros.append(registro)
+            if len(self.tree.get_children()) < self.visiveis:
+                self.redesenhar()
+            else:
+                self.atualizar_barra()
+
+    def remover_posicao(self, posicao, id_registro):
+        if self.lote:
+            self.removidos_lote.add(id_registro)
+            self.selecionados.pop(id_registro, None)
+            return
+        del self.registros[posicao]
+        self.posicoes = None
+        self.selecionados.pop(id_registro, None)
+        if posicao < self.offset:
+            # Manter as mesmas linhas na tela
+            self.offset -= 1
+            self.atualizar_barra()
+        elif posicao < self.offset + self.visiveis:
+            self.renderizar()
+        else:
+            self.atualizar_barra()
+
+    def indice_posicoes(self):
+        """Mapa id -> posição, montado só quando necessário"""
+        if self.posicoes is None:
+            self.posicoes = {
+                registro["id"]: posicao for posicao, registro in enumerate(self.registros)
+            }
+        return self.posicoes
+
+    def selecao(self):
+        """Ids selecionados, inclusive os fora da área visível"""
+        return tuple(self.selecionados)
+
+    def mostrar(self, id_registro):
+        """Rola até o registro informado, se ele estiver na lista"""
+        posicao = self.indice_posicoes().get(id_registro)
+        if posicao is None:
+            return
+        if not self.offset <= posicao < self.offset + self.visiveis:
+            self.offset = posicao - self.visiveis // 2
+            self.renderizar()
+
+    # Desenho
+    def limitar_offset(self):
+        maximo = max(0, len(self.registros) - self.visiveis)
+        self.offset = min(max(0, self.offset), maximo)
+
+    def renderizar(self):
+        """Recria apenas as linhas da área visível"""
+        self.limitar_offset()
+        janela = self.registros[self.offset:self.offset + self.visiveis]
+
+        filhos = self.tree.get_children()
+        if filhos:
+            self.tree.delete(*filhos)
+        for registro in janela:
+            self.tree.insert("", "end", iid=registro["id"], values=self.formatar(registro))
+
+        self.selecao_exibida = {
+            registro["id"] for registro in janela if registro["id"] in self.selecionados
+        }
+        self.tree.selection_set(list(self.selecao_exibida))
+        self.atualizar_barra()
+
+    def atualizar_barra(self):
+        total = len(self.registros)
+        if total:
+            fim = min(total, self.offset + self.visiveis)
+            self.scrollbar.set(self.offset / total, fim / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    # Eventos
+    def rolar(self, acao, quantidade=None, unidade=None):
+        """Comando da barra de rolagem ("moveto" ou "scroll")"""
+        if acao == "moveto":
+            self.offset = int(float(quantidade) * len(self.registros))
+        elif acao == "scroll":
+            passo = self.visiveis if unidade == "pages" else 1
+            self.offset += int(quantidade) * passo
+        self.renderizar()
+
+    def rolar_evento(self, quantidade, unidade):
+        self.rolar("scroll", quantidade, unidade)
+        return "break"
+
+    def ao_rolar_roda(self, event):
+        # Windows usa múltiplos de 120; macOS envia deltas pequenos
+        passos = -event.delta // 120 if abs(event.delta) >= 120 else -event.delta
+        return self.rolar_evento(passos * 3, "units")
+
+    def ao_redimensionar(self, event=None):
+        """Recalcula quantas linhas cabem na altura atual do Treeview"""
+        filhos = self.tree.get_children()
+        caixa = self.tree.bbox(filhos[0]) if filhos else None
+        if not caixa:
+            return
+        _, topo, _, altura_linha = caixa
+        visiveis = max(1, (self.tree.winfo_height() - topo) // altura_linha)
+        if visiveis != self.visiveis:
+            self.visiveis = visiveis
+            self.renderizar()
+
+    def ao_clicar(self, event):
+        # Ctrl/Shift + clique somam à seleção; clique simples a substitui,
+        # inclusive descartando ids selecionados fora da área visível
+        self.acumular_selecao = bool(event.state & 0x0005)
+        linha = self.tree.identify_row(event.y)
+        if linha and not self.acumular_selecao:
+            self.selecionados = {linha: None}
+            self.selecao_exibida = None
+
+    def ao_selecionar(self, event=None):
+        """Sincroniza a seleção por id com a seleção das linhas visíveis"""
+        exibida = set(self.tree.selection())
+        if exibida == self.selecao_exibida:
+            return
+        if not self.acumular_selecao:
+            self.selecionados = {}
+        for id_registro in self.tree.get_children():
+            if id_registro in exibida:
+                self.selecionados[id_registro] = None
+            else:
+                self.selecionados.pop(id_registro, None)
+        self.selecao_exibida = exibida
+        self.acumular_selecao = False
+
+    def mover_foco(self, passo):
+        """Setas no limite da área visível rolam a lista em vez de parar"""
+        filhos = self.tree.get_children()
+        if not filhos:
+            return None
+        foco = self.tree.focus()
+        no_limite = (passo < 0 and foco == filhos[0]) or (passo > 0 and foco == filhos[-1])
+        if not no_limite:
+            return None
+
+        self.offset += passo
+        self.renderizar()
+        filhos = self.tree.get_children()
+        if not filhos:
+            return "break"
+        destino = filhos[0] if passo < 0 else filhos[-1]
+        self.selecionados = {destino: None}
+        self.selecao_exibida = {destino}
+        self.tree.selection_set(destino)
+        self.tree.focus(destino)
+        return "break"
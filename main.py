@@ -53,6 +53,13 @@ def main():
     - ImportError: Quando módulos não são encontrados
     - Exception: Erros gerais de inicialização
     """
+    if "--reconstruir-rollups" in sys.argv:
+        reconstruir_rollups()
+        return
+    if "--analise" in sys.argv:
+        analise_avulsa()
+        return
+    
     try:
         print("Iniciando Sistema de Barbearia v2.0 - Modularizado...")
         
@@ -81,6 +88,67 @@ def main():
             f"Erro ao inicializar sistema:\n{e}"
         )
 
+
+def reconstruir_rollups():
+    """
+    Recalcula os rollups dos relatórios (data/rollups.json) sem abrir a interface.
+    
+    Uso: python main.py --reconstruir-rollups
+    """
+    from app.data_manager import DataManager
+    
+    data_manager = DataManager()
+    data_manager.reconstruir_rollups()
+    data_manager.fechar()
+    print(f"✓ Rollups reconstruídos em {data_manager.rollups_file}")
+
+
+
+def analise_avulsa():
+    """
+    Imprime uma análise do histórico de cortes e agendamentos (MotorAnalise).
+    
+    Com o NumPy instalado, confere também o resultado vetorizado contra o de
+    Python puro.
+    
+    Uso: python main.py --analise
+    """
+    from app.analise import MotorAnalise
+    from app.data_manager import DataManager
+    
+    data_manager = DataManager()
+    motor = MotorAnalise.de_data_manager(data_manager)
+    data_manager.fechar()
+    resumo = motor.resumo()
+    
+    print(f"Análise de {len(motor.colunas['tipo'])} cortes e {len(motor.colunas['status'])} agendamentos "
+          f"({'NumPy' if motor.vetorizado else 'Python puro'})")
+    if resumo["periodo"]:
+        primeiro, ultimo = resumo["periodo"]
+        print(f"Período: {primeiro:%d/%m/%Y %H:%M} a {ultimo:%d/%m/%Y %H:%M}")
+    print(f"Receita: R$ {resumo['receita'] / 100:.2f}")
+    precos = resumo["precos"]
+    if precos["quantidade"]:
+        print(f"Preço médio: R$ {precos['soma'] / precos['quantidade'] / 100:.2f} "
+              f"(menor R$ {precos['menor'] / 100:.2f}, maior R$ {precos['maior'] / 100:.2f})")
+    print("Tipos que mais faturam:")
+    for tipo, centavos in resumo["top_tipos"]:
+        print(f"  {tipo}: R$ {centavos / 100:.2f} ({resumo['por_tipo'][tipo]} cortes)")
+    print("Receita por mês:")
+    for mes, centavos in resumo["receita_por_mes"].items():
+        print(f"  {mes}: R$ {centavos / 100:.2f}")
+    print("Agendamentos por status:")
+    for status, quantidade in resumo["por_status"].items():
+        print(f"  {status}: {quantidade}")
+    
+    if motor.vetorizado:
+        divergentes = motor.conferir()
+        if divergentes:
+            print(f"✗ NumPy e Python puro divergem em: {', '.join(divergentes)}")
+        else:
+            print("✓ NumPy e Python puro conferem")
+
+
 if __name__ == "__main__":
     # Ponto de entrada do programa
     # Executa apenas quando o arquivo é rodado diretamente
@@ -20,7 +20,23 @@ Observações importantes:
 - Campo "barbeiro" foi REMOVIDO da classe Corte
 - Todos os modelos suportam conversão JSON
 - Dados opcionais têm valores padrão vazios
+- Todo registro persistido tem um campo "id" único e estável (gerar_id)
 """
+import uuid
+
+
+def gerar_id():
+    """
+    Gera um identificador único e estável para um registro.
+    
+    O id é gravado junto com o registro e não muda em edições,
+    permitindo localizar o registro sem comparar valores exibidos.
+    
+    Returns:
+        str: Identificador hexadecimal de 32 caracteres
+    """
+    return uuid.uuid4().hex
+
 
 class Cliente:
     """
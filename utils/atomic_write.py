@@ -0,0 +1,219 @@
+"""
+=================================================
+GRAVAÇÃO ATÔMICA DE ARQUIVOS
+=================================================
+
+Este módulo centraliza a gravação segura de arquivos
+do sistema: o conteúdo é escrito em um arquivo
+temporário na mesma pasta e depois renomeado sobre o
+destino, de modo que uma queda no meio da gravação
+nunca deixa o arquivo truncado.
+
+A durabilidade (fsync) é configurável pela política:
+- "nunca": não chama fsync (mais rápido, depende do SO)
+- "sempre": fsync do arquivo e da pasta a cada gravação
+- "grupo": fsync agrupado, feito por uma thread a cada
+  intervalo (group commit)
+
+A política padrão vem das variáveis de ambiente
+BARBEARIA_FSYNC ("sempre" se ausente) e
+BARBEARIA_FSYNC_INTERVALO (segundos, padrão 1.0).
+
+=================================================
+"""
+
+import atexit
+import json
+import os
+import tempfile
+import threading
+
+
+FSYNC_NUNCA = "nunca"
+FSYNC_SEMPRE = "sempre"
+FSYNC_GRUPO = "grupo"
+
+MODOS_FSYNC = (FSYNC_NUNCA, FSYNC_SEMPRE, FSYNC_GRUPO)
+
+
+class PoliticaDurabilidade:
+    """
+    Política de fsync aplicada após cada gravação.
+
+    No modo "grupo", os caminhos gravados são acumulados e uma thread
+    de fundo faz o fsync de todos eles a cada `intervalo` segundos,
+    trocando alguns instantes de durabilidade por latência menor.
+
+    Attributes:
+        modo (str): "nunca", "sempre" ou "grupo"
+        intervalo (float): Período do fsync agrupado, em segundos
+        pendentes (set): Caminhos aguardando fsync (modo "grupo")
+    """
+
+    def __init__(self, modo=FSYNC_SEMPRE, intervalo=1.0):
+        if modo not in MODOS_FSYNC:
+            raise ValueError(f"Política de fsync inválida: {modo}")
+        self.modo = modo
+        self.intervalo = intervalo
+        self.pendentes = set()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.parar = threading.Event()
+
+        if modo == FSYNC_GRUPO:
+            self.thread = threading.Thread(target=self.executar, name="fsync-grupo", daemon=True)
+            self.thread.start()
+            atexit.register(self.sincronizar_pendentes)
+
+    def sincronizar(self, arquivo, caminho):
+        """
+        Aplica a política a um arquivo recém-escrito (ainda aberto).
+
+        Args:
+            arquivo: Objeto de arquivo aberto para escrita
+            caminho (str): Caminho final do arquivo
+        """
+        if self.modo == FSYNC_NUNCA:
+            return
+        arquivo.flush()
+        if self.modo == FSYNC_SEMPRE:
+            os.fsync(arquivo.fileno())
+        else:
+            with self.lock:
+                self.pendentes.add(caminho)
+
+    def sincronizar_diretorio(self, pasta):
+        """Garante que a renomeação dentro da pasta seja durável"""
+        if self.modo == FSYNC_SEMPRE:
+            fsync_caminho(pasta)
+        elif self.modo == FSYNC_GRUPO:
+            with self.lock:
+                self.pendentes.add(pasta)
+
+    def sincronizar_pendentes(self):
+        """Faz o fsync de tudo que foi gravado desde o último ciclo"""
+        with self.lock:
+            pendentes, self.pendentes = self.pendentes, set()
+        for caminho in pendentes:
+            fsync_caminho(caminho)
+
+    def executar(self):
+        """Laço da thread de group commit"""
+        while not self.parar.wait(self.intervalo):
+            self.sincronizar_pendentes()
+
+    def encerrar(self):
+        """Sincroniza as pendências e para a thread de group commit"""
+        self.parar.set()
+        self.sincronizar_pendentes()
+
+
+def fsync_caminho(caminho):
+    """
+    Faz fsync de um arquivo ou pasta pelo caminho.
+
+    Pastas só podem ser sincronizadas em sistemas POSIX; arquivos que
+    já não existem (ex.: journal compactado) são ignorados.
+    """
+    if os.path.isdir(caminho) and os.name != "posix":
+        return
+    try:
+        fd = os.open(caminho, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+_politica_padrao = None
+
+
+def obter_politica():
+    """
+    Retorna a política de durabilidade compartilhada pelo sistema.
+
+    Criada na primeira chamada a partir de BARBEARIA_FSYNC e
+    BARBEARIA_FSYNC_INTERVALO.
+    """
+    global _politica_padrao
+    if _politica_padrao is None:
+        _politica_padrao = PoliticaDurabilidade(
+            os.environ.get("BARBEARIA_FSYNC", FSYNC_SEMPRE),
+            float(os.environ.get("BARBEARIA_FSYNC_INTERVALO", "1.0"))
+        )
+    return _politica_padrao
+
+
+def escrever_atomico(caminho, conteudo, politica=None):
+    """
+    Substitui o conteúdo de um arquivo de forma atômica.
+
+    Escreve em um temporário na mesma pasta e renomeia sobre o destino
+    com os.replace: leitores veem o arquivo antigo ou o novo completo,
+    nunca um arquivo truncado.
+
+    Args:
+        caminho (str): Arquivo de destino
+        conteudo (str): Texto a gravar (UTF-8)
+        politica (PoliticaDurabilidade, optional): Padrão: obter_politica()
+    """
+    politica = politica or obter_politica()
+    pasta = os.path.dirname(caminho) or "."
+    os.makedirs(pasta, exist_ok=True)
+
+    fd, temporario = tempfile.mkstemp(
+        dir=pasta, prefix=f".{os.path.basename(caminho)}.", suffix=".tmp"
+    )
+    try:
+        # mkstemp cria com permissão 0600; manter a do arquivo original
+        modo = os.stat(caminho).st_mode & 0o777 if os.path.exists(caminho) else 0o644
+        os.chmod(temporario, modo)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(conteudo)
+            politica.sincronizar(f, caminho)
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    politica.sincronizar_diretorio(pasta)
+
+
+def salvar_json_atomico(caminho, dados, indent=2, politica=None):
+    """
+    Salva dados em JSON de forma atômica.
+
+    Args:
+        caminho (str): Arquivo de destino
+        dados: Dados serializáveis em JSON
+        indent (int): Indentação do JSON
+        politica (PoliticaDurabilidade, optional): Padrão: obter_politica()
+    """
+    conteudo = json.dumps(dados, indent=indent, ensure_ascii=False)
+    escrever_atomico(caminho, conteudo, politica)
+
+
+def anexar(caminho, conteudo, politica=None, truncar=False):
+    """
+    Anexa texto a um arquivo (usado pelos journals), aplicando a política.
+
+    Args:
+        caminho (str): Arquivo de destino
+        conteudo (str): Texto a anexar
+        politica (PoliticaDurabilidade, optional): Padrão: obter_politica()
+        truncar (bool): Recria o arquivo em vez de anexar
+    """
+    politica = politica or obter_politica()
+    pasta = os.path.dirname(caminho) or "."
+    os.makedirs(pasta, exist_ok=True)
+    novo = truncar or not os.path.exists(caminho)
+
+    with open(caminho, 'w' if truncar else 'a', encoding='utf-8') as f:
+        f.write(conteudo)
+        politica.sincronizar(f, caminho)
+    if novo:
+        politica.sincronizar_diretorio(pasta)
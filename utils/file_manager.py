@@ -16,6 +16,7 @@ import shutil
 from datetime import datetime
 from tkinter import messagebox
 from core.config import config
+from utils.atomic_write import salvar_json_atomico
 
 
 class FileManager:
@@ -106,9 +107,8 @@ class FileManager:
             if os.path.exists(filepath):
                 self.create_backup(filename)
             
-            # Salvar dados
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            # Salvar dados (arquivo temporário + rename: nunca fica truncado)
+            salvar_json_atomico(filepath, data)
             
             print(f"✓ Dados salvos em {filename}")
             return True
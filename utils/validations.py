@@ -16,6 +16,7 @@ Inclui validações para:
 E constantes para:
 - Tipos de corte
 - Status de agendamentos
+- Duração dos serviços e horário de funcionamento
 
 Autor: Sistema Barbearia v2.0
 Data: Julho 2025
@@ -335,6 +336,40 @@ TIPOS_CORTE = [
     "Combo Corte + Barba"   # Pacote completo com desconto
 ]
 
+# Duração de cada serviço em minutos, usada para detectar conflitos de
+# horário na agenda e para calcular horários livres
+DURACAO_SERVICO = {
+    "Corte Degradê": 40,
+    "Corte Social": 30,
+    "Corte Militar": 20,
+    "Corte Undercut": 40,
+    "Corte Samurai": 45,
+    "Corte Americano": 30,
+    "Barba Completa": 30,
+    "Barba + Bigode": 30,
+    "Aparar Barba": 15,
+    "Sobrancelha": 15,
+    "Combo Corte + Barba": 60
+}
+
+# Duração assumida para serviços sem duração cadastrada (ou não informados)
+DURACAO_PADRAO = 30
+
+# Horário de funcionamento por dia da semana (0 = segunda ... 6 = domingo);
+# None indica dia fechado
+HORARIO_FUNCIONAMENTO = {
+    0: ("09:00", "19:00"),
+    1: ("09:00", "19:00"),
+    2: ("09:00", "19:00"),
+    3: ("09:00", "19:00"),
+    4: ("09:00", "19:00"),
+    5: ("09:00", "17:00"),
+    6: None
+}
+
+# Intervalo em minutos entre os horários oferecidos na agenda
+INTERVALO_HORARIOS = 15
+
 # Status possíveis para agendamentos
 # Controla o fluxo de trabalho da barbearia
 STATUS_AGENDAMENTO = [